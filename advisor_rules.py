@@ -0,0 +1,256 @@
+import re
+
+# =====================================================
+# RULE TABLES
+# =====================================================
+
+# Health keywords detected in user questions (shared with chatbot.py)
+HEALTH_KEYWORDS = ['asthma', 'copd', 'heart', 'lung', 'breathing', 'respiratory', 'allergy', 'pregnant', 'elderly', 'child']
+
+# Whole-word patterns for the keywords, with common inflections, so that
+# e.g. "heartburn" does not count as a heart condition
+CONDITION_PATTERNS = {
+    'asthma': re.compile(r"\basthma(tic)?\b"),
+    'copd': re.compile(r"\bcopd\b"),
+    'heart': re.compile(r"\bheart\b"),
+    'lung': re.compile(r"\blungs?\b"),
+    'breathing': re.compile(r"\bbreathing\b"),
+    'respiratory': re.compile(r"\brespiratory\b"),
+    'allergy': re.compile(r"\ballerg(y|ies|ic)\b"),
+    'pregnant': re.compile(r"\bpregnan(t|cy)\b"),
+    'elderly': re.compile(r"\belderly\b"),
+    'child': re.compile(r"\b(child|children|kids?)\b")
+}
+
+# Questions longer than this are treated as open-ended and sent to the model
+MAX_LOCAL_QUESTION_WORDS = 15
+MAX_CONDITION_STATEMENT_WORDS = 5
+
+# (upper AQI bound, label, emoji, general advice, exercise advice)
+AQI_BANDS = [
+    (50, "Good Air Quality (0-50)", "🟢",
+     ["Air quality is satisfactory",
+      "Outdoor activities are safe for everyone",
+      "Great time for exercise and outdoor recreation"],
+     "Outdoor exercise is safe for everyone - enjoy it!"),
+    (100, "Moderate Air Quality (51-100)", "🟡",
+     ["Air quality is acceptable for most people",
+      "Sensitive individuals may experience minor issues",
+      "Consider reducing prolonged outdoor exertion if sensitive"],
+     "Outdoor exercise is fine for most people. Sensitive individuals should keep sessions shorter and lighter."),
+    (150, "Unhealthy for Sensitive Groups (101-150)", "🟠",
+     ["People with respiratory/heart conditions should limit outdoor activities",
+      "Consider wearing masks when outdoors",
+      "Keep windows closed and use air purifiers indoors"],
+     "Healthy adults can exercise outdoors with reduced intensity. Sensitive groups should move workouts indoors."),
+    (200, "Unhealthy Air Quality (151-200)", "🔴",
+     ["Everyone should limit outdoor activities",
+      "Wear N95 masks when going outside",
+      "Stay indoors with air purification when possible",
+      "Avoid outdoor exercise"],
+     "Avoid outdoor exercise. Choose light indoor workouts in a filtered room instead."),
+    (float('inf'), "Very Unhealthy Air Quality (200+)", "🟣",
+     ["Avoid outdoor activities entirely",
+      "Stay indoors with sealed windows",
+      "Use air purifiers and wear masks even indoors if needed",
+      "Seek medical attention if experiencing breathing difficulties"],
+     "Do not exercise outdoors. Keep indoor activity light until air quality improves.")
+]
+
+# Notes on the pollutant driving the overall AQI
+POLLUTANT_NOTES = {
+    'pm2_5': "Fine particles (PM2.5) are the main pollutant - they reach deep into the lungs, so a well-fitted N95 mask and HEPA filtration help most.",
+    'pm10': "Coarse particles (PM10, e.g. dust) are the main pollutant - masks and keeping windows closed on windy days help.",
+    'co': "Carbon monoxide is elevated - avoid congested roads and make sure indoor fuel-burning appliances are ventilated.",
+    'no2': "Nitrogen oxides from traffic are elevated - avoid exercising near busy roads, especially at rush hour.",
+    'so2': "Sulphur dioxide is elevated - people with asthma are especially sensitive; keep reliever medication at hand.",
+    'o3': "Ozone is the main pollutant - levels usually peak in the afternoon, so plan outdoor time for early morning.",
+    'nh3': "Ammonia is elevated - this is often agricultural; keep windows closed when the odour is noticeable."
+}
+
+# Condition keyword -> extra advice (keywords match HEALTH_KEYWORDS)
+CONDITION_RULES = {
+    'asthma': "Keep your reliever inhaler with you, follow your asthma action plan and avoid outdoor exertion when AQI is above 100.",
+    'copd': "Stay indoors on poor air days, keep rescue medication nearby and contact your doctor if breathlessness increases.",
+    'heart': "Poor air can strain the heart - avoid strenuous activity outdoors and seek care for chest pain or palpitations.",
+    'lung': "Limit time outdoors when AQI rises and watch for coughing or shortness of breath.",
+    'breathing': "If you notice breathing difficulty, move indoors to filtered air and seek medical help if it persists.",
+    'respiratory': "Reduce outdoor exposure, use an air purifier at home and keep prescribed medication available.",
+    'allergy': "Keep windows closed, shower after being outdoors and consider an air purifier with a HEPA filter.",
+    'pregnant': "Pregnant women should minimise exposure on days above 100 AQI and rest in well-filtered rooms.",
+    'elderly': "Older adults are more sensitive - keep outings short on poor air days and check on vulnerable relatives.",
+    'child': "Children breathe faster and are more exposed - keep outdoor play short and indoors when AQI is above 100."
+}
+
+# Static answers for general questions that do not depend on AQI data
+GENERAL_ANSWERS = {
+    'what_is_aqi': (
+        "**What is AQI?**\n"
+        "• The Air Quality Index turns pollutant concentrations into a single 0-500 score\n"
+        "• A sub-index is calculated for each pollutant (PM2.5, PM10, CO, NO2, SO2, O3, NH3) from breakpoint tables\n"
+        "• The overall AQI is the highest of these sub-indices\n"
+        "• Lower is better: 0-50 is good, above 200 is very unhealthy"
+    ),
+    'health_effects': (
+        "**Health effects of air pollution**\n"
+        "• Short term: eye and throat irritation, coughing, worsening of asthma\n"
+        "• Long term: reduced lung function, heart disease and stroke risk\n"
+        "• Children, older adults, pregnant women and people with heart or lung disease are most at risk"
+    ),
+    'protect': (
+        "**Protecting yourself from poor air quality**\n"
+        "• Check the AQI before planning outdoor activities\n"
+        "• Wear a well-fitted N95 mask outdoors on poor air days\n"
+        "• Keep windows closed and use a HEPA air purifier indoors\n"
+        "• Avoid exercising near busy roads"
+    ),
+    'pollutants': (
+        "**Main air pollutants**\n"
+        "• PM2.5 and PM10 - fine and coarse particles from combustion and dust\n"
+        "• NO2 and CO - mostly from vehicle traffic\n"
+        "• SO2 - from burning coal and oil\n"
+        "• O3 - formed in sunlight from other pollutants\n"
+        "• NH3 - mostly from agriculture"
+    ),
+    'purification': (
+        "**Indoor air purification tips**\n"
+        "• Use an air purifier with a HEPA filter sized for the room\n"
+        "• Keep windows closed when outdoor AQI is high and ventilate when it is low\n"
+        "• Avoid indoor smoke sources such as incense, candles and smoking\n"
+        "• Clean with a damp cloth and vacuum with a HEPA vacuum"
+    ),
+    'weather': (
+        "**How weather affects air quality**\n"
+        "• Wind disperses pollution, calm days let it build up\n"
+        "• Rain washes particles out of the air\n"
+        "• Temperature inversions in winter trap pollution near the ground\n"
+        "• Hot sunny days increase ozone formation"
+    )
+}
+
+# Question classes: (intent, pattern). The first matching intent wins.
+QUESTION_PATTERNS = [
+    ('what_is_aqi', re.compile(r"\bwhat\s+is\s+(the\s+)?aqi\b|\bhow\s+is\s+(the\s+)?aqi\s+calculated\b")),
+    ('meaning', re.compile(r"\bwhat\s+does\s+(this|the|today'?s)?\s*aqi\b|\baqi\s+level\s+mean\b")),
+    ('health_effects', re.compile(r"\bhealth\s+effects?\b|\beffects?\s+of\s+(air\s+)?pollution\b")),
+    ('pollutants', re.compile(r"\b(main|major|common)\s+(air\s+)?pollutants?\b")),
+    ('weather', re.compile(r"\bweather\b")),
+    ('purification', re.compile(r"\bpurif\w*\b|\bindoor\s+air\b")),
+    ('exercise', re.compile(r"\b(exercise|workout|run|running|jog\w*|walk\w*|cycl\w*|gym)\b")),
+    ('outdoor', re.compile(r"\b(outdoors?|outside)\b")),
+    ('precautions', re.compile(r"\bprecautions?\b|\bwhat\s+should\s+i\s+do\b|\bstay\s+(safe|healthy)\b")),
+    ('protect', re.compile(r"\bprotect\b"))
+]
+
+# =====================================================
+# RULE EVALUATION
+# =====================================================
+
+def get_aqi_band(aqi_value):
+    """Return the AQI_BANDS entry for an AQI value"""
+    for band in AQI_BANDS:
+        if aqi_value <= band[0]:
+            return band
+    return AQI_BANDS[-1]
+
+def detect_conditions(question):
+    """Return the health keywords mentioned in a question as whole words, in table order"""
+    text = question.lower()
+    return [keyword for keyword in HEALTH_KEYWORDS if CONDITION_PATTERNS[keyword].search(text)]
+
+def format_condition_advice(conditions):
+    """Format the advice block for detected health conditions, or an empty string"""
+    if not conditions:
+        return ""
+    return "**For your health condition**\n" + "\n".join(f"• {CONDITION_RULES[c]}" for c in conditions)
+
+def classify_question(question):
+    """
+    Classify a question into one of the locally answerable classes
+
+    Returns:
+        str: Intent name, or None for open-ended questions that need the model
+    """
+    text = question.lower().strip()
+    if not text or len(text.split()) > MAX_LOCAL_QUESTION_WORDS:
+        return None
+
+    for intent, pattern in QUESTION_PATTERNS:
+        if pattern.search(text):
+            return intent
+
+    # Bare condition statements such as "I have asthma"
+    if detect_conditions(text) and len(text.split()) <= MAX_CONDITION_STATEMENT_WORDS:
+        return 'precautions'
+    return None
+
+def format_band_advice(aqi_value, title_prefix=""):
+    """Format the general advice block for an AQI value"""
+    _, label, emoji, advice, _ = get_aqi_band(aqi_value)
+    lines = [f"{emoji} **{title_prefix}{label}**"]
+    lines += [f"• {item}" for item in advice]
+    return "\n".join(lines)
+
+def format_forecast_outlook(forecasted_aqi):
+    """Short outlook line for the forecast peak, or an empty string"""
+    if not forecasted_aqi:
+        return ""
+    peak = max(forecasted_aqi)
+    peak_hour = forecasted_aqi.index(peak)
+    _, label, emoji, _, _ = get_aqi_band(peak)
+    return f"\n\n{emoji} **Outlook:** forecast peaks at {peak:.0f} ({label}) in about {peak_hour + 1} hours."
+
+def answer_locally(question, current_aqi=None, forecasted_aqi=None, dominant_pollutant=None):
+    """
+    Answer common question classes from the rule tables
+
+    Args:
+        question: User question
+        current_aqi: Current AQI value (optional)
+        forecasted_aqi: List of forecasted AQI values (optional)
+        dominant_pollutant: Pollutant with the highest sub-index (optional)
+
+    Returns:
+        str: Advice text, or None if the question should go to the model
+    """
+    if not question:
+        return None
+
+    intent = classify_question(question)
+    if intent is None:
+        return None
+
+    # Condition advice is added whatever the intent, e.g. for
+    # "asthma and weather" as well as "can I run with asthma"
+    condition_advice = format_condition_advice(detect_conditions(question))
+
+    if intent in GENERAL_ANSWERS:
+        return "\n\n".join(filter(None, [GENERAL_ANSWERS[intent], condition_advice]))
+
+    forecasted_aqi = list(forecasted_aqi or [])
+    aqi_value = current_aqi if current_aqi is not None else (forecasted_aqi[0] if forecasted_aqi else None)
+
+    # Data-dependent classes without data: protect has a generic answer,
+    # the rest need the model
+    if aqi_value is None:
+        if intent != 'protect':
+            return None
+        return "\n\n".join(filter(None, [GENERAL_ANSWERS['protect'], condition_advice]))
+
+    band = get_aqi_band(aqi_value)
+    parts = []
+
+    if intent == 'exercise':
+        parts.append(f"{band[2]} **Exercise at AQI {aqi_value:.0f}**\n• {band[4]}")
+    elif intent == 'meaning':
+        parts.append(format_band_advice(aqi_value, title_prefix=f"AQI {aqi_value:.0f}: "))
+    else:
+        parts.append(format_band_advice(aqi_value))
+
+    if condition_advice:
+        parts.append(condition_advice)
+
+    if dominant_pollutant in POLLUTANT_NOTES and aqi_value > 50:
+        parts.append(POLLUTANT_NOTES[dominant_pollutant])
+
+    return "\n\n".join(parts) + format_forecast_outlook(forecasted_aqi)
@@ -0,0 +1,80 @@
+import numpy as np
+import requests
+import pandas as pd
+from datetime import datetime
+
+from aqi_calculator import calculate_overall_aqi_array
+from lat_lon import OWM_BASE_URL
+from owm_decoder import COMPONENT_COLS, decode_air_pollution
+import telemetry
+
+# History windows used by the dashboard
+CURRENT_WINDOW_HOURS = 24
+HISTORY_WINDOW_DAYS = 180
+
+class APIRequestError(Exception):
+    """OpenWeatherMap answered with a non-200 status"""
+
+def fetch_air_pollution_history(api_key, latitude, longitude, start, end):
+    """
+    Fetch hourly air pollution history from OpenWeatherMap
+
+    Args:
+        api_key: OpenWeatherMap API key
+        latitude, longitude: Location coordinates
+        start, end: Unix timestamps (seconds) bounding the window
+
+    Returns:
+        bytes: Raw response body with a 'list' of hourly records; pass it to
+               process_aqi_data, which decodes it without json.loads
+    """
+    with telemetry.span("api.fetch_history", hours=(end - start) // 3600):
+        resp = requests.get(
+            f"{OWM_BASE_URL}/data/2.5/air_pollution/history",
+            params={
+                "lat": latitude,
+                "lon": longitude,
+                "start": start,
+                "end": end,
+                "appid": api_key
+            }
+        )
+        telemetry.set_attribute("payload_bytes", len(resp.content))
+        telemetry.set_attribute("status", resp.status_code)
+
+        if resp.status_code != 200:
+            raise APIRequestError(f"API request failed with status {resp.status_code}")
+
+        return resp.content
+
+def fetch_recent_history(api_key, latitude, longitude, hours):
+    """Fetch the last `hours` hours of air pollution history"""
+    curr_ts = int(datetime.now().timestamp())
+    return fetch_air_pollution_history(api_key, latitude, longitude, curr_ts - hours * 3600, curr_ts)
+
+def process_aqi_data(data):
+    """
+    Process raw API data into structured DataFrame
+
+    Args:
+        data: Raw response body (bytes) or the parsed response dict
+
+    Returns:
+        pd.DataFrame: 'dt' (local time), 'main.aqi', float32 'components.*'
+                      and 'Overall_AQI', one row per hour
+    """
+    with telemetry.span("process_aqi_data") as attrs:
+        with telemetry.span("decode_response"):
+            columns = decode_air_pollution(data)
+        attrs['rows'] = len(columns['dt'])
+        with telemetry.span("calculate_overall_aqi"):
+            # From the float64 values: the sub-index truncation can differ on float32-rounded inputs
+            overall_aqi = calculate_overall_aqi_array(columns)
+        df = pd.DataFrame({
+            'dt': pd.to_datetime(columns['dt'], unit='s', utc=True)
+                    .tz_convert('Asia/Kolkata').tz_localize(None).astype('datetime64[us]'),
+            'main.aqi': columns['main.aqi'],
+            **{column: columns[column].astype(np.float32) for column in COMPONENT_COLS},
+            'Overall_AQI': overall_aqi
+        })
+        return df
@@ -0,0 +1,250 @@
+"""
+AQI threshold alerts for subscribed users.
+
+Subscriptions are (user, city, threshold, condition, source) tuples, e.g.
+"notify me when the forecast for Delhi goes above 150". They are indexed
+per city and sorted by threshold, so a refresh only touches the affected
+city's subscriptions and finds the crossed ones with a binary search.
+
+An alert fires once when the value crosses its threshold and re-arms only
+after the value has moved back by HYSTERESIS AQI points, so readings that
+hover around a boundary do not notify on every refresh.
+"""
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from aqi_calculator import get_aqi_category
+
+CONDITIONS = ['above', 'below']
+SOURCES = ['current', 'forecast']
+
+# AQI points the value must move back past the threshold to re-arm
+HYSTERESIS = 10.0
+# Minimum seconds between two notifications of the same subscription
+COOLDOWN_S = 3600
+
+# =====================================================
+# SINKS
+# =====================================================
+
+class QueueSink:
+    """Collect notifications in an in-process queue (stand-in for a message broker)"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def send(self, notifications):
+        for notification in notifications:
+            self.queue.put(notification)
+
+    def drain(self):
+        items = []
+        while not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        return items
+
+class JsonlFileSink:
+    """Append notifications to a file as one JSON line each"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, notifications):
+        if not notifications:
+            return
+        lines = "".join(json.dumps(n) + "\n" for n in notifications)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(lines)
+
+# =====================================================
+# INDEX
+# =====================================================
+
+class _CityIndex:
+    """Subscriptions of one city as parallel arrays, sorted by threshold per condition"""
+
+    def __init__(self):
+        self.pending = {}  # (user, threshold, condition, source) added since the last rebuild, in order
+        self.users = np.empty(0, dtype=object)
+        self.thresholds = np.empty(0, dtype=np.float64)
+        self.conditions = np.empty(0, dtype=np.int8)    # index into CONDITIONS
+        self.sources = np.empty(0, dtype=np.int8)       # index into SOURCES
+        self.armed = np.empty(0, dtype=bool)
+        self.last_sent = np.empty(0, dtype=np.float64)
+        self.active = np.empty(0, dtype=bool)
+        self.keys = {}    # (user, threshold, condition, source) -> row, for dedup and removal
+        self.groups = {}  # (condition, source) -> slice of rows
+
+    def __len__(self):
+        return int(self.active.sum()) + len(self.pending)
+
+    def rebuild(self):
+        """Merge pending subscriptions and re-sort by (condition, source, threshold)"""
+        if not self.pending:
+            return
+        new = list(self.pending)
+        self.pending = {}
+        users = np.concatenate([self.users, np.array([s[0] for s in new], dtype=object)])
+        thresholds = np.concatenate([self.thresholds, np.array([s[1] for s in new], dtype=np.float64)])
+        conditions = np.concatenate([self.conditions, np.array([CONDITIONS.index(s[2]) for s in new], dtype=np.int8)])
+        sources = np.concatenate([self.sources, np.array([SOURCES.index(s[3]) for s in new], dtype=np.int8)])
+        armed = np.concatenate([self.armed, np.ones(len(new), dtype=bool)])
+        last_sent = np.concatenate([self.last_sent, np.full(len(new), -np.inf)])
+        active = np.concatenate([self.active, np.ones(len(new), dtype=bool)])
+
+        # Drop removed rows while re-sorting
+        keep = np.flatnonzero(active)
+        order = keep[np.lexsort((thresholds[keep], sources[keep], conditions[keep]))]
+        self.users, self.thresholds = users[order], thresholds[order]
+        self.conditions, self.sources = conditions[order], sources[order]
+        self.armed, self.last_sent = armed[order], last_sent[order]
+        self.active = np.ones(len(order), dtype=bool)
+        self.keys = {
+            (user, threshold, CONDITIONS[c], SOURCES[s]): row
+            for row, (user, threshold, c, s) in enumerate(
+                zip(self.users, self.thresholds.tolist(), self.conditions.tolist(), self.sources.tolist())
+            )
+        }
+
+        # Rows are sorted by group first, so each group is one contiguous slice
+        group_keys = self.conditions.astype(np.int64) * len(SOURCES) + self.sources
+        self.groups = {}
+        for c, condition in enumerate(CONDITIONS):
+            for s, source in enumerate(SOURCES):
+                key = c * len(SOURCES) + s
+                self.groups[(condition, source)] = slice(
+                    int(np.searchsorted(group_keys, key, 'left')), int(np.searchsorted(group_keys, key, 'right'))
+                )
+
+class AlertEngine:
+    """
+    Evaluate AQI threshold subscriptions on every data refresh
+
+    Args:
+        sink: Object with .send(list of notification dicts); default QueueSink
+        hysteresis: AQI points the value must move back to re-arm an alert
+        cooldown_s: Minimum seconds between notifications of one subscription
+    """
+
+    def __init__(self, sink=None, hysteresis=HYSTERESIS, cooldown_s=COOLDOWN_S):
+        self.sink = sink if sink is not None else QueueSink()
+        self.hysteresis = hysteresis
+        self.cooldown_s = cooldown_s
+        self._cities = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(index) for index in self._cities.values())
+
+    def subscribe(self, user, city, threshold, condition='above', source='current'):
+        """Add a subscription; duplicates of an existing one are ignored"""
+        if condition not in CONDITIONS:
+            raise ValueError(f"Unknown condition '{condition}', expected one of {CONDITIONS}")
+        if source not in SOURCES:
+            raise ValueError(f"Unknown source '{source}', expected one of {SOURCES}")
+        key = (user, float(threshold), condition, source)
+        with self._lock:
+            index = self._cities.setdefault(city.strip().lower(), _CityIndex())
+            if key in index.keys or key in index.pending:
+                return False
+            index.pending[key] = None
+            return True
+
+    def subscribe_many(self, subscriptions):
+        """Add (user, city, threshold, condition, source) tuples; returns how many were new"""
+        added = 0
+        for user, city, threshold, condition, source in subscriptions:
+            added += self.subscribe(user, city, threshold, condition, source)
+        return added
+
+    def unsubscribe(self, user, city, threshold, condition='above', source='current'):
+        key = (user, float(threshold), condition, source)
+        with self._lock:
+            index = self._cities.get(city.strip().lower())
+            if index is None:
+                return False
+            if key in index.pending:
+                del index.pending[key]
+                return True
+            row = index.keys.pop(key, None)
+            if row is None:
+                return False
+            index.active[row] = False
+            index.armed[row] = False
+            return True
+
+    def evaluate(self, city, current_aqi=None, forecast_aqi=None, now=None):
+        """
+        Check one city's subscriptions against fresh values and notify the sink
+
+        Args:
+            city: City whose data was refreshed
+            current_aqi: Latest observed AQI (None to skip 'current' subscriptions)
+            forecast_aqi: Forecasted AQI series; 'above' alerts use its peak
+                          and 'below' alerts its minimum
+            now: Unix time of the refresh (default: time.time())
+
+        Returns:
+            list: Notifications sent
+        """
+        now = time.time() if now is None else now
+        values = {'current': (current_aqi, current_aqi)}
+        if forecast_aqi is not None and len(forecast_aqi):
+            forecast = np.asarray(forecast_aqi, dtype=np.float64)
+            values['forecast'] = (float(np.nanmax(forecast)), float(np.nanmin(forecast)))
+
+        fired_rows = []
+        with self._lock:
+            index = self._cities.get(city.strip().lower())
+            if index is None:
+                return []
+            index.rebuild()
+
+            for source, (peak, low) in values.items():
+                if peak is None:
+                    continue
+                for condition, value in (('above', peak), ('below', low)):
+                    rows = index.groups.get((condition, source))
+                    if rows is None:
+                        continue
+                    thresholds = index.thresholds[rows]
+                    # Thresholds are sorted, so crossed and re-armed rows are contiguous
+                    if condition == 'above':
+                        crossed = slice(0, np.searchsorted(thresholds, value, 'left'))
+                        rearm = slice(np.searchsorted(thresholds, value + self.hysteresis, 'right'), len(thresholds))
+                    else:
+                        crossed = slice(np.searchsorted(thresholds, value, 'right'), len(thresholds))
+                        rearm = slice(0, np.searchsorted(thresholds, value - self.hysteresis, 'left'))
+
+                    armed = index.armed[rows]
+                    last_sent = index.last_sent[rows]
+                    active = index.active[rows]
+                    armed[rearm] = active[rearm]
+
+                    fire = armed[crossed] & (now - last_sent[crossed] >= self.cooldown_s)
+                    fire_rows = np.flatnonzero(fire) + crossed.start
+                    armed[fire_rows] = False
+                    last_sent[fire_rows] = now
+                    if len(fire_rows):
+                        fired_rows.append((rows.start + fire_rows, source, condition, value))
+
+            notifications = []
+            sent_at = datetime.fromtimestamp(now, timezone.utc).isoformat()
+            for rows, source, condition, value in fired_rows:
+                category, _ = get_aqi_category(value)
+                notifications.extend(
+                    {'user': user, 'city': city, 'threshold': threshold, 'condition': condition,
+                     'source': source, 'aqi': value, 'category': category, 'sent_at': sent_at}
+                    for user, threshold in zip(index.users[rows], index.thresholds[rows].tolist())
+                )
+
+        self.sink.send(notifications)
+        return notifications
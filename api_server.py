@@ -0,0 +1,329 @@
+"""
+Headless JSON API for current AQI, forecasts and health advice.
+
+    python api_server.py --port 8000
+
+    GET /v1/current?city=Mumbai
+    GET /v1/forecast?city=Mumbai
+    GET /v1/advice?city=Mumbai&q=Is+it+safe+to+run+outside
+    GET /healthz
+    POST /v1/subscriptions  {"user": "u1", "city": "Mumbai", "threshold": 150,
+                             "condition": "above", "source": "forecast"}
+
+Responses carry Cache-Control and ETag headers; a matching If-None-Match
+gets 304 Not Modified. Upstream lookups share in-process TTL caches with
+the same lifetimes as the dashboard's st.cache_data caches, and requests
+are served concurrently on a thread per connection. Every refresh of a
+city's current or forecast data is checked against that city's alert
+subscriptions.
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from cachetools import TTLCache, cached
+from dotenv import load_dotenv
+
+from alerts import AlertEngine, JsonlFileSink
+from aqi_calculator import get_aqi_category, get_dominant_pollutant
+from air_pollution import (
+    CURRENT_WINDOW_HOURS, HISTORY_WINDOW_DAYS, APIRequestError, fetch_recent_history, process_aqi_data
+)
+from chatbot import get_aqi_advice
+from forecast_lstm import forecast_from_history
+from lat_lon import get_lat_lon
+from spatial_grid import snap_coordinates
+import telemetry
+
+load_dotenv(dotenv_path=".env")
+API_KEY = os.getenv("API_KEY")
+
+# Interface to listen on; the API has no authentication, so it is local
+# only unless a deployment opts in (e.g. AQI_API_HOST=0.0.0.0 or --host)
+API_HOST = os.getenv("AQI_API_HOST", "127.0.0.1")
+
+# Cache lifetimes in seconds (match app.py)
+COORDINATES_TTL = 1800
+CURRENT_TTL = 600
+FORECAST_TTL = 3600
+CACHE_SIZE = 1024
+
+# Forecasts train under the same budget as the dashboard; one at a time
+TRAINING_TIME_BUDGET_S = int(os.getenv("TRAINING_TIME_BUDGET_S", "60"))
+TRAINING_PATIENCE = 3
+
+# Alert notifications are appended here as JSON lines (in-process queue if unset)
+ALERTS_FILE = os.getenv("AQI_ALERTS_FILE")
+alert_engine = AlertEngine(sink=JsonlFileSink(ALERTS_FILE) if ALERTS_FILE else None)
+
+class NotFound(Exception):
+    pass
+
+# =====================================================
+# CACHED LOOKUPS
+# =====================================================
+
+@cached(TTLCache(CACHE_SIZE, COORDINATES_TTL), lock=threading.Lock())
+def lookup_coordinates(city):
+    """Return (latitude, longitude, country, state) for a city"""
+    location = get_lat_lon(API_KEY, city)
+    if location is None:
+        raise NotFound(f"City '{city}' not found")
+    return location
+
+@cached(TTLCache(CACHE_SIZE, CURRENT_TTL), lock=threading.Lock())
+def cell_readings(cell_latitude, cell_longitude):
+    """Processed last-24h readings for a grid cell, shared by every city inside it"""
+    return process_aqi_data(fetch_recent_history(API_KEY, cell_latitude, cell_longitude, CURRENT_WINDOW_HOURS))
+
+@cached(TTLCache(CACHE_SIZE, CURRENT_TTL), lock=threading.Lock())
+def current_snapshot(city):
+    """Current AQI payload for a city"""
+    latitude, longitude, country, state = lookup_coordinates(city)
+    df = cell_readings(*snap_coordinates(latitude, longitude))
+    latest = df.iloc[-1]
+    category, color = get_aqi_category(latest['Overall_AQI'])
+    with telemetry.span("alerts.evaluate", source='current') as attrs:
+        attrs['sent'] = len(alert_engine.evaluate(city, current_aqi=float(latest['Overall_AQI'])))
+    return {
+        'city': city,
+        'location': {'latitude': latitude, 'longitude': longitude, 'country': country, 'state': state},
+        'observed_at': latest['dt'].isoformat(),
+        'aqi': float(latest['Overall_AQI']),
+        'category': category,
+        'color': color,
+        'dominant_pollutant': get_dominant_pollutant(latest),
+        'hourly': [
+            {'time': row.dt.isoformat(), 'aqi': float(row.Overall_AQI)}
+            for row in df[['dt', 'Overall_AQI']].itertuples(index=False)
+        ]
+    }
+
+_forecast_cache = TTLCache(CACHE_SIZE, FORECAST_TTL)
+_forecast_cache_lock = threading.Lock()
+# Single-flight locks, striped by cell so their number stays fixed however many cells are requested
+CELL_LOCK_STRIPES = 64
+_cell_locks = [threading.Lock() for _ in range(CELL_LOCK_STRIPES)]
+_alerted_forecasts = TTLCache(CACHE_SIZE, FORECAST_TTL)  # city -> forecast payload its alerts were checked against
+_training_lock = threading.Lock()
+
+def cell_forecast(cell):
+    """
+    168-hour forecast for a grid cell. Concurrent requests for the same
+    cell wait for a single training run instead of each starting one.
+
+    Returns:
+        tuple: (forecast payload without the city, whether it was just trained)
+    """
+    with _forecast_cache_lock:
+        if cell in _forecast_cache:
+            return _forecast_cache[cell], False
+
+    # Cells sharing a stripe also wait on each other, which costs little:
+    # training is serialized by _training_lock anyway
+    with _cell_locks[hash(cell) % CELL_LOCK_STRIPES]:
+        with _forecast_cache_lock:
+            if cell in _forecast_cache:
+                return _forecast_cache[cell], False
+
+        history = process_aqi_data(fetch_recent_history(API_KEY, *cell, HISTORY_WINDOW_DAYS * 24))
+        with _training_lock:
+            forecast_df, rmse, mae, report = forecast_from_history(
+                history, time_budget=TRAINING_TIME_BUDGET_S, patience=TRAINING_PATIENCE
+            )
+        payload = {
+            'generated_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'model': {'rmse': float(rmse), 'mae': float(mae), 'epochs_run': report['epochs_run']},
+            'hourly': [
+                {'time': row.timestamp.isoformat(), 'aqi': float(row.predicted_AQI)}
+                for row in forecast_df.itertuples(index=False)
+            ]
+        }
+        with _forecast_cache_lock:
+            _forecast_cache[cell] = payload
+        return payload, True
+
+def forecast_snapshot(city):
+    """168-hour forecast payload for a city, shared with every city in its grid cell"""
+    latitude, longitude, _, _ = lookup_coordinates(city)
+    payload, _ = cell_forecast(snap_coordinates(latitude, longitude))
+    with _forecast_cache_lock:
+        new_for_city = _alerted_forecasts.get(city) is not payload
+        _alerted_forecasts[city] = payload
+    if new_for_city:
+        with telemetry.span("alerts.evaluate", source='forecast') as attrs:
+            attrs['sent'] = len(alert_engine.evaluate(city, forecast_aqi=[point['aqi'] for point in payload['hourly']]))
+    return {'city': city, **payload}
+
+def cached_forecast(city):
+    """Forecast payload if one has already been computed for the city's cell, else None"""
+    latitude, longitude, _, _ = lookup_coordinates(city)
+    with _forecast_cache_lock:
+        return _forecast_cache.get(snap_coordinates(latitude, longitude))
+
+# =====================================================
+# HTTP HANDLER
+# =====================================================
+
+def finite_json(value):
+    """Copy of a JSON payload with NaN and infinite floats replaced by None"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: finite_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [finite_json(item) for item in value]
+    return value
+
+class APIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for load generators and mobile clients
+    # Send headers and body in one write; unbuffered writes plus Nagle's
+    # algorithm add ~40 ms of delayed-ACK latency to every keep-alive response
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        city = params.get('city', '').strip()
+
+        routes = {
+            '/v1/current': (self.current, CURRENT_TTL),
+            '/v1/forecast': (self.forecast, FORECAST_TTL),
+            '/v1/advice': (self.advice, 0)
+        }
+
+        if url.path == '/healthz':
+            self.send_json(200, {'status': 'ok'}, max_age=0)
+            return
+        if url.path == '/metrics':
+            self.send_body(200, telemetry.render_prometheus().encode(), "text/plain; version=0.0.4", max_age=0)
+            return
+        if url.path not in routes:
+            self.send_json(404, {'error': 'not found'}, max_age=0)
+            return
+        if not city:
+            self.send_json(400, {'error': "missing 'city' parameter"}, max_age=0)
+            return
+
+        handler, max_age = routes[url.path]
+        try:
+            with telemetry.trace(f"api{url.path}"):
+                payload = handler(city, params)
+            self.send_json(200, payload, max_age=max_age)
+        except NotFound as e:
+            self.send_json(404, {'error': str(e)}, max_age=60)
+        except (requests.RequestException, APIRequestError) as e:
+            self.send_json(502, {'error': f"upstream error: {e}"}, max_age=0)
+        except Exception:
+            traceback.print_exc()
+            self.send_json(500, {'error': 'internal server error'}, max_age=0)
+
+    def do_POST(self):
+        # Consume the body before any early return, or its bytes would be
+        # parsed as the next request on this keep-alive connection
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            # Where the body ends is unknown, so the connection can't be reused
+            self.close_connection = True
+            self.send_json(400, {'error': 'invalid Content-Length'}, max_age=0)
+            return
+        raw_body = self.rfile.read(length) if length else b''
+
+        if urlparse(self.path).path != '/v1/subscriptions':
+            self.send_json(404, {'error': 'not found'}, max_age=0)
+            return
+        try:
+            body = json.loads(raw_body or b'{}')
+            added = alert_engine.subscribe(
+                body['user'], body['city'], float(body['threshold']),
+                condition=body.get('condition', 'above'), source=body.get('source', 'current')
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            self.send_json(400, {'error': f"invalid subscription: {e}"}, max_age=0)
+            return
+        self.send_json(201 if added else 200, {'subscribed': True, 'created': added}, max_age=0)
+
+    def current(self, city, params):
+        return current_snapshot(city)
+
+    def forecast(self, city, params):
+        return forecast_snapshot(city)
+
+    def advice(self, city, params):
+        snapshot = current_snapshot(city)
+        forecast = cached_forecast(city)
+        forecasted_aqi = [point['aqi'] for point in forecast['hourly']] if forecast else []
+        question = params.get('q')
+        return {
+            'city': city,
+            'question': question,
+            'advice': get_aqi_advice(
+                forecasted_aqi=forecasted_aqi,
+                user_health_issues=question,
+                current_aqi=snapshot['aqi'],
+                city=city,
+                forecast_start=forecast['hourly'][0]['time'] if forecast else None,
+                dominant_pollutant=snapshot['dominant_pollutant']
+            )
+        }
+
+    def send_json(self, status, payload, max_age):
+        try:
+            body = json.dumps(payload, allow_nan=False).encode()
+        except ValueError:
+            # NaN is not valid JSON; missing AQI values (masked gaps,
+            # all-NaN components) are sent as null
+            body = json.dumps(finite_json(payload), allow_nan=False).encode()
+        self.send_body(status, body, "application/json", max_age)
+
+    def send_body(self, status, body, content_type, max_age):
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"public, max-age={max_age}" if max_age else "no-store")
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def create_server(host=None, port=8000):
+    server = ThreadingHTTPServer((host or API_HOST, port), APIHandler)
+    server.daemon_threads = True
+    return server
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve AQI data, forecasts and advice as JSON")
+    parser.add_argument("--host", default=API_HOST, help="Interface to listen on (default AQI_API_HOST or 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if not API_KEY:
+        raise SystemExit("API key not found! Please check your .env file.")
+    server = create_server(args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    server.serve_forever()
@@ -1,20 +1,42 @@
 from dotenv import load_dotenv
 import os
-import requests 
 import pandas as pd 
 import json
 import streamlit as st 
 from datetime import datetime
-
-from aqi_calculator import calculate_overall_aqi
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from streamlit.errors import StreamlitAPIException
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from aqi_calculator import get_aqi_category, get_dominant_pollutant
+from chart_data import CARD_CHART_WIDTH_PX, MAIN_CHART_WIDTH_PX, chart_payload
+from air_pollution import (
+    CURRENT_WINDOW_HOURS, HISTORY_WINDOW_DAYS, fetch_recent_history, process_aqi_data
+)
 from lat_lon import get_lat_lon
-from forecast_lstm import forecast_future_LSTM
-from chatbot import get_aqi_advice, get_aqi_category
+from forecast_lstm import forecast_cities, forecast_from_history, train_global_model
+from forecast_store import cell_forecast_basename, forecast_artifact_path, write_forecast
+from rollups import RollupStore
+from spatial_grid import cell_label, snap_coordinates
+from chatbot import get_aqi_advice
+import session_memory
+import telemetry
 
 # =====================================================
 # CONFIGURATION AND SETUP
 # =====================================================
 
+# Interactive forecasts train under a wall-clock budget with early stopping
+TRAINING_TIME_BUDGET_S = int(os.getenv("TRAINING_TIME_BUDGET_S", "60"))
+TRAINING_PATIENCE = 3
+
+EXAMPLE_CITIES = ["Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune", "Ahmedabad"]
+
+# Multi-city comparison: cities per row and concurrent lookups
+COMPARISON_COLUMNS = 4
+COMPARISON_WORKERS = 8
+
 def load_config():
     """Load environment variables and API keys"""
     load_dotenv(dotenv_path=".env")
@@ -39,62 +61,87 @@ def setup_page():
 @st.cache_data(ttl=1800)  # Cache for 30 minutes
 def fetch_coordinates(api_key, city):
     """Fetch coordinates for a given city"""
+    telemetry.note_cache_miss()
     return get_lat_lon(api_key, city)
 
 @st.cache_data(ttl=600)  # Cache for 10 minutes
 def fetch_current_aqi_data(api_key, latitude, longitude):
     """Fetch current AQI data (last 24 hours)"""
-    curr_ts = int(datetime.now().timestamp())
-    one_day_ago_ts = curr_ts - (24 * 3600)
-    
-    resp = requests.get(
-        "http://api.openweathermap.org/data/2.5/air_pollution/history",
-        params={
-            "lat": latitude,
-            "lon": longitude,
-            "start": one_day_ago_ts,
-            "end": curr_ts,
-            "appid": api_key
-        }
-    )
-    
-    if resp.status_code != 200:
-        raise Exception(f"API request failed with status {resp.status_code}")
-    
-    return resp.json()
+    telemetry.note_cache_miss()
+    return fetch_recent_history(api_key, latitude, longitude, CURRENT_WINDOW_HOURS)
 
 @st.cache_data(ttl=3600)  # Cache for 1 hour
 def fetch_historical_data(api_key, latitude, longitude):
     """Fetch extended historical data for LSTM training"""
-    curr_ts = int(datetime.now().timestamp())
-    half_years_ago_ts = curr_ts - (180 * 24 * 3600)
-    
-    resp = requests.get(
-        "http://api.openweathermap.org/data/2.5/air_pollution/history",
-        params={
-            "lat": latitude,
-            "lon": longitude,
-            "start": half_years_ago_ts,
-            "end": curr_ts,
-            "appid": api_key
-        }
-    )
-    
-    if resp.status_code != 200:
-        raise Exception(f"Historical data API request failed with status {resp.status_code}")
-    
-    return resp.json()
-
-def process_aqi_data(data):
-    """Process raw API data into structured DataFrame"""
-    df = pd.json_normalize(data['list'])
-    df['Overall_AQI'] = df.apply(calculate_overall_aqi, axis=1)
-    df['dt'] = pd.to_datetime(df['dt'], unit='s', utc=True).map(
-        lambda x: x.tz_convert('Asia/Kolkata')
-    )
-    df['dt'] = df['dt'].dt.strftime('%Y-%m-%d %H:%M:%S')
-    df['dt'] = pd.to_datetime(df['dt'])
-    return df.reset_index(drop=True)
+    telemetry.note_cache_miss()
+    return fetch_recent_history(api_key, latitude, longitude, HISTORY_WINDOW_DAYS * 24)
+
+@st.cache_data(ttl=3600, max_entries=64)  # Cache for 1 hour
+def train_cell_forecast(cell_latitude, cell_longitude, _history):
+    """
+    Train the LSTM and forecast for one grid cell. Every location inside
+    the cell shares the result (_history is not part of the cache key).
+    No files are touched here: a cache hit would skip any writes.
+    """
+    telemetry.note_cache_miss()
+    return forecast_from_history(_history, time_budget=TRAINING_TIME_BUDGET_S, patience=TRAINING_PATIENCE)
+
+def save_cell_forecast(coordinates, forecast_df):
+    """Write the forecast for the location's grid cell, for chat_app.py; returns the path"""
+    path = forecast_artifact_path(cell_forecast_basename(cell_label(*coordinates['cell'])))
+    write_forecast(forecast_df, path)
+    return path
+
+def make_coordinates(latitude, longitude, country, state):
+    """Location dict with the grid cell that fetches and forecasts are shared by"""
+    return {
+        'latitude': latitude,
+        'longitude': longitude,
+        'country': country,
+        'state': state,
+        'cell': snap_coordinates(latitude, longitude)
+    }
+
+@st.cache_resource
+def get_rollup_store():
+    """Per-city AQI rollups shared by all sessions"""
+    return RollupStore()
+
+def process_city_data(city, data):
+    """Process raw API data and fold the new hours into the city's rollups"""
+    df = process_aqi_data(data)
+    ingest_rollups(city, df)
+    return df
+
+def ingest_rollups(city, df):
+    """Fold a processed hourly frame into the city's rollups; returns hours added"""
+    with telemetry.span("rollups.ingest") as attrs:
+        attrs['hours_added'] = get_rollup_store().ingest(city, df)
+    return attrs['hours_added']
+
+@st.cache_data(ttl=3600, max_entries=32)  # Same lifetime as the history fetch
+def history_chart_series(api_key, city, cell_latitude, cell_longitude, window_days=HISTORY_WINDOW_DAYS,
+                         width_px=MAIN_CHART_WIDTH_PX):
+    """
+    Hourly AQI over the last window_days for a city, downsampled for a
+    chart of width_px pixels, and the number of hourly readings behind it
+    """
+    telemetry.note_cache_miss()
+    data = fetch_historical_data(api_key, cell_latitude, cell_longitude)
+    history = process_city_data(city, data).set_index('dt')['Overall_AQI']
+    history = history[history.index > history.index.max() - pd.Timedelta(days=window_days)]
+    with telemetry.span("chart.downsample", points_in=len(history)) as attrs:
+        reduced = chart_payload(history, width_px)
+        attrs['points_out'] = len(reduced)
+    return reduced, len(history)
+
+@st.cache_data(max_entries=32)
+def chart_data(data, width_px=MAIN_CHART_WIDTH_PX):
+    """Downsample a chart series/frame to what a chart of width_px pixels can show"""
+    with telemetry.span("chart.downsample", points_in=len(data)) as attrs:
+        reduced = chart_payload(data, width_px)
+        attrs['points_out'] = len(reduced)
+    return reduced
 
 # =====================================================
 # UI COMPONENTS
@@ -127,10 +174,9 @@ def render_location_input():
 def show_example_cities():
     """Display example cities as buttons"""
     st.markdown("### 🌟 Popular Cities")
-    example_cities = ["Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune", "Ahmedabad"]
     cols = st.columns(4)
     
-    for i, example_city in enumerate(example_cities):
+    for i, example_city in enumerate(EXAMPLE_CITIES):
         col_idx = i % 4
         with cols[col_idx]:
             if st.button(f"📍 {example_city}", key=f"example_{i}"):
@@ -143,6 +189,7 @@ def render_location_info(city, coordinates):
         f"📍 **{city}, {coordinates['state']}, {coordinates['country']}** "
         f"(Lat: {coordinates['latitude']:.4f}, Lon: {coordinates['longitude']:.4f})"
     )
+    st.caption(f"Air quality data shared with nearby locations in grid cell {cell_label(*coordinates['cell'])}")
 
 def render_current_aqi_display(current_df, city):
     """Render current AQI metrics and status"""
@@ -198,63 +245,74 @@ def render_current_aqi_display(current_df, city):
     
     return current_aqi, aqi_status
 
+@st.fragment
 def render_forecast_section(coordinates, api_key):
-    """Render the LSTM forecast section"""
-    st.header("🔮 AI-Powered 7-Day Forecast")
-    st.markdown("Generate detailed forecasts using LSTM neural networks (processing may take 1-2 minutes)")
-    
-    col1, col2 = st.columns([3, 1])
-    
-    with col1:
-        st.markdown("**Machine Learning Forecast** - Get predictions for the next 7 days based on historical patterns")
-        st.markdown("*Uses LSTM (Long Short-Term Memory) neural networks for accurate predictions*")
-    
-    with col2:
-        forecast_button = st.button("📈 Generate Forecast", type="secondary")
-    
-    # Handle forecast generation
-    if forecast_button or st.session_state.get('forecast_requested', False):
-        if forecast_button:
-            st.session_state.forecast_requested = True
-            # Clear existing forecast data for new request
-            for key in ['forecast_df', 'model_metrics']:
-                if key in st.session_state:
-                    del st.session_state[key]
+    """Render the LSTM forecast section (a fragment: its button reruns only this section)"""
+    with telemetry.interaction("forecast"):
+        st.header("🔮 AI-Powered 7-Day Forecast")
+        st.markdown(f"Generate detailed forecasts using LSTM neural networks (training is capped at {TRAINING_TIME_BUDGET_S} seconds)")
         
-        generate_and_display_forecast(coordinates, api_key)
-    else:
-        st.info("💡 Click the button above to generate AI-powered forecasts using historical data patterns.")
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            st.markdown("**Machine Learning Forecast** - Get predictions for the next 7 days based on historical patterns")
+            st.markdown("*Uses LSTM (Long Short-Term Memory) neural networks for accurate predictions*")
+        
+        with col2:
+            forecast_button = st.button("📈 Generate Forecast", type="secondary")
+        
+        # Handle forecast generation
+        if forecast_button or st.session_state.get('forecast_requested', False):
+            if forecast_button:
+                st.session_state.forecast_requested = True
+                # Clear existing forecast data for new request
+                for key in ['forecast_df', 'model_metrics']:
+                    if key in st.session_state:
+                        del st.session_state[key]
+        
+            generate_and_display_forecast(coordinates, api_key)
+        else:
+            st.info("💡 Click the button above to generate AI-powered forecasts using historical data patterns.")
 
 def generate_and_display_forecast(coordinates, api_key):
     """Generate and display LSTM forecast"""
     if 'forecast_df' not in st.session_state:
+        rollups_changed = False
         try:
             # Fetch historical data
             with st.spinner("🔍 Fetching extended historical data for AI model training..."):
-                historical_data = fetch_historical_data(
+                historical_data = telemetry.cached_call(
+                    "historical",
+                    fetch_historical_data,
                     api_key, 
-                    coordinates['latitude'], 
-                    coordinates['longitude']
+                    *coordinates['cell']
                 )
             
-            # Process and save data
+            # Process data
             with st.spinner("⚙️ Processing historical data..."):
                 df = process_aqi_data(historical_data)
-                df.to_csv('air_pollution_data_AQI.csv', index=False)
+                rollups_changed = ingest_rollups(st.session_state.current_city, df) > 0
             
-            # Generate forecast
+            # Generate forecast (reused if a nearby location already trained one)
             with st.spinner("🧠 Training LSTM neural network and generating forecast..."):
-                rmse, mae = forecast_future_LSTM()
-                forecast_df = pd.read_csv("forecast_LSTM_AQI.csv")
+                forecast_df, rmse, mae, training_report = telemetry.cached_call(
+                    "forecast", train_cell_forecast, *coordinates['cell'], df
+                )
                 
                 # Cache results
-                st.session_state.forecast_df = forecast_df
-                st.session_state.model_metrics = {'rmse': rmse, 'mae': mae}
+                session_memory.remember_frame(st.session_state, 'forecast_df', forecast_df)
+                save_cell_forecast(coordinates, forecast_df)
+                st.session_state.model_metrics = {'rmse': rmse, 'mae': mae, 'training': training_report}
         
         except Exception as e:
             st.error(f"❌ Forecast generation failed: {str(e)}")
             st.session_state.forecast_requested = False
             return
+        
+        if rollups_changed:
+            # The summaries below this fragment were drawn before these hours
+            # were ingested; rerun the whole page (the forecast is cached now)
+            st.rerun()
     
     # Display forecast results
     if 'forecast_df' in st.session_state:
@@ -262,7 +320,7 @@ def generate_and_display_forecast(coordinates, api_key):
 
 def display_forecast_results():
     """Display the generated forecast results"""
-    forecast_df = st.session_state.forecast_df
+    forecast_df = session_memory.get_frame(st.session_state, 'forecast_df')
     model_metrics = st.session_state.model_metrics
     
     st.success("✅ Forecast generated successfully!")
@@ -274,10 +332,19 @@ def display_forecast_results():
     with col2:
         st.metric("Model Precision (MAE)", f"{model_metrics['mae']:.2f}", help="Mean Absolute Error - Lower is better")
     
+    training_report = model_metrics.get('training')
+    if training_report:
+        st.caption(
+            f"Trained {training_report['epochs_run']} epochs in {training_report['total_time_s']:.0f}s "
+            f"({training_report['time_per_epoch_s']:.1f}s/epoch, {training_report['samples_per_s']:.0f} samples/s), "
+            f"best epoch {training_report['best_epoch']}, stopped by {training_report['stopped_reason'].replace('_', ' ')}"
+            + (" (mid-epoch)" if training_report.get('stopped_mid_epoch') else "")
+        )
+    
     # Forecast visualization
     st.subheader("📈 7-Day AQI Forecast Trend")
     st.line_chart(
-        data=forecast_df.set_index('timestamp')['predicted_AQI'], 
+        data=chart_data(forecast_df.set_index('timestamp')['predicted_AQI']), 
         height=400
     )
     
@@ -305,22 +372,63 @@ def display_forecast_results():
     else:
         st.error("🔴 **Health alert!** Poor air quality expected. Plan indoor activities and take necessary precautions.")
 
+def render_history_section(city, coordinates, api_key):
+    """Render the downsampled long-range AQI history chart"""
+    if not st.toggle(f"📉 Show {HISTORY_WINDOW_DAYS}-day AQI history"):
+        return
+    
+    with st.spinner("🔍 Fetching historical data..."):
+        history, readings = telemetry.cached_call(
+            "history_chart", history_chart_series, api_key, city, *coordinates['cell']
+        )
+    
+    st.line_chart(history, height=300)
+    st.caption(f"{readings:,} hourly readings, shape-preserving downsampled for display")
+
+def render_rollup_section(city):
+    """Render daily/weekly/monthly AQI summaries from the city's rollups"""
+    st.header("🗓️ AQI Summaries")
+    rollup = get_rollup_store().get(city)
+    if rollup.daily.empty:
+        st.info("💡 Summaries appear once air quality data for this city has been loaded.")
+        return
+    
+    period = st.radio("Summarize by", ["Daily", "Weekly", "Monthly"], horizontal=True)
+    with telemetry.span("rollups.summary", period=period.lower()):
+        table = rollup.summary(period.lower())
+        shares = rollup.category_shares()
+    
+    days = len(rollup.daily)
+    st.caption(
+        f"{int(rollup.daily['hours'].sum()):,} hours over {days} days, up to {rollup.watermark:%Y-%m-%d %H:%M}"
+        + (f" - turn on the {HISTORY_WINDOW_DAYS}-day history above to include more" if days < 7 else "")
+    )
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        st.dataframe(table.sort_index(ascending=False).round(1), height=300)
+    with col2:
+        st.markdown("**Share of hours by category (%)**")
+        st.bar_chart(shares.round(1), height=300)
+
 # =====================================================
 # CHAT INTERFACE COMPONENTS
 # =====================================================
 
+@st.fragment
 def render_chat_interface(city=None, current_aqi=None):
-    """Render the main chat interface"""
-    st.header("💬 AQI Health Advisor Chatbot")
-    
-    if city and current_aqi is not None:
-        st.markdown(f"Get personalized health advice for **{city}** (Current AQI: {current_aqi:.1f})")
-        chat_key = f"chat_messages_{city}"
-        render_personalized_chat(chat_key, city, current_aqi)
-    else:
-        st.markdown("Ask general questions about air quality and health. Enter a city above for personalized advice.")
-        chat_key = "general_chat_messages"
-        render_general_chat(chat_key)
+    """Render the main chat interface (a fragment: chat interactions rerun only the chat)"""
+    with telemetry.interaction("chat"):
+        st.header("💬 AQI Health Advisor Chatbot")
+        
+        if city and current_aqi is not None:
+            st.markdown(f"Get personalized health advice for **{city}** (Current AQI: {current_aqi:.1f})")
+            chat_key = f"chat_messages_{city}"
+            render_personalized_chat(chat_key, city, current_aqi)
+        else:
+            st.markdown("Ask general questions about air quality and health. Enter a city above for personalized advice.")
+            chat_key = "general_chat_messages"
+            render_general_chat(chat_key)
 
 def render_personalized_chat(chat_key, city, current_aqi):
     """Render chat interface with city-specific context"""
@@ -332,7 +440,7 @@ def render_personalized_chat(chat_key, city, current_aqi):
             f"Hello! I'm your AQI Health Advisor. The current air quality in **{city}** is "
             f"{current_aqi:.1f} ({aqi_status}). How can I help you stay healthy today?"
         )
-        st.session_state[chat_key].append({"role": "assistant", "content": welcome_msg})
+        session_memory.append_message(st.session_state, chat_key, {"role": "assistant", "content": welcome_msg})
     
     # Display chat messages
     display_chat_messages(chat_key)
@@ -355,7 +463,7 @@ def render_general_chat(chat_key):
             "Hello! I'm your AQI Health Advisor. I can answer general questions about air quality "
             "and health. For personalized advice, please enter a city name above and get AQI data first."
         )
-        st.session_state[chat_key].append({"role": "assistant", "content": welcome_msg})
+        session_memory.append_message(st.session_state, chat_key, {"role": "assistant", "content": welcome_msg})
     
     # Display chat messages
     display_chat_messages(chat_key)
@@ -375,13 +483,27 @@ def display_chat_messages(chat_key):
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
+def get_forecast_context():
+    """Return the forecasted AQI values and first forecast timestamp, if any"""
+    forecast_df = session_memory.get_frame(st.session_state, 'forecast_df')
+    if forecast_df is None or forecast_df.empty:
+        return [], None
+    return forecast_df['predicted_AQI'].tolist(), forecast_df['timestamp'].iloc[0]
+
+def get_dominant_pollutant_context(city):
+    """Return the dominant pollutant of the latest reading for the loaded city"""
+    current_df = session_memory.get_frame(st.session_state, 'current_aqi_df') if city else None
+    if current_df is None:
+        return None
+    return get_dominant_pollutant(current_df.iloc[-1])
+
 def handle_chat_input(chat_key, city, current_aqi):
     """Handle chat input and generate responses"""
     placeholder_text = "Ask about air quality, health advice, or general information..." if city else "Ask general questions about air quality and health..."
     
     if prompt := st.chat_input(placeholder_text):
         # Add user message
-        st.session_state[chat_key].append({"role": "user", "content": prompt})
+        session_memory.append_message(st.session_state, chat_key, {"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
         
@@ -390,20 +512,23 @@ def handle_chat_input(chat_key, city, current_aqi):
             with st.spinner("🤔 Thinking..."):
                 try:
                     # Get forecast data if available
-                    forecasted_aqi = st.session_state.get('forecast_df', {}).get('predicted_AQI', []) if 'forecast_df' in st.session_state else []
+                    forecasted_aqi, forecast_start = get_forecast_context()
                     
                     response = get_aqi_advice(
                         forecasted_aqi=forecasted_aqi,
                         user_health_issues=prompt,
                         current_aqi=current_aqi,
-                        city=city or "your location"
+                        city=city or "your location",
+                        chat_history=st.session_state[chat_key][:-1],
+                        forecast_start=forecast_start,
+                        dominant_pollutant=get_dominant_pollutant_context(city)
                     )
                     st.markdown(response)
-                    st.session_state[chat_key].append({"role": "assistant", "content": response})
+                    session_memory.append_message(st.session_state, chat_key, {"role": "assistant", "content": response})
                 except Exception as e:
                     error_msg = f"Sorry, I encountered an error: {str(e)}. Please try rephrasing your question."
                     st.markdown(error_msg)
-                    st.session_state[chat_key].append({"role": "assistant", "content": error_msg})
+                    session_memory.append_message(st.session_state, chat_key, {"role": "assistant", "content": error_msg})
 
 def render_suggested_questions(chat_key, city, current_aqi, is_personalized):
     """Render suggested questions section"""
@@ -439,22 +564,25 @@ def render_suggested_questions(chat_key, city, current_aqi, is_personalized):
 
 def handle_suggested_question_click(chat_key, question, city, current_aqi):
     """Handle suggested question button clicks"""
-    st.session_state[chat_key].append({"role": "user", "content": question})
+    session_memory.append_message(st.session_state, chat_key, {"role": "user", "content": question})
     
     try:
-        forecasted_aqi = st.session_state.get('forecast_df', {}).get('predicted_AQI', []) if 'forecast_df' in st.session_state else []
+        forecasted_aqi, forecast_start = get_forecast_context()
         response = get_aqi_advice(
             forecasted_aqi=forecasted_aqi,
             user_health_issues=question,
             current_aqi=current_aqi,
-            city=city or "your location"
+            city=city or "your location",
+            chat_history=st.session_state[chat_key][:-1],
+            forecast_start=forecast_start,
+            dominant_pollutant=get_dominant_pollutant_context(city)
         )
-        st.session_state[chat_key].append({"role": "assistant", "content": response})
+        session_memory.append_message(st.session_state, chat_key, {"role": "assistant", "content": response})
     except Exception as e:
         error_msg = f"Sorry, I encountered an error: {str(e)}."
-        st.session_state[chat_key].append({"role": "assistant", "content": error_msg})
+        session_memory.append_message(st.session_state, chat_key, {"role": "assistant", "content": error_msg})
     
-    st.rerun()
+    rerun_fragment()
 
 def render_chat_controls(chat_key):
     """Render chat control buttons"""
@@ -462,7 +590,154 @@ def render_chat_controls(chat_key):
     with col1:
         if st.button("🗑️ Clear Chat", key=f"clear_{chat_key}"):
             st.session_state[chat_key] = []
+            rerun_fragment()
+
+def rerun_fragment():
+    """Rerun only the calling fragment (the whole app if it is running as part of a full rerun)"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+# =====================================================
+# MULTI-CITY COMPARISON
+# =====================================================
+
+def run_concurrently(fn, items):
+    """
+    Run fn(item) for every item on a thread pool and yield (item, result,
+    error) as each one completes. Workers share this session's Streamlit
+    context (so st.cache_data caches are shared) and the current telemetry
+    trace.
+    """
+    script_ctx = get_script_run_ctx()
+
+    def run(item):
+        add_script_run_ctx(ctx=script_ctx)
+        return fn(item)
+
+    with ThreadPoolExecutor(max_workers=min(COMPARISON_WORKERS, max(1, len(items)))) as executor:
+        futures = {executor.submit(copy_context().run, run, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
+
+def load_city_snapshot(api_key, city):
+    """Fetch coordinates and current AQI for one city (thread-safe)"""
+    location = telemetry.cached_call("coordinates", fetch_coordinates, api_key, city)
+    if location is None:
+        raise Exception("city not found")
+    coordinates = make_coordinates(*location)
+    data = telemetry.cached_call("current_aqi", fetch_current_aqi_data, api_key, *coordinates['cell'])
+    current_df = process_city_data(city, data)
+    latest = current_df.iloc[-1]
+    return {
+        'coordinates': coordinates,
+        'current_df': current_df,
+        'current_aqi': latest['Overall_AQI'],
+        'dominant_pollutant': get_dominant_pollutant(latest)
+    }
+
+def render_city_card(city, snapshot, error):
+    """Render one city's comparison card"""
+    st.markdown(f"#### 📍 {city}")
+    if error is not None:
+        st.error(f"❌ {error}")
+        return
+    
+    current_aqi = snapshot['current_aqi']
+    aqi_status, _ = get_aqi_category(current_aqi)
+    st.metric("Current AQI", f"{current_aqi:.1f}", help=aqi_status)
+    st.caption(f"{aqi_status} · dominant pollutant: **{(snapshot['dominant_pollutant'] or 'n/a').upper().replace('_', '.')}**")
+    
+    forecast_df = st.session_state.get('comparison_forecasts', {}).get(city)
+    if forecast_df is not None:
+        st.line_chart(chart_data(forecast_df.set_index('timestamp')['predicted_AQI'], CARD_CHART_WIDTH_PX), height=150)
+        st.caption(f"7-day average {forecast_df['predicted_AQI'].mean():.1f}, peak {forecast_df['predicted_AQI'].max():.1f}")
+
+def render_comparison_view(api_key):
+    """Compare current AQI, dominant pollutant and forecast across cities"""
+    st.header("🏙️ Compare Cities")
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        cities = st.multiselect("Choose cities to compare", options=EXAMPLE_CITIES, default=EXAMPLE_CITIES[:3])
+    with col2:
+        other_cities = st.text_input("Other cities", placeholder="e.g., Jaipur, Lucknow")
+    cities = list(dict.fromkeys(cities + [c.strip() for c in other_cities.split(",") if c.strip()]))
+    
+    if not cities:
+        st.info("👆 Pick at least one city to compare.")
+        return
+    
+    # One placeholder per city, filled in as each lookup completes
+    placeholders = {}
+    for row_start in range(0, len(cities), COMPARISON_COLUMNS):
+        row_cities = cities[row_start:row_start + COMPARISON_COLUMNS]
+        for col, city in zip(st.columns(COMPARISON_COLUMNS), row_cities):
+            placeholders[city] = col.empty()
+            placeholders[city].info(f"⏳ Loading {city}...")
+    
+    snapshots = {}
+    with telemetry.span("comparison.load", cities=len(cities)):
+        for city, snapshot, error in run_concurrently(lambda c: load_city_snapshot(api_key, c), cities):
+            if snapshot is not None:
+                snapshots[city] = snapshot
+            with placeholders[city].container():
+                render_city_card(city, snapshot, error)
+    
+    if snapshots:
+        render_comparison_forecast(api_key, snapshots)
+
+def load_city_history(api_key, city, coordinates):
+    """Fetch and process the training history for one city (thread-safe)"""
+    data = telemetry.cached_call(
+        "historical", fetch_historical_data, api_key, *coordinates['cell']
+    )
+    return process_city_data(city, data)
+
+def render_comparison_forecast(api_key, snapshots):
+    """Forecast all compared cities with one shared model"""
+    st.markdown("---")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.markdown("**Side-by-side forecast** - one shared LSTM is trained across all selected cities "
+                    "and forecasts them in a single pass")
+    with col2:
+        forecast_button = st.button("📈 Forecast All Cities", type="secondary")
+    
+    if forecast_button:
+        with st.spinner("🔍 Fetching historical data for all cities..."):
+            histories = {}
+            for city, history, error in run_concurrently(
+                lambda c: load_city_history(api_key, c, snapshots[c]['coordinates']), list(snapshots)
+            ):
+                if error is not None:
+                    st.warning(f"⚠️ Skipping {city}: {error}")
+                else:
+                    histories[city] = history
+        
+        try:
+            with st.spinner("🧠 Training shared LSTM across cities..."):
+                global_model = train_global_model(
+                    histories, time_budget=TRAINING_TIME_BUDGET_S, patience=TRAINING_PATIENCE
+                )
+                forecasts, _ = forecast_cities(global_model, histories)
+            st.session_state.comparison_forecasts = {
+                city: session_memory.compact_frame(df) for city, df in forecasts.items()
+            }
             st.rerun()
+        except Exception as e:
+            st.error(f"❌ Forecast generation failed: {str(e)}")
+    
+    forecasts = st.session_state.get('comparison_forecasts', {})
+    shown = {city: df.set_index('timestamp')['predicted_AQI'] for city, df in forecasts.items() if city in snapshots}
+    if shown:
+        st.subheader("📈 7-Day AQI Forecast by City")
+        st.line_chart(chart_data(pd.DataFrame(shown)), height=400)
 
 # =====================================================
 # MAIN APPLICATION LOGIC
@@ -477,7 +752,25 @@ def main():
         return
     
     setup_page()
+    telemetry.start_metrics_server()
+    
+    view = st.sidebar.radio("View", ["Single city", "Compare cities"])
+    
+    with telemetry.trace("dashboard"):
+        if view == "Compare cities":
+            render_comparison_view(api_key)
+        else:
+            render_single_city_view(api_key)
+        enforce_session_budget(view)
+    
+    # Footer
+    render_footer()
     
+    # Performance breakdown of this rerun
+    render_debug_panel()
+
+def render_single_city_view(api_key):
+    """Render the single-city dashboard"""
     # Location input
     city, search_button = render_location_input()
     
@@ -497,9 +790,6 @@ def main():
         st.info("👆 Please enter a city name to get started.")
         show_example_cities()
         render_chat_interface()
-    
-    # Footer
-    render_footer()
 
 def handle_main_dashboard(api_key, city, search_button):
     """Handle the main dashboard when city data is available"""
@@ -507,15 +797,16 @@ def handle_main_dashboard(api_key, city, search_button):
     need_reload = (
         not st.session_state.get('basic_data_loaded', False) or 
         st.session_state.get('current_city', '') != city or
-        search_button
+        search_button or
+        session_memory.get_frame(st.session_state, 'current_aqi_df') is None  # expired from the shared cache
     )
     
     if need_reload:
         load_city_data(api_key, city)
     
     # Display dashboard content if data is available
-    if 'current_aqi_df' in st.session_state and 'coordinates' in st.session_state:
-        current_df = st.session_state.current_aqi_df
+    current_df = session_memory.get_frame(st.session_state, 'current_aqi_df')
+    if current_df is not None and 'coordinates' in st.session_state:
         coordinates = st.session_state.coordinates
         
         # Display location info
@@ -535,6 +826,12 @@ def handle_main_dashboard(api_key, city, search_button):
         
         # Forecast section
         render_forecast_section(coordinates, api_key)
+        
+        # Long-range history
+        render_history_section(city, coordinates, api_key)
+        
+        # Daily/weekly/monthly summaries
+        render_rollup_section(city)
     else:
         st.error("❌ Failed to load AQI data. Please try searching again.")
 
@@ -543,23 +840,21 @@ def load_city_data(api_key, city):
     try:
         # Get coordinates
         with st.spinner("🌍 Getting location coordinates..."):
-            latitude, longitude, country, state = fetch_coordinates(api_key, city)
-            coordinates = {
-                'latitude': latitude,
-                'longitude': longitude,
-                'country': country,
-                'state': state
-            }
+            location = telemetry.cached_call("coordinates", fetch_coordinates, api_key, city)
+            coordinates = make_coordinates(*location)
             st.session_state.coordinates = coordinates
         
         # Fetch current AQI data
         with st.spinner("📊 Fetching current air quality data..."):
-            data = fetch_current_aqi_data(api_key, latitude, longitude)
+            data = telemetry.cached_call("current_aqi", fetch_current_aqi_data, api_key, *coordinates['cell'])
         
         # Process data
         with st.spinner("⚙️ Processing air quality data..."):
-            current_df = process_aqi_data(data)
-            st.session_state.current_aqi_df = current_df
+            current_df = process_city_data(city, data)
+            # Every session looking at this grid cell shares one copy of the frame
+            session_memory.remember_frame(
+                st.session_state, 'current_aqi_df', current_df, shared_key=('current_aqi', *coordinates['cell'])
+            )
         
         # Set flags
         st.session_state.basic_data_loaded = True
@@ -570,6 +865,60 @@ def load_city_data(api_key, city):
         st.error(f"❌ An error occurred while loading data: {str(e)}")
         st.markdown("Please try again or check your city name.")
 
+def enforce_session_budget(view):
+    """Evict stale or excess per-city state and record this session's footprint"""
+    city = st.session_state.get('current_city')
+    active_keys = ['current_aqi_df', 'forecast_df', 'model_metrics', 'coordinates', 'general_chat_messages']
+    if city:
+        active_keys.append(f"chat_messages_{city}")
+    if view == "Compare cities":
+        active_keys.append('comparison_forecasts')
+    
+    with telemetry.span("session.enforce_budget") as attrs:
+        result = session_memory.enforce_budget(
+            st.session_state, active_keys=active_keys, evictable_keys=['comparison_forecasts']
+        )
+        attrs.update(bytes=result['bytes'], evicted=len(result['evicted']))
+    telemetry.observe("session_state_bytes", result['bytes'])
+    st.session_state.session_state_bytes = result['bytes']
+
+def render_debug_panel():
+    """Render the latest per-stage timing breakdown in the sidebar"""
+    if not st.sidebar.checkbox("🛠️ Show performance breakdown", value=os.getenv("AQI_DEBUG_PANEL") == "1"):
+        return
+    
+    latest = telemetry.latest_trace("dashboard")
+    if latest is None:
+        st.sidebar.info("No request recorded yet.")
+        return
+    
+    st.sidebar.metric("Last rerun", f"{latest['duration_ms']:.0f} ms")
+    # Chat and forecast interactions rerun only their fragment and are traced separately
+    for fragment in ("chat", "forecast"):
+        interaction = telemetry.latest_trace(fragment)
+        if interaction is not None:
+            st.sidebar.caption(f"Last {fragment}-only rerun: {interaction['duration_ms']:.0f} ms")
+    if 'session_state_bytes' in st.session_state:
+        st.sidebar.metric("Session state", f"{st.session_state.session_state_bytes / 1024:.0f} KB")
+    rss, peak = telemetry.current_rss_mb(), telemetry.peak_rss_mb()
+    if rss is not None:
+        st.sidebar.metric("Process RSS", f"{rss:.0f} MB")
+    if peak is not None:
+        st.sidebar.caption(f"Process peak RSS since start: {peak:.0f} MB")
+    
+    if latest['spans']:
+        breakdown = pd.DataFrame([
+            {
+                'stage': record['name'],
+                'ms': round(record['duration_ms'], 1),
+                'rss Δ MB': round(record['rss_delta_mb'], 1) if record['rss_delta_mb'] is not None else None,
+                'peak MB': round(record['peak_rss_mb'], 1) if record['peak_rss_mb'] is not None else None,
+                'details': ", ".join(f"{k}={v}" for k, v in record['attrs'].items())
+            }
+            for record in latest['spans']
+        ])
+        st.sidebar.dataframe(breakdown, hide_index=True)
+
 def render_footer():
     """Render application footer"""
     st.markdown("---")
@@ -1,112 +1,133 @@
+import numpy as np
+
+# AQI breakpoints per pollutant: (low, high, low_aqi, high_aqi)
+PM25_BREAKPOINTS = [
+    (0, 30, 0, 50),
+    (31, 60, 51, 100),
+    (61, 90, 101, 200),
+    (91, 120, 201, 300),
+    (121, 250, 301, 400),
+    (251, 350, 401, 500)
+]
+
+PM10_BREAKPOINTS = [
+    (0, 50, 0, 50),
+    (51, 100, 51, 100),
+    (101, 250, 101, 200),
+    (251, 350, 201, 300),
+    (351, 430, 301, 400),
+    (431, 530, 401, 500)
+]
+
+CO_BREAKPOINTS = [
+    (0.0, 1.0,   0,  50),
+    (1.1, 2.0,  51, 100),
+    (2.1, 10.0, 101, 200),
+    (10.1, 17.0, 201, 300),
+    (17.1, 34.0, 301, 400),
+    (34.1, 50.0, 401, 500)
+]
+
+NO2_BREAKPOINTS = [
+    (0, 40, 0, 50),
+    (41, 80, 51, 100),
+    (81, 180, 101, 150),
+    (181, 280, 151, 200),
+    (281, 400, 201, 300),
+    (401, 800, 301, 400),
+    (801, 1200, 401, 500)
+]
+
+SO2_BREAKPOINTS = [
+    (0, 40, 0, 50),
+    (41, 80, 51, 100),
+    (81, 380, 101, 150),
+    (381, 800, 151, 200),
+    (801, 1600, 201, 300),
+    (1601, 2100, 301, 400),
+    (2101, 2620, 401, 500)
+]
+
+O3_BREAKPOINTS = [
+    (0, 84, 0, 50),
+    (84, 124, 51, 100),
+    (125, 164, 101, 150),
+    (165, 204, 151, 200),
+    (205, 404, 201, 300),
+    (405, 504, 301, 400),
+    (505, 604, 401, 500)
+]
+
+NH3_BREAKPOINTS = [
+    (0, 10, 0, 50),
+    (11, 20, 51, 100),
+    (21, 30, 101, 150),
+    (31, 50, 151, 200),
+    (51, 100, 201, 300),
+    (101, 200, 301, 500)
+]
+
 def calculate_aqi_pm25(pm25_value):
-    breakpoints = [
-        (0, 30, 0, 50),
-        (31, 60, 51, 100),
-        (61, 90, 101, 200),
-        (91, 120, 201, 300),
-        (121, 250, 301, 400),
-        (251, 350, 401, 500)
-    ]
-    
-    for low, high, low_aqi, high_aqi in breakpoints:
+    for low, high, low_aqi, high_aqi in PM25_BREAKPOINTS:
         if low <= pm25_value <= high:
             return int(((pm25_value - low) / (high - low)) * (high_aqi - low_aqi) + low_aqi)
     return None
 
 def calculate_aqi_pm10(pm10_value):
-    breakpoints = [
-        (0, 50, 0, 50),
-        (51, 100, 51, 100),
-        (101, 250, 101, 200),
-        (251, 350, 201, 300),
-        (351, 430, 301, 400),
-        (431, 530, 401, 500)
-    ]
-    
-    for low, high, low_aqi, high_aqi in breakpoints:
+    for low, high, low_aqi, high_aqi in PM10_BREAKPOINTS:
         if low <= pm10_value <= high:
             return int(((pm10_value - low) / (high - low)) * (high_aqi - low_aqi) + low_aqi)
     return None
 
 def calculate_aqi_co(co_value):
     co_mg_m3 = co_value / 1000
-    breakpoints = [
-        (0.0, 1.0,   0,  50),
-        (1.1, 2.0,  51, 100),
-        (2.1, 10.0, 101, 200),
-        (10.1, 17.0, 201, 300),
-        (17.1, 34.0, 301, 400),
-        (34.1, 50.0, 401, 500)
-    ]
-    
-    for low, high, low_aqi, high_aqi in breakpoints:
+    for low, high, low_aqi, high_aqi in CO_BREAKPOINTS:
         if low <= co_mg_m3 <= high:
             return int(((co_mg_m3 - low) / (high - low)) * (high_aqi - low_aqi) + low_aqi)
     return None
 
 def calculate_aqi_no2(no2_value):
-    breakpoints = [
-        (0, 40, 0, 50),
-        (41, 80, 51, 100),
-        (81, 180, 101, 150),
-        (181, 280, 151, 200),
-        (281, 400, 201, 300),
-        (401, 800, 301, 400),
-        (801, 1200, 401, 500)
-    ]
-    
-    for low, high, low_aqi, high_aqi in breakpoints:
+    for low, high, low_aqi, high_aqi in NO2_BREAKPOINTS:
         if low <= no2_value <= high:
             return int(((no2_value - low) / (high - low)) * (high_aqi - low_aqi) + low_aqi)
     return None
 
 def calculate_aqi_so2(so2_value):
-    breakpoints = [
-        (0, 40, 0, 50),
-        (41, 80, 51, 100),
-        (81, 380, 101, 150),
-        (381, 800, 151, 200),
-        (801, 1600, 201, 300),
-        (1601, 2100, 301, 400),
-        (2101, 2620, 401, 500)
-    ]
-    
-    for low, high, low_aqi, high_aqi in breakpoints:
+    for low, high, low_aqi, high_aqi in SO2_BREAKPOINTS:
         if low <= so2_value <= high:
             return int(((so2_value - low) / (high - low)) * (high_aqi - low_aqi) + low_aqi)
     return None
 
 def calculate_aqi_o3(o3_value):
-    breakpoints = [
-        (0, 84, 0, 50),
-        (84, 124, 51, 100),
-        (125, 164, 101, 150),
-        (165, 204, 151, 200),
-        (205, 404, 201, 300),
-        (405, 504, 301, 400),
-        (505, 604, 401, 500)
-    ]
-    
-    for low, high, low_aqi, high_aqi in breakpoints:
+    for low, high, low_aqi, high_aqi in O3_BREAKPOINTS:
         if low <= o3_value <= high:
             return int(((o3_value - low) / (high - low)) * (high_aqi - low_aqi) + low_aqi)
     return None
 
 def calculate_aqi_nh3(nh3_value):
-    breakpoints = [
-        (0, 10, 0, 50),
-        (11, 20, 51, 100),
-        (21, 30, 101, 150),
-        (31, 50, 151, 200),
-        (51, 100, 201, 300),
-        (101, 200, 301, 500)
-    ]
-    
-    for low, high, low_aqi, high_aqi in breakpoints:
+    for low, high, low_aqi, high_aqi in NH3_BREAKPOINTS:
         if low <= nh3_value <= high:
             return int(((nh3_value - low) / (high - low)) * (high_aqi - low_aqi) + low_aqi)
     return None
 
+# Per-pollutant AQI calculation
+def calculate_pollutant_aqis(row):
+    """Return a dict of pollutant name -> sub-index AQI (None if out of range)"""
+    return {
+        'pm2_5': calculate_aqi_pm25(row['components.pm2_5']),
+        'pm10': calculate_aqi_pm10(row['components.pm10']),
+        'co': calculate_aqi_co(row['components.co']),
+        'no2': calculate_aqi_no2(row['components.no2']),
+        'so2': calculate_aqi_so2(row['components.so2']),
+        'o3': calculate_aqi_o3(row['components.o3']),
+        'nh3': calculate_aqi_nh3(row['components.nh3'])
+    }
+
+def get_dominant_pollutant(row):
+    """Return the pollutant with the highest sub-index AQI, or None"""
+    aqi_values = {name: aqi for name, aqi in calculate_pollutant_aqis(row).items() if aqi is not None}
+    return max(aqi_values, key=aqi_values.get) if aqi_values else None
+
 # Overall AQI calculation
 def calculate_overall_aqi(row):
     # Calculate AQI for each pollutant
@@ -114,7 +135,7 @@ def calculate_overall_aqi(row):
         calculate_aqi_pm25(row['components.pm2_5']),
         calculate_aqi_pm10(row['components.pm10']),
         calculate_aqi_co(row['components.co']),
-        calculate_aqi_no2(row['components.no']),
+        calculate_aqi_no2(row['components.no2']),
         calculate_aqi_so2(row['components.so2']),
         calculate_aqi_o3(row['components.o3']),
         calculate_aqi_nh3(row['components.nh3'])
@@ -124,4 +145,55 @@ def calculate_overall_aqi(row):
     aqi_values = [aqi for aqi in aqi_values if aqi is not None]
     
     # Return the maximum AQI value, or None if no valid AQI values
-    return max(aqi_values) if aqi_values else None
\ No newline at end of file
+    return max(aqi_values) if aqi_values else None
+
+# Vectorized overall AQI, same rules as calculate_overall_aqi
+# (column, breakpoints, divisor applied to the column first)
+OVERALL_AQI_INPUTS = [
+    ('components.pm2_5', PM25_BREAKPOINTS, 1),
+    ('components.pm10', PM10_BREAKPOINTS, 1),
+    ('components.co', CO_BREAKPOINTS, 1000),
+    ('components.no2', NO2_BREAKPOINTS, 1),
+    ('components.so2', SO2_BREAKPOINTS, 1),
+    ('components.o3', O3_BREAKPOINTS, 1),
+    ('components.nh3', NH3_BREAKPOINTS, 1)
+]
+
+def calculate_aqi_array(values, breakpoints):
+    """Sub-index AQI for an array of concentrations (NaN where no band applies)"""
+    values = np.asarray(values, dtype=np.float64)
+    aqi = np.full(values.shape, np.nan)
+    unmatched = np.ones(values.shape, dtype=bool)
+    # The first band containing a value wins, as in the scalar functions
+    for low, high, low_aqi, high_aqi in breakpoints:
+        hit = unmatched & (low <= values) & (values <= high)
+        aqi[hit] = np.trunc(((values[hit] - low) / (high - low)) * (high_aqi - low_aqi) + low_aqi)
+        unmatched &= ~hit
+    return aqi
+
+def calculate_overall_aqi_array(columns):
+    """
+    Overall AQI for every row of a frame (or dict of arrays) with
+    'components.*' columns; NaN for rows without any valid sub-index
+    """
+    sub_indices = [
+        calculate_aqi_array(np.asarray(columns[column], dtype=np.float64) / divisor, breakpoints)
+        for column, breakpoints, divisor in OVERALL_AQI_INPUTS
+    ]
+    return np.fmax.reduce(sub_indices)
+
+# Upper bounds of the get_aqi_category bands
+CATEGORY_BOUNDARIES = [50, 100, 150, 200]
+
+def get_aqi_category(aqi_value):
+    """Get AQI category and color for display"""
+    if aqi_value <= 50:
+        return "Good", "green"
+    elif aqi_value <= 100:
+        return "Moderate", "yellow"
+    elif aqi_value <= 150:
+        return "Unhealthy for Sensitive Groups", "orange"
+    elif aqi_value <= 200:
+        return "Unhealthy", "red"
+    else:
+        return "Very Unhealthy", "purple"
@@ -0,0 +1,149 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from forecast_lstm import (
+    FEATURE_COLS, FORECAST_HORIZON, INPUT_WINDOW, TARGET_COL, regularize_hourly, sliding_window_views,
+    valid_window_mask
+)
+import telemetry
+
+# Defaults: one forecast origin per day, predicted in batches of 512 windows
+ORIGIN_STRIDE = 24
+PREDICT_BATCH = 512
+
+def select_origins(n_windows, stride=ORIGIN_STRIDE, max_origins=None):
+    """
+    Window indices to evaluate, spaced `stride` hours apart and aligned so
+    the most recent window is always included
+    """
+    origins = np.arange(n_windows - 1, -1, -stride)[::-1]
+    if max_origins is not None and len(origins) > max_origins:
+        origins = origins[-max_origins:]
+    return origins
+
+def run_backtest(predict_fn, x_scaled, y_scaled, scaler_y, stride=ORIGIN_STRIDE,
+                 max_origins=None, batch_size=PREDICT_BATCH, cpu_time_budget=None, valid=None):
+    """
+    Rolling-origin backtest of a forecaster over a scaled history
+
+    Windows are zero-copy views of the history; only the windows of one
+    batch are gathered at a time and predicted in a single call.
+
+    Args:
+        predict_fn: Callable mapping an (n, window, features) array to
+                    (n, horizon) scaled predictions, e.g. keras_predict_fn(model)
+        x_scaled, y_scaled: Scaled features and target for the whole history
+        scaler_y: Scaler used to map predictions back to AQI units
+        stride: Hours between forecast origins
+        max_origins: Evaluate at most this many (most recent) origins
+        batch_size: Windows per predict call
+        cpu_time_budget: Stop after this much process CPU time in seconds;
+                         the origins evaluated so far are still reported
+        valid: Row validity from regularize_hourly; origins whose window
+               spans a masked gap are skipped
+
+    Returns:
+        dict: Overall MAE/RMSE, MAE/RMSE per horizon hour, origins evaluated
+              and timing
+    """
+    X, y = sliding_window_views(np.asarray(x_scaled, dtype=np.float32), np.asarray(y_scaled),
+                                INPUT_WINDOW, FORECAST_HORIZON)
+    origins = select_origins(len(y), stride)
+    if valid is not None:
+        origins = origins[valid_window_mask(valid, INPUT_WINDOW, FORECAST_HORIZON)[origins]]
+    if max_origins is not None:
+        origins = origins[-max_origins:]
+    if len(origins) == 0:
+        raise ValueError(f"History too short for a backtest: need at least {INPUT_WINDOW + FORECAST_HORIZON} hours")
+
+    # Evaluate the most recent origins first, so a budget cut keeps the
+    # latest (most relevant) part of the history
+    batches = [origins[max(0, end - batch_size):end] for end in range(len(origins), 0, -batch_size)]
+
+    abs_error_sum = np.zeros(FORECAST_HORIZON)
+    sq_error_sum = np.zeros(FORECAST_HORIZON)
+    evaluated = 0
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+
+    with telemetry.span("backtest", origins=len(origins)):
+        for batch in batches:
+            if cpu_time_budget is not None and evaluated and time.process_time() - cpu_start > cpu_time_budget:
+                break
+            pred = np.asarray(predict_fn(X[batch]))
+            error = (scaler_y.inverse_transform(pred.reshape(-1, 1)).reshape(pred.shape)
+                     - scaler_y.inverse_transform(y[batch].reshape(-1, 1)).reshape(pred.shape))
+            abs_error_sum += np.abs(error).sum(axis=0)
+            sq_error_sum += np.square(error).sum(axis=0)
+            evaluated += len(batch)
+        telemetry.set_attribute("evaluated", evaluated)
+
+    cpu_time = time.process_time() - cpu_start
+    wall_time = time.perf_counter() - wall_start
+    mae_by_horizon = abs_error_sum / evaluated
+    rmse_by_horizon = np.sqrt(sq_error_sum / evaluated)
+    return {
+        'mae': float(mae_by_horizon.mean()),
+        'rmse': float(np.sqrt(sq_error_sum.sum() / (evaluated * FORECAST_HORIZON))),
+        'mae_by_horizon': mae_by_horizon,
+        'rmse_by_horizon': rmse_by_horizon,
+        'origins_total': len(origins),
+        'origins_evaluated': evaluated,
+        'complete': evaluated == len(origins),
+        'cpu_time_s': cpu_time,
+        'wall_time_s': wall_time,
+        'origins_per_s': evaluated / wall_time if wall_time > 0 else float('inf')
+    }
+
+def keras_predict_fn(model, batch_size=PREDICT_BATCH):
+    """predict_fn for a single-input Keras model"""
+    return lambda X: model.predict(X, batch_size=batch_size, verbose=0)
+
+def backtest_artifacts(artifact_dir, data, **kwargs):
+    """
+    Backtest a saved model (see forecast_lstm.save_model_artifacts) on a
+    processed history DataFrame, using the model's own scalers
+    """
+    from forecast_inference import load_keras_model, load_scalers
+
+    scaler_x, scaler_y = load_scalers(artifact_dir)
+    model = load_keras_model(artifact_dir)
+    data, valid = regularize_hourly(data)
+    return run_backtest(
+        keras_predict_fn(model, kwargs.get('batch_size', PREDICT_BATCH)),
+        scaler_x.transform(data[FEATURE_COLS]),
+        scaler_y.transform(data[[TARGET_COL]]),
+        scaler_y,
+        valid=valid,
+        **kwargs
+    )
+
+def horizon_summary(report, hours=(1, 6, 24, 72, 168)):
+    """MAE/RMSE at selected horizon hours as a small DataFrame"""
+    hours = [h for h in hours if h <= len(report['mae_by_horizon'])]
+    return pd.DataFrame({
+        'horizon_h': hours,
+        'mae': [report['mae_by_horizon'][h - 1] for h in hours],
+        'rmse': [report['rmse_by_horizon'][h - 1] for h in hours]
+    })
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of saved forecast models")
+    parser.add_argument("artifact_dirs", nargs="+", help="One or more model artifact directories to compare")
+    parser.add_argument("--data", default="air_pollution_data_AQI.csv")
+    parser.add_argument("--stride", type=int, default=ORIGIN_STRIDE, help="Hours between forecast origins")
+    parser.add_argument("--max-origins", type=int)
+    parser.add_argument("--cpu-budget", type=float, help="CPU seconds allowed per model")
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data)
+    for artifact_dir in args.artifact_dirs:
+        report = backtest_artifacts(artifact_dir, data, stride=args.stride,
+                                    max_origins=args.max_origins, cpu_time_budget=args.cpu_budget)
+        print(f"\n{artifact_dir}: MAE {report['mae']:.2f}, RMSE {report['rmse']:.2f} over "
+              f"{report['origins_evaluated']}/{report['origins_total']} origins "
+              f"({report['cpu_time_s']:.1f}s CPU, {report['origins_per_s']:.0f} origins/s)")
+        print(horizon_summary(report).to_string(index=False, float_format="%.2f"))
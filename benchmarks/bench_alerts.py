@@ -0,0 +1,78 @@
+"""
+Alert engine benchmark.
+
+Times one refresh cycle (current + forecast values for one city) against a
+large subscription index:
+
+    python -m benchmarks.bench_alerts --subscriptions 100000 --cities 1
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from alerts import CONDITIONS, SOURCES, AlertEngine, QueueSink
+from aqi_calculator import CATEGORY_BOUNDARIES
+
+def build_engine(n_subscriptions, n_cities, seed=0):
+    rng = np.random.default_rng(seed)
+    cities = [f"city-{i}" for i in range(n_cities)]
+    engine = AlertEngine(sink=QueueSink())
+    engine.subscribe_many(
+        (f"user-{i}", cities[i % n_cities],
+         CATEGORY_BOUNDARIES[rng.integers(len(CATEGORY_BOUNDARIES))],
+         CONDITIONS[rng.integers(len(CONDITIONS))], SOURCES[rng.integers(len(SOURCES))])
+        for i in range(n_subscriptions)
+    )
+    return engine, cities
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark alert evaluation per refresh cycle")
+    parser.add_argument("--subscriptions", type=int, default=100_000)
+    parser.add_argument("--cities", type=int, default=1, help="Cities the subscriptions are spread over")
+    parser.add_argument("--cycles", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    engine, cities = build_engine(args.subscriptions, args.cities)
+    subscribe_s = time.perf_counter() - start
+
+    # The first evaluation merges the pending subscriptions into the index
+    start = time.perf_counter()
+    engine.evaluate(cities[0], current_aqi=75.0, forecast_aqi=np.full(168, 75.0), now=0)
+    index_build_s = time.perf_counter() - start
+    engine.sink.drain()
+
+    # Oscillate across boundaries so cycles fire, re-arm and get suppressed
+    rng = np.random.default_rng(1)
+    timings, sent = [], 0
+    for cycle in range(args.cycles):
+        current = float(rng.uniform(20, 250))
+        forecast = rng.uniform(20, 250, 168)
+        start = time.perf_counter()
+        notifications = engine.evaluate(cities[0], current_aqi=current, forecast_aqi=forecast,
+                                        now=(cycle + 1) * engine.cooldown_s)
+        timings.append(time.perf_counter() - start)
+        sent += len(notifications)
+        engine.sink.drain()
+
+    timings.sort()
+    report = {
+        'subscriptions': args.subscriptions,
+        'cities': args.cities,
+        'subscriptions_per_city': args.subscriptions // args.cities,
+        'subscribe_s': subscribe_s,
+        'index_build_s': index_build_s,
+        'cycles': args.cycles,
+        'cycle_p50_ms': statistics.median(timings) * 1000,
+        'cycle_max_ms': timings[-1] * 1000,
+        'notifications_per_cycle': sent / args.cycles
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Scaling of the global multi-city forecast model.
+
+Trains one shared model for increasing numbers of (synthetic) cities and
+reports total training time and batched inference throughput:
+
+    python -m benchmarks.bench_global --cities 1 10 50 --output global.json
+"""
+import argparse
+import json
+import sys
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the global multi-city model")
+    parser.add_argument("--cities", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--hours", type=int, default=180 * 24)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--max-sequences", type=int, default=4096)
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    from air_pollution import process_aqi_data
+    from benchmarks.record_fixtures import synthetic_history
+    from forecast_lstm import forecast_cities, train_global_model
+
+    frames = {f"city_{i}": process_aqi_data(synthetic_history(args.hours, seed=i)) for i in range(max(args.cities))}
+
+    results = []
+    for n_cities in args.cities:
+        subset = {name: frames[name] for name in list(frames)[:n_cities]}
+        start = time.perf_counter()
+        global_model = train_global_model(subset, max_epochs=args.epochs, max_sequences=args.max_sequences)
+        train_s = time.perf_counter() - start
+
+        forecast_cities(global_model, subset)  # warm-up
+        _, cities_per_s = forecast_cities(global_model, subset)
+
+        results.append({
+            'cities': n_cities,
+            'train_s': train_s,
+            'sequences': global_model['report']['sequences'],
+            'inference_cities_per_s': cities_per_s
+        })
+        print(f"{n_cities:>4} cities  train {train_s:8.1f} s  inference {cities_per_s:10.1f} cities/s", file=sys.stderr)
+
+    report = {'hours': args.hours, 'epochs': args.epochs, 'results': results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
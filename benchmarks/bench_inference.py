@@ -0,0 +1,135 @@
+"""
+Compare forecast inference engines: Keras, traced SavedModel and TFLite
+(float32, int8 and float16 quantized).
+
+Trains a small model on a fixture (or uses --artifact-dir), exports every
+variant and reports load time, per-prediction latency, RSS growth and the
+forecast error of each variant against the Keras predictions, in AQI units:
+
+    python -m benchmarks.bench_inference --output inference.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+def measure_latency(forecaster, windows, repeat):
+    """Per-prediction latency percentiles in milliseconds"""
+    forecaster.predict(windows[0])  # warm-up
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        forecaster.predict(windows[i % len(windows)])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'latency_p50_ms': statistics.median(timings),
+        'latency_p95_ms': timings[int(0.95 * (len(timings) - 1))],
+        'latency_mean_ms': statistics.fmean(timings)
+    }
+
+def prepare_artifacts(artifact_dir, hours, epochs):
+    """
+    Build evaluation windows from a fixture, training and saving a model
+    first if the artifact directory does not contain one
+    """
+    import os
+    from sklearn.preprocessing import MinMaxScaler
+
+    from air_pollution import process_aqi_data
+    from benchmarks.record_fixtures import load_history
+    from forecast_inference import load_scalers
+    from forecast_lstm import (
+        FEATURE_COLS, FORECAST_HORIZON, INPUT_WINDOW, KERAS_MODEL_FILE, TARGET_COL,
+        build_model, create_sequences, save_model_artifacts
+    )
+
+    df = process_aqi_data(load_history(hours))
+    trained = os.path.exists(os.path.join(artifact_dir, KERAS_MODEL_FILE))
+    if trained:
+        scaler_x, scaler_y = load_scalers(artifact_dir)
+        x_scaled = scaler_x.transform(df[FEATURE_COLS])
+        y_scaled = scaler_y.transform(df[[TARGET_COL]])
+    else:
+        scaler_x, scaler_y = MinMaxScaler(), MinMaxScaler()
+        x_scaled = scaler_x.fit_transform(df[FEATURE_COLS])
+        y_scaled = scaler_y.fit_transform(df[[TARGET_COL]])
+    X_sequences, y_sequences = create_sequences(x_scaled, y_scaled, INPUT_WINDOW, FORECAST_HORIZON)
+
+    if not trained:
+        model = build_model(INPUT_WINDOW, len(FEATURE_COLS), FORECAST_HORIZON)
+        model.fit(X_sequences, y_sequences, epochs=epochs, batch_size=32, verbose=0)
+        save_model_artifacts(model, scaler_x, scaler_y, artifact_dir)
+    return X_sequences.astype(np.float32)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark forecast inference engines")
+    parser.add_argument("--artifact-dir", help="Existing model artifacts (default: train a fresh model)")
+    parser.add_argument("--hours", type=int, default=180 * 24, help="Fixture size used to train and evaluate")
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--eval-windows", type=int, default=100)
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    import forecast_inference as fi
+    from telemetry import current_rss_mb
+
+    artifact_dir = args.artifact_dir or tempfile.mkdtemp(prefix="aqi_model_")
+    windows = prepare_artifacts(artifact_dir, args.hours, args.epochs)
+    eval_windows = windows[-args.eval_windows:]
+    _, scaler_y = fi.load_scalers(artifact_dir)
+
+    model = fi.load_keras_model(artifact_dir)
+    fi.export_saved_model(model, artifact_dir)
+    for quantization in fi.QUANTIZATION_MODES:
+        fi.export_tflite(model, artifact_dir, quantization)
+
+    def load_variant(name):
+        if name == 'keras':
+            return fi.KerasForecaster(fi.load_keras_model(artifact_dir))
+        if name == 'saved_model':
+            return fi.SavedModelForecaster(f"{artifact_dir}/{fi.SAVED_MODEL_DIR}")
+        quantization = name.split(':')[1]
+        return fi.TFLiteForecaster(f"{artifact_dir}/{fi.TFLITE_FILE_TEMPLATE.format(quantization=quantization)}")
+
+    variants = ['keras', 'saved_model'] + [f"tflite:{q}" for q in fi.QUANTIZATION_MODES]
+    reference = None
+    results = []
+    for name in variants:
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        forecaster = load_variant(name)
+        load_s = time.perf_counter() - start
+
+        predictions = scaler_y.inverse_transform(np.stack([forecaster.predict(w) for w in eval_windows]))
+        if reference is None:
+            reference = predictions
+        rss_after = current_rss_mb()
+
+        result = {
+            'engine': name,
+            'load_s': load_s,
+            **measure_latency(forecaster, eval_windows, args.repeat),
+            'rss_delta_mb': rss_after - rss_before if rss_after is not None and rss_before is not None else None,
+            'mae_vs_keras_aqi': float(np.mean(np.abs(predictions - reference))),
+            'max_abs_diff_vs_keras_aqi': float(np.max(np.abs(predictions - reference)))
+        }
+        results.append(result)
+        print(f"{name:<16} load {load_s * 1000:8.1f} ms  p50 {result['latency_p50_ms']:7.2f} ms  "
+              f"MAE vs keras {result['mae_vs_keras_aqi']:.3f}", file=sys.stderr)
+
+    report = {'artifact_dir': artifact_dir, 'eval_windows': len(eval_windows), 'results': results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+End-to-end pipeline benchmarks.
+
+Times each hot path of the dashboard at several data sizes against a local
+fixture server and writes machine-readable JSON results:
+
+    python -m benchmarks.bench_pipeline --output bench_output.txt
+    python -m benchmarks.bench_pipeline --sizes 1d 180d --compare baseline.json
+
+With --compare, stages that got slower than the baseline by more than
+--threshold are listed and the exit code is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.fixture_server import start_fixture_server
+from benchmarks.record_fixtures import SIZES
+
+def time_stage(fn, repeat):
+    """Run fn `repeat` times and return timing statistics in seconds"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    stats = {
+        'repeat': repeat,
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'mean_s': statistics.fmean(timings)
+    }
+    return stats, result
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(sizes, repeat, train_epochs, max_train_sequences, skip_training):
+    # The server must be up before the modules read OWM_BASE_URL
+    server, base_url = start_fixture_server()
+    os.environ["OWM_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_o1_MINI_API_KEY", "benchmark")
+
+    import numpy as np
+    import pandas as pd
+    from sklearn.preprocessing import MinMaxScaler
+
+    from aqi_calculator import calculate_overall_aqi, calculate_overall_aqi_array
+    from air_pollution import fetch_recent_history, process_aqi_data
+    from chart_data import chart_payload
+    from chatbot import build_advisor_messages
+    from forecast_lstm import (
+        FEATURE_COLS, FORECAST_HORIZON, INPUT_WINDOW, TARGET_COL, build_model, create_sequences, regularize_hourly
+    )
+    from lat_lon import get_lat_lon
+    from owm_decoder import COMPONENT_COLS, decode_air_pollution
+
+    results = []
+
+    def record(stage, size, n_rows, stats, **extra):
+        entry = {'stage': stage, 'size': size, 'n_rows': n_rows, **stats, **extra}
+        results.append(entry)
+        print(f"{stage:<22} {size:>5} {n_rows:>7} rows  median {stats['median_s'] * 1000:10.2f} ms", file=sys.stderr)
+
+    stats, _ = time_stage(lambda: get_lat_lon("benchmark", "Mumbai"), repeat)
+    record('geocode', '-', 1, stats)
+
+    for size in sizes:
+        hours = SIZES[size]
+
+        stats, data = time_stage(lambda: fetch_recent_history("benchmark", 19.076, 72.8777, hours), repeat)
+        record('history_fetch', size, len(decode_air_pollution(data)['dt']), stats, payload_bytes=len(data))
+
+        stats, columns = time_stage(lambda: decode_air_pollution(data), repeat)
+        record('decode_response', size, len(columns['dt']), stats)
+
+        # Previous decoding path, kept as the reference for speed and output
+        stats, raw = time_stage(lambda: pd.json_normalize(json.loads(data)['list']), repeat)
+        record('json_normalize', size, len(raw), stats)
+
+        stats, df = time_stage(lambda: process_aqi_data(data), repeat)
+        rowwise_aqi = raw.apply(calculate_overall_aqi, axis=1).to_numpy(dtype=np.float64)
+        matches = bool(
+            np.array_equal(df['Overall_AQI'].to_numpy(), rowwise_aqi, equal_nan=True)
+            and np.array_equal(df['main.aqi'].to_numpy(), raw['main.aqi'].to_numpy())
+            and np.allclose(df[COMPONENT_COLS].to_numpy(), raw[COMPONENT_COLS].to_numpy(), rtol=1e-6)
+        )
+        record('process_aqi_data', size, len(df), stats, matches_json_normalize=matches)
+
+        series = df.set_index('dt')['Overall_AQI']
+        stats, reduced = time_stage(lambda: chart_payload(series), repeat)
+        record('chart_downsample', size, len(series), stats, points_out=len(reduced),
+               payload_bytes=len(series.to_json()), reduced_payload_bytes=len(reduced.to_json()))
+
+        stats, _ = time_stage(lambda: calculate_overall_aqi_array(columns), repeat)
+        record('calculate_overall_aqi', size, len(df), stats)
+
+        stats, _ = time_stage(lambda: raw.apply(calculate_overall_aqi, axis=1), repeat)
+        record('calculate_overall_aqi_rowwise', size, len(raw), stats)
+
+        stats, (regular, valid) = time_stage(lambda: regularize_hourly(df), repeat)
+        record('regularize_hourly', size, len(df), stats, masked=int((~valid).sum()))
+
+        x_scaled = MinMaxScaler().fit_transform(regular[FEATURE_COLS])
+        y_scaled = MinMaxScaler().fit_transform(regular[[TARGET_COL]])
+        stats, (X_sequences, y_sequences) = time_stage(
+            lambda: create_sequences(x_scaled, y_scaled, INPUT_WINDOW, FORECAST_HORIZON, valid), repeat
+        )
+        record('build_sequences', size, len(df), stats, n_sequences=len(X_sequences))
+
+        if len(X_sequences) == 0 or skip_training:
+            continue
+
+        X_train, y_train = X_sequences[-max_train_sequences:], y_sequences[-max_train_sequences:]
+        model = build_model(INPUT_WINDOW, len(FEATURE_COLS), FORECAST_HORIZON)
+        start = time.perf_counter()
+        model.fit(X_train, y_train, epochs=train_epochs, batch_size=32, verbose=0)
+        per_epoch = (time.perf_counter() - start) / train_epochs
+        record('train_epoch', size, len(X_train), {'repeat': train_epochs, 'min_s': per_epoch,
+               'median_s': per_epoch, 'mean_s': per_epoch}, samples_per_s=len(X_train) / per_epoch)
+
+        latest_input = X_sequences[-1:].astype(np.float32)
+        model.predict(latest_input, verbose=0)  # warm-up, builds the predict function
+        stats, _ = time_stage(lambda: model.predict(latest_input, verbose=0), repeat)
+        record('inference', size, 1, stats)
+
+    forecast = list(np.linspace(80, 160, FORECAST_HORIZON))
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": "How is the air today? " * 10}
+               for i in range(20)]
+    stats, _ = time_stage(lambda: build_advisor_messages(
+        forecasted_aqi=forecast, user_health_issues="Is it safe to go running tomorrow morning?",
+        current_aqi=120.0, city="Mumbai", chat_history=history, forecast_start="2025-01-01 00:00:00"
+    ), repeat)
+    record('advisor_prompt', '-', FORECAST_HORIZON, stats)
+
+    server.shutdown()
+    return results
+
+def compare_results(results, baseline_path, threshold):
+    """Return the stages that are slower than the baseline by more than threshold"""
+    with open(baseline_path) as f:
+        baseline = {(r['stage'], r['size']): r for r in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        base = baseline.get((result['stage'], result['size']))
+        if base and base['median_s'] > 0:
+            ratio = result['median_s'] / base['median_s']
+            if ratio > 1 + threshold:
+                regressions.append({'stage': result['stage'], 'size': result['size'], 'ratio': ratio})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AQI pipeline hot paths")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--train-epochs", type=int, default=1)
+    parser.add_argument("--max-train-sequences", type=int, default=2048)
+    parser.add_argument("--skip-training", action="store_true", help="Skip LSTM training and inference")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown vs. baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.repeat, args.train_epochs, args.max_train_sequences, args.skip_training)
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        regressions = compare_results(results, args.compare, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['stage']} ({r['size']}): {r['ratio']:.2f}x slower", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
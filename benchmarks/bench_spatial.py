@@ -0,0 +1,67 @@
+"""
+Spatial snapping benchmark.
+
+Simulates lookups from many localities of a dense metro and compares the
+fetch cache hit rate when caching by exact coordinates vs. by grid cell:
+
+    python -m benchmarks.bench_spatial --queries 5000 --radius-km 20
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from spatial_grid import GRID_CELL_DEG, snap_coordinates
+
+KM_PER_DEG = 111.0
+
+def metro_queries(n_queries, n_localities, center, radius_km, seed=0):
+    """Query coordinates: n_localities points around center, picked with Zipf-like popularity"""
+    rng = np.random.default_rng(seed)
+    radius = radius_km / KM_PER_DEG * np.sqrt(rng.uniform(0, 1, n_localities))
+    angle = rng.uniform(0, 2 * np.pi, n_localities)
+    lats = np.round(center[0] + radius * np.sin(angle), 4)
+    lons = np.round(center[1] + radius * np.cos(angle) / np.cos(np.radians(center[0])), 4)
+    popularity = 1 / np.arange(1, n_localities + 1)
+    picks = rng.choice(n_localities, n_queries, p=popularity / popularity.sum())
+    return list(zip(lats[picks], lons[picks]))
+
+def hit_rate(keys):
+    seen, hits = set(), 0
+    for key in keys:
+        hits += key in seen
+        seen.add(key)
+    return hits / len(keys), len(seen)
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache hit rate with and without spatial snapping")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--localities", type=int, default=2000, help="Distinct geocoded places in the metro")
+    parser.add_argument("--radius-km", type=float, default=20.0)
+    parser.add_argument("--cell-deg", type=float, default=GRID_CELL_DEG)
+    args = parser.parse_args()
+
+    queries = metro_queries(args.queries, args.localities, (19.076, 72.8777), args.radius_km)
+
+    start = time.perf_counter()
+    snapped = [snap_coordinates(lat, lon, args.cell_deg) for lat, lon in queries]
+    snap_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+    exact_rate, exact_fetches = hit_rate(queries)
+    snapped_rate, snapped_fetches = hit_rate(snapped)
+    report = {
+        'queries': args.queries,
+        'localities': args.localities,
+        'radius_km': args.radius_km,
+        'cell_deg': args.cell_deg,
+        'exact': {'hit_rate': exact_rate, 'upstream_fetches': exact_fetches},
+        'snapped': {'hit_rate': snapped_rate, 'upstream_fetches': snapped_fetches},
+        'snap_us_per_query': snap_us
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Local HTTP server that replays fixtures in place of api.openweathermap.org.
+
+History requests are answered with the last (end - start) hours of the
+fixture, re-stamped so the newest record falls on `end`, which lets the
+dashboard's "last N hours" fetches run unchanged against old recordings.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.record_fixtures import GEOCODE_FIXTURE, load_history
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # Responses are cached per requested size, as the server is reused across stages
+    history_cache = {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/geo/1.0/direct":
+            self.send_json(GEOCODE_FIXTURE)
+        elif url.path == "/data/2.5/air_pollution/history":
+            start, end = int(params["start"]), int(params["end"])
+            self.send_json(self.history(max(1, (end - start) // 3600), end))
+        else:
+            self.send_error(404)
+
+    def history(self, hours, end):
+        if hours not in self.history_cache:
+            data = load_history(hours)
+            self.history_cache[hours] = (data, data['list'][-1]['dt'])
+        data, last_dt = self.history_cache[hours]
+        shift = end - last_dt
+        records = [dict(record, dt=record['dt'] + shift) for record in data['list'][-hours:]]
+        return dict(data, list=records)
+
+    def send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fixture_server(port=0):
+    """Start the fixture server in a background thread and return (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,87 @@
+"""
+Load test for the JSON API.
+
+Without --url, starts the API in-process against the local fixture server,
+so no API key or network is needed:
+
+    python -m benchmarks.load_test_api --path "/v1/current?city=Mumbai" --concurrency 16
+    python -m benchmarks.load_test_api --url http://localhost:8000 --duration 30
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+def worker(host, port, path, deadline, latencies, errors):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+            latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API requests per second")
+    parser.add_argument("--url", help="Base URL of a running API (default: start one in-process)")
+    parser.add_argument("--path", default="/v1/current?city=Mumbai")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.url is None:
+        from benchmarks.fixture_server import start_fixture_server
+        _, fixture_url = start_fixture_server()
+        os.environ.update(OWM_BASE_URL=fixture_url, API_KEY="benchmark")
+        os.environ.setdefault("OPENAI_o1_MINI_API_KEY", "benchmark")
+        import api_server
+
+        server = api_server.create_server("127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        args.url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    url = urlparse(args.url)
+    host, port = url.hostname, url.port or 80
+
+    # Warm the caches so the test measures steady-state serving
+    worker(host, port, args.path, time.perf_counter() + 0.1, [], [])
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=worker, args=(host, port, args.path, deadline, latencies, errors))
+               for _ in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    report = {
+        'path': args.path,
+        'concurrency': args.concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'requests_per_s': len(latencies) / elapsed,
+        'latency_p50_ms': statistics.median(latencies) * 1000 if latencies else None,
+        'latency_p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else None
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
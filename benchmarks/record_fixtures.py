@@ -0,0 +1,93 @@
+"""
+Recorded and synthetic OpenWeatherMap fixtures for the benchmarks.
+
+Recorded responses live in benchmarks/fixtures/ as history_<hours>h.json and
+are replayed as-is. None are committed to the repository, so by default
+every size uses a deterministic synthetic response in the same
+air_pollution schema; recording one replaces the synthetic data for that
+size.
+
+Record a fresh fixture (needs API_KEY in .env):
+    python -m benchmarks.record_fixtures --city Mumbai --days 180
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Dataset sizes used by the benchmarks, in hours
+SIZES = {
+    '1d': 24,
+    '180d': 180 * 24,
+    '3y': 3 * 365 * 24
+}
+
+GEOCODE_FIXTURE = [{"name": "Mumbai", "lat": 19.0760, "lon": 72.8777, "country": "IN", "state": "Maharashtra"}]
+
+# Typical mean concentration of each component (ug/m3) for the synthetic data
+COMPONENT_MEANS = {
+    'co': 600.0, 'no': 5.0, 'no2': 30.0, 'o3': 60.0,
+    'so2': 15.0, 'pm2_5': 45.0, 'pm10': 80.0, 'nh3': 8.0
+}
+
+def fixture_path(hours):
+    return os.path.join(FIXTURE_DIR, f"history_{hours}h.json")
+
+def synthetic_history(hours, end_ts=1_700_000_000, seed=0):
+    """Generate an air_pollution/history response with `hours` hourly records"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(hours)
+    daily = 1 + 0.3 * np.sin(2 * np.pi * t / 24)
+    weekly = 1 + 0.1 * np.sin(2 * np.pi * t / (24 * 7))
+
+    components = {}
+    for name, mean in COMPONENT_MEANS.items():
+        noise = rng.lognormal(0, 0.25, hours)
+        components[name] = np.round(mean * daily * weekly * noise, 2)
+
+    start_ts = end_ts - (hours - 1) * 3600
+    records = []
+    for i in range(hours):
+        pm25 = components['pm2_5'][i]
+        aqi = 1 if pm25 < 10 else 2 if pm25 < 25 else 3 if pm25 < 50 else 4 if pm25 < 75 else 5
+        records.append({
+            "main": {"aqi": aqi},
+            "components": {name: float(values[i]) for name, values in components.items()},
+            "dt": int(start_ts + i * 3600)
+        })
+    return {"coord": {"lon": 72.8777, "lat": 19.076}, "list": records}
+
+def load_history(hours):
+    """Return the recorded response for `hours` if present, else a synthetic one"""
+    path = fixture_path(hours)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return synthetic_history(hours)
+
+def record_history(city, days):
+    """Fetch and save a real response from OpenWeatherMap"""
+    from dotenv import load_dotenv
+    from lat_lon import get_lat_lon
+    from air_pollution import fetch_recent_history
+
+    load_dotenv(dotenv_path=".env")
+    api_key = os.getenv("API_KEY")
+    latitude, longitude, _, _ = get_lat_lon(api_key, city)
+    body = fetch_recent_history(api_key, latitude, longitude, days * 24)
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = fixture_path(days * 24)
+    with open(path, "wb") as f:
+        f.write(body)
+    print(f"Recorded {len(json.loads(body)['list'])} hours for {city} to {path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record OpenWeatherMap fixtures for the benchmarks")
+    parser.add_argument("--city", default="Mumbai")
+    parser.add_argument("--days", type=int, default=180)
+    args = parser.parse_args()
+    record_history(args.city, args.days)
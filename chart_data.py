@@ -0,0 +1,128 @@
+"""
+Shape-preserving downsampling for chart payloads.
+
+A line chart cannot show more than a couple of points per horizontal pixel,
+so long series are reduced before they are sent to the browser:
+
+- LTTB (Largest-Triangle-Three-Buckets) keeps the points that carry the
+  visual shape of a single series.
+- Min/max bucketing keeps each bucket's extremes, so no peak is lost; used
+  for multi-series charts where all columns share the same rows.
+
+Series at or below the point budget are returned unchanged.
+"""
+import numpy as np
+import pandas as pd
+
+# Approximate plot widths in pixels for the dashboard's layouts
+MAIN_CHART_WIDTH_PX = 1200
+CARD_CHART_WIDTH_PX = 300
+# LTTB picks one point per pixel; min/max needs two (low and high) per pixel
+POINTS_PER_PIXEL = {'lttb': 1, 'minmax': 2}
+DOWNSAMPLE_METHODS = list(POINTS_PER_PIXEL)
+
+def max_points_for_width(width_px, method='lttb'):
+    """Point budget for a chart of the given pixel width"""
+    return max(int(width_px * POINTS_PER_PIXEL[method]), 3)
+
+def _x_values(index):
+    """Numeric x positions for an index (nanoseconds for datetimes)"""
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(np.float64)
+    if pd.api.types.is_numeric_dtype(index):
+        return np.asarray(index, dtype=np.float64)
+    return np.arange(len(index), dtype=np.float64)
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets
+
+    Args:
+        x: Ascending x positions
+        y: Values (NaN gaps are skipped when choosing points)
+        n_out: Number of points to keep, including the first and last
+
+    Returns:
+        np.ndarray: Sorted indices into x/y
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    y_filled = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+    # Bucket i (1..n_out-2) covers [edges[i-1], edges[i]); first and last points are kept
+    edges = (np.floor(np.arange(n_out - 1) * (n - 2) / (n_out - 2)) + 1).astype(np.int64)
+    edges[-1] = n - 1
+    bucket_x = np.add.reduceat(x[:-1], edges[:-1]) / np.diff(edges)
+    bucket_y = np.add.reduceat(y_filled[:-1], edges[:-1]) / np.diff(edges)
+    # The next bucket's average for the last bucket is the final point itself
+    next_x = np.append(bucket_x[1:], x[-1])
+    next_y = np.append(bucket_y[1:], y_filled[-1])
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[start:end] - y_filled[a])
+            - (x[a] - x[start:end]) * (next_y[i] - y_filled[a])
+        )
+        area[np.isnan(area)] = -1.0
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+def minmax_indices(y, n_out):
+    """
+    Indices of each bucket's minimum and maximum (plus the first and last point)
+
+    Returns:
+        np.ndarray: Sorted unique indices, at most n_out + 2 of them
+    """
+    n = len(y)
+    buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+
+    size = -(-n // buckets)  # ceil
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    return np.unique(np.concatenate([[0, n - 1], lows[lows < n], highs[highs < n]]))
+
+def downsample_series(series, max_points, method='lttb'):
+    """Reduce a pandas Series to at most ~max_points rows, keeping its shape"""
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {DOWNSAMPLE_METHODS}")
+    if len(series) <= max_points:
+        return series
+    y = series.to_numpy(dtype=np.float64)
+    if method == 'lttb':
+        indices = lttb_indices(_x_values(series.index), y, max_points)
+    else:
+        indices = minmax_indices(y, max_points)
+    return series.iloc[indices]
+
+def downsample_frame(df, max_points):
+    """
+    Reduce a multi-column chart frame to about max_points rows. Each column
+    gets an equal share of the budget and the rows holding any column's
+    bucket extremes are kept for all columns.
+    """
+    if len(df) <= max_points:
+        return df
+    share = max(max_points // max(len(df.columns), 1), 2)
+    indices = np.unique(np.concatenate([
+        minmax_indices(df[column].to_numpy(dtype=np.float64), share) for column in df.columns
+    ]))
+    return df.iloc[indices]
+
+def chart_payload(data, width_px=MAIN_CHART_WIDTH_PX):
+    """Downsample a Series (LTTB) or DataFrame (min/max) for a chart of width_px pixels"""
+    if isinstance(data, pd.Series):
+        return downsample_series(data, max_points_for_width(width_px, 'lttb'), 'lttb')
+    return downsample_frame(data, max_points_for_width(width_px, 'minmax'))
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from chatbot import get_aqi_advice  # Make sure this imports correctly
+from forecast_store import find_forecast_artifact, forecast_file_signature, list_cell_forecasts, read_forecast
 from datetime import datetime
 
 # Streamlit app setup
@@ -8,13 +9,27 @@ st.set_page_config(page_title="AQI Health Chatbot", page_icon="🌬️")
 st.title("💬 AQI Health Risk Chatbot")
 st.markdown("Ask health-related questions based on forecasted AQI conditions.")
 
-# Load forecast data
-@st.cache_data
-def load_forecast_data():
-    df = pd.read_csv("forecast_LSTM_AQI.csv")
+# Load forecast data. The cache is keyed by the artifact's path and
+# (mtime, size) signature, so a newly written forecast is picked up on the
+# next rerun and an unchanged file is never parsed twice.
+@st.cache_data(max_entries=4)
+def load_forecast_data(path, signature):
+    df = read_forecast(path)
     return df['predicted_AQI'].tolist()
 
-forecasted_aqi = load_forecast_data()
+# The dashboard writes one forecast per grid cell; pick the cell to advise on
+# (falls back to the single forecast written by forecast_lstm.py)
+cell_forecasts = list_cell_forecasts()
+if cell_forecasts:
+    cell = st.selectbox("Location (grid cell)", list(cell_forecasts))
+    forecast_path = cell_forecasts[cell]
+else:
+    forecast_path = find_forecast_artifact()
+if forecast_path is not None:
+    forecasted_aqi = load_forecast_data(forecast_path, forecast_file_signature(forecast_path))
+else:
+    forecasted_aqi = []
+    st.info("No forecast found yet. Generate one from the dashboard for forecast-aware advice.")
 
 # Initialize chat history
 if "messages" not in st.session_state:
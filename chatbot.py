@@ -1,7 +1,13 @@
 import os
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from openai import OpenAI
 
+import telemetry
+from advisor_rules import answer_locally, detect_conditions, format_band_advice
+# get_aqi_category lives in aqi_calculator; kept importable from here
+from aqi_calculator import get_aqi_category
+
 # Load .env variables if using locally
 load_dotenv()
 
@@ -9,20 +15,127 @@ load_dotenv()
 client = OpenAI(base_url="https://models.github.ai/inference",
                 api_key=os.getenv("OPENAI_o1_MINI_API_KEY"))  # or GITHUB_TOKEN if used
 
-def get_aqi_advice(forecasted_aqi = None, user_health_issues=None, current_aqi=None, city=None):
+# Prompt budget (approximate tokens). The whole request sent to the model is
+# kept under MAX_PROMPT_TOKENS so latency and cost per call stay predictable.
+MAX_PROMPT_TOKENS = 1200
+MAX_HISTORY_TOKENS = 500
+MAX_QUESTION_TOKENS = 250
+WORST_HOURS_SHOWN = 3
+
+def estimate_tokens(text):
+    """Rough token count for a piece of text (~4 characters per token)"""
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text down so that it fits within max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(0, (max_tokens - 1) * 4 - 3)
+    return text[:max_chars].rstrip() + "..."
+
+def clean_forecast_values(forecasted_aqi):
+    """Return the forecast as a list of floats, dropping invalid entries"""
+    if forecasted_aqi is None:
+        return []
+    try:
+        values = list(forecasted_aqi)
+    except TypeError:
+        return []
+
+    # Filter valid numeric values
+    return [float(aqi) for aqi in values
+            if aqi is not None and isinstance(aqi, (int, float, str))
+            and str(aqi).replace('.', '').replace('-', '').isdigit()]
+
+def summarize_forecast(forecasted_aqi, forecast_start=None, worst_hours=WORST_HOURS_SHOWN):
     """
-    Get AQI-based health advice using OpenAI API
-    
+    Compress an hourly forecast into a compact daily profile
+
     Args:
-        forecasted_aqi: List of forecasted AQI values
-        user_health_issues: User's health concerns or questions (optional)
-        current_aqi: Current AQI value (optional)
-        city: City name (optional)
-    
+        forecasted_aqi: Hourly forecasted AQI values (list or Series)
+        forecast_start: Timestamp of the first forecast hour (optional)
+        worst_hours: Number of worst hours to list
+
     Returns:
-        str: Health advice and recommendations
+        str: Multi-line summary with per-day mean/peak and the worst hours,
+             or an empty string if there is no usable forecast
+    """
+    values = clean_forecast_values(forecasted_aqi)
+    if not values:
+        return ""
+
+    if forecast_start is not None:
+        try:
+            forecast_start = datetime.fromisoformat(str(forecast_start))
+        except ValueError:
+            forecast_start = None
+
+    def hour_label(i):
+        if forecast_start is None:
+            return f"+{i + 1}h"
+        return (forecast_start + timedelta(hours=i)).strftime("%a %H:00")
+
+    def day_label(day):
+        if forecast_start is None:
+            return f"Day {day + 1}"
+        return (forecast_start + timedelta(days=day)).strftime("%a %d %b")
+
+    avg_forecast = sum(values) / len(values)
+    lines = [
+        f"{len(values)}-hour AQI forecast - Average: {avg_forecast:.1f}, "
+        f"Range: {min(values):.1f} to {max(values):.1f}",
+        "Daily profile (mean/peak):"
+    ]
+
+    day_parts = []
+    for day, start in enumerate(range(0, len(values), 24)):
+        chunk = values[start:start + 24]
+        day_parts.append(f"{day_label(day)} {sum(chunk) / len(chunk):.0f}/{max(chunk):.0f}")
+    lines.append("; ".join(day_parts))
+
+    worst = sorted(range(len(values)), key=lambda i: values[i], reverse=True)[:worst_hours]
+    lines.append("Worst hours: " + ", ".join(f"{hour_label(i)} ({values[i]:.0f})" for i in sorted(worst)))
+
+    return "\n".join(lines)
+
+def select_chat_history(chat_history, max_tokens=MAX_HISTORY_TOKENS):
+    """
+    Pick the most recent chat turns that fit into the token budget
+
+    Args:
+        chat_history: List of {"role", "content"} messages, oldest first
+        max_tokens: Token budget for the history window
+
+    Returns:
+        list: Messages in chronological order, newest turns kept first
+    """
+    selected = []
+    used = 0
+    for message in reversed(chat_history or []):
+        if message.get("role") not in ("user", "assistant") or not message.get("content"):
+            continue
+        cost = estimate_tokens(message["content"])
+        if used + cost > max_tokens:
+            break
+        selected.append({"role": message["role"], "content": message["content"]})
+        used += cost
+    selected.reverse()
+    return selected
+
+def build_advisor_messages(forecasted_aqi=None, user_health_issues=None, current_aqi=None,
+                           city=None, chat_history=None, forecast_start=None,
+                           max_prompt_tokens=MAX_PROMPT_TOKENS):
+    """
+    Build the message list sent to the advisor model
+
+    The forecast is reduced to a daily profile and the chat history to a
+    rolling window, so the total prompt never exceeds max_prompt_tokens.
+
+    Returns:
+        list: Chat completion messages (system, history..., user)
     """
-    
     system_prompt = (
         "You are an expert air quality health advisor that provides practical, evidence-based advice "
         "based on Air Quality Index (AQI) levels. Use guidelines from WHO, CDC, EPA, and CPCB and other relevant sites giving proper sources. "
@@ -43,63 +156,96 @@ def get_aqi_advice(forecasted_aqi = None, user_health_issues=None, current_aqi=N
         user_prompt += f"Current AQI: {current_aqi:.1f}\n"
     
     # Add forecast data
-    # if forecasted_aqi:
-    #     avg_forecast = sum(forecasted_aqi) / len(forecasted_aqi)
-    #     max_forecast = max(forecasted_aqi)
-    #     min_forecast = min(forecasted_aqi)
-    #     user_prompt += f"7-day AQI forecast - Average: {avg_forecast:.1f}, Range: {min_forecast:.1f} to {max_forecast:.1f}\n"
-    if forecasted_aqi and len(forecasted_aqi) > 0:
-        try:
-            # Filter valid numeric values
-            valid_forecasts = [float(aqi) for aqi in forecasted_aqi 
-                             if aqi is not None and isinstance(aqi, (int, float, str)) 
-                             and str(aqi).replace('.', '').replace('-', '').isdigit()]
-            
-            if valid_forecasts:
-                avg_forecast = sum(valid_forecasts) / len(valid_forecasts)
-                max_forecast = max(valid_forecasts)
-                min_forecast = min(valid_forecasts)
-                user_prompt += f"7-day AQI forecast - Average: {avg_forecast:.1f}, Range: {min_forecast:.1f} to {max_forecast:.1f}\n"
-        except (ValueError, TypeError):
-            # Skip forecast data if there are validation issues
-            pass
+    forecast_summary = summarize_forecast(forecasted_aqi, forecast_start)
+    if forecast_summary:
+        user_prompt += forecast_summary + "\n"
     
     # Add user's question or health concerns
     if user_health_issues:
+        question = truncate_to_tokens(user_health_issues, MAX_QUESTION_TOKENS)
         # Check if this is a general question or specific health concern
-        health_keywords = ['asthma', 'copd', 'heart', 'lung', 'breathing', 'respiratory', 'allergy', 'pregnant', 'elderly', 'child']
-        is_health_concern = any(keyword in user_health_issues.lower() for keyword in health_keywords)
+        is_health_concern = bool(detect_conditions(question))
         
         if is_health_concern:
-            user_prompt += f"User health concern/condition: {user_health_issues}\n"
+            user_prompt += f"User health concern/condition: {question}\n"
             user_prompt += "Please provide specific advice for someone with these health considerations."
         else:
-            user_prompt += f"User question: {user_health_issues}\n"
+            user_prompt += f"User question: {question}\n"
             user_prompt += "Please answer their question in the context of the air quality data provided."
     else:
         user_prompt += "Please provide general health recommendations based on these air quality conditions."
     
     # Handle case where no data is provided
-    if not any([current_aqi, forecasted_aqi, city]):
+    if current_aqi is None and not forecast_summary and not city:
         user_prompt += "\nNote: No specific air quality data provided. Please give general air quality health advice."
 
+    # Whatever is left of the budget goes to recent conversation turns
+    fixed_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+    history_budget = min(MAX_HISTORY_TOKENS, max(0, max_prompt_tokens - fixed_tokens))
+    history = select_chat_history(chat_history, history_budget)
 
-    try:
-        response = client.chat.completions.create(
-            model="openai/gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.6,
-            max_tokens=500
+    return (
+        [{"role": "system", "content": system_prompt}]
+        + history
+        + [{"role": "user", "content": truncate_to_tokens(user_prompt, max(1, max_prompt_tokens - estimate_tokens(system_prompt)))}]
+    )
+
+def get_aqi_advice(forecasted_aqi = None, user_health_issues=None, current_aqi=None, city=None,
+                   chat_history=None, forecast_start=None, dominant_pollutant=None):
+    """
+    Get AQI-based health advice
+
+    Common question classes are answered by the local rule engine in
+    advisor_rules.py; open-ended questions go to the OpenAI API.
+    
+    Args:
+        forecasted_aqi: List of forecasted AQI values
+        user_health_issues: User's health concerns or questions (optional)
+        current_aqi: Current AQI value (optional)
+        city: City name (optional)
+        chat_history: Previous chat messages, oldest first, excluding the
+                      current question (optional)
+        forecast_start: Timestamp of the first forecast hour (optional)
+        dominant_pollutant: Pollutant with the highest sub-index (optional)
+    
+    Returns:
+        str: Health advice and recommendations
+    """
+    with telemetry.span("advisor.local"):
+        local_answer = answer_locally(
+            user_health_issues,
+            current_aqi=current_aqi,
+            forecasted_aqi=clean_forecast_values(forecasted_aqi),
+            dominant_pollutant=dominant_pollutant
         )
+        telemetry.set_attribute("answered", local_answer is not None)
+    if local_answer is not None:
+        return local_answer
+
+    messages = build_advisor_messages(
+        forecasted_aqi=forecasted_aqi,
+        user_health_issues=user_health_issues,
+        current_aqi=current_aqi,
+        city=city,
+        chat_history=chat_history,
+        forecast_start=forecast_start
+    )
+
+    try:
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        with telemetry.span("advisor.llm", prompt_tokens=prompt_tokens, messages=len(messages)):
+            response = client.chat.completions.create(
+                model="openai/gpt-4o-mini",
+                messages=messages,
+                temperature=0.6,
+                max_tokens=500
+            )
         
         return response.choices[0].message.content.strip()
     
     except Exception as e:
         # Fallback response if API fails
-        fallback_advice = generate_fallback_advice(current_aqi, forecasted_aqi)
+        fallback_advice = generate_fallback_advice(current_aqi, clean_forecast_values(forecasted_aqi))
         return f"I'm having trouble connecting to the AI service right now. Here's some basic advice:\n\n{fallback_advice}"
 
 def generate_fallback_advice(current_aqi=None, forecasted_aqi=None):
@@ -112,53 +258,4 @@ def generate_fallback_advice(current_aqi=None, forecasted_aqi=None):
     if current_aqi is None:
         return "Please ensure you have valid AQI data to get personalized advice."
     
-    if current_aqi <= 50:
-        return (
-            "🟢 **Good Air Quality (0-50)**\n"
-            "• Air quality is satisfactory\n"
-            "• Outdoor activities are safe for everyone\n"
-            "• Great time for exercise and outdoor recreation"
-        )
-    elif current_aqi <= 100:
-        return (
-            "🟡 **Moderate Air Quality (51-100)**\n"
-            "• Air quality is acceptable for most people\n"
-            "• Sensitive individuals may experience minor issues\n"
-            "• Consider reducing prolonged outdoor exertion if sensitive"
-        )
-    elif current_aqi <= 150:
-        return (
-            "🟠 **Unhealthy for Sensitive Groups (101-150)**\n"
-            "• People with respiratory/heart conditions should limit outdoor activities\n"
-            "• Consider wearing masks when outdoors\n"
-            "• Keep windows closed and use air purifiers indoors"
-        )
-    elif current_aqi <= 200:
-        return (
-            "🔴 **Unhealthy Air Quality (151-200)**\n"
-            "• Everyone should limit outdoor activities\n"
-            "• Wear N95 masks when going outside\n"
-            "• Stay indoors with air purification when possible\n"
-            "• Avoid outdoor exercise"
-        )
-    else:
-        return (
-            "🟣 **Very Unhealthy Air Quality (200+)**\n"
-            "• Avoid outdoor activities entirely\n"
-            "• Stay indoors with sealed windows\n"
-            "• Use air purifiers and wear masks even indoors if needed\n"
-            "• Seek medical attention if experiencing breathing difficulties"
-        )
-
-def get_aqi_category(aqi_value):
-    """Get AQI category and color for display"""
-    if aqi_value <= 50:
-        return "Good", "green"
-    elif aqi_value <= 100:
-        return "Moderate", "yellow"
-    elif aqi_value <= 150:
-        return "Unhealthy for Sensitive Groups", "orange"
-    elif aqi_value <= 200:
-        return "Unhealthy", "red"
-    else:
-        return "Very Unhealthy", "purple"
\ No newline at end of file
+    return format_band_advice(current_aqi)
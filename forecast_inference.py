@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+from functools import lru_cache
+
+import joblib
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+try:
+    from ai_edge_litert.interpreter import Interpreter
+except ImportError:  # optional, tf.lite.Interpreter is deprecated but still works
+    Interpreter = tf.lite.Interpreter
+
+from forecast_lstm import FEATURE_COLS, INPUT_WINDOW, KERAS_MODEL_FILE, SCALERS_FILE
+
+TFLITE_FILE_TEMPLATE = "model_{quantization}.tflite"
+SAVED_MODEL_DIR = "saved_model"
+
+QUANTIZATION_MODES = ['none', 'int8', 'float16']
+
+# Loaded forecasters kept by forecast_from_artifacts (artifact dirs x quantization modes)
+FORECASTER_CACHE_SIZE = 8
+
+# =====================================================
+# ARTIFACTS
+# =====================================================
+
+def load_scalers(artifact_dir):
+    """Return (scaler_x, scaler_y) saved next to a model"""
+    scalers = joblib.load(os.path.join(artifact_dir, SCALERS_FILE))
+    return scalers['x'], scalers['y']
+
+def load_keras_model(artifact_dir):
+    return keras.models.load_model(os.path.join(artifact_dir, KERAS_MODEL_FILE))
+
+# =====================================================
+# EXPORT
+# =====================================================
+
+def trace_inference_function(model, input_window=INPUT_WINDOW, num_features=len(FEATURE_COLS)):
+    """
+    Trace the model into a frozen concrete function for a single
+    (1, window, features) input. The weights are passed to stateless_call
+    as constants, which the TFLite converter needs for the LSTM's while
+    loop (it cannot read variables inside the loop body).
+    """
+    trainable = [tf.constant(variable.numpy()) for variable in model.trainable_variables]
+    non_trainable = [tf.constant(variable.numpy()) for variable in model.non_trainable_variables]
+    run = tf.function(lambda x: model.stateless_call(trainable, non_trainable, x, training=False)[0])
+    return run.get_concrete_function(tf.TensorSpec([1, input_window, num_features], tf.float32))
+
+def export_tflite(model, artifact_dir, quantization='none'):
+    """
+    Convert a trained forecast model to a TFLite flatbuffer
+
+    Args:
+        model: Trained Keras model
+        artifact_dir: Directory to write model_<quantization>.tflite into
+        quantization: 'none', 'int8' (dynamic-range: int8 weights, float
+                      activations) or 'float16' (float16 weights)
+
+    Returns:
+        str: Path of the written model
+    """
+    # Full-integer quantization is not offered: calibrating activations
+    # through the LSTM's while loop crashes the TFLite calibrator.
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATION_MODES}")
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([trace_inference_function(model)])
+    if quantization != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+
+    tflite_model = converter.convert()
+    os.makedirs(artifact_dir, exist_ok=True)
+    path = os.path.join(artifact_dir, TFLITE_FILE_TEMPLATE.format(quantization=quantization))
+    with open(path, "wb") as f:
+        f.write(tflite_model)
+    return path
+
+def export_saved_model(model, artifact_dir):
+    """Save the traced concrete function as a SavedModel (no Keras needed to serve it)"""
+    module = tf.Module()
+    module.model = model  # track the model's variables
+    module.predict = tf.function(lambda x: model(x, training=False),
+                                 input_signature=[tf.TensorSpec([None, INPUT_WINDOW, len(FEATURE_COLS)], tf.float32)])
+    path = os.path.join(artifact_dir, SAVED_MODEL_DIR)
+    tf.saved_model.save(module, path)
+    return path
+
+# =====================================================
+# INFERENCE
+# =====================================================
+
+class TFLiteForecaster:
+    """Run a TFLite forecast model on single input windows (safe to share between threads)"""
+
+    def __init__(self, model_path, num_threads=None):
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        # The interpreter's input and output tensors are shared state
+        self.lock = threading.Lock()
+
+    def predict(self, window):
+        """Predict the scaled horizon for one (window, features) input"""
+        batch = np.asarray(window, dtype=np.float32).reshape(1, *np.shape(window)[-2:])
+        with self.lock:
+            self.interpreter.set_tensor(self.input_index, batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_index)[0].copy()
+
+class SavedModelForecaster:
+    """Run an exported SavedModel concrete function on input windows"""
+
+    def __init__(self, model_path):
+        self.module = tf.saved_model.load(model_path)
+
+    def predict(self, window):
+        batch = np.asarray(window, dtype=np.float32).reshape(1, *np.shape(window)[-2:])
+        return self.module.predict(tf.constant(batch)).numpy()[0]
+
+class KerasForecaster:
+    """Run the original Keras model on input windows (reference path)"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, window):
+        batch = np.asarray(window, dtype=np.float32).reshape(1, *np.shape(window)[-2:])
+        return self.model.predict(batch, verbose=0)[0]
+
+def load_forecaster(artifact_dir, quantization='none'):
+    """
+    Load the fastest available forecaster for an artifact directory: a
+    TFLite model if one was exported, else the SavedModel, else Keras
+
+    Returns:
+        tuple: (forecaster with .predict(window), load time in seconds)
+    """
+    start = time.perf_counter()
+    tflite_path = os.path.join(artifact_dir, TFLITE_FILE_TEMPLATE.format(quantization=quantization))
+    saved_model_path = os.path.join(artifact_dir, SAVED_MODEL_DIR)
+
+    if os.path.exists(tflite_path):
+        forecaster = TFLiteForecaster(tflite_path)
+    elif os.path.exists(saved_model_path):
+        forecaster = SavedModelForecaster(saved_model_path)
+    else:
+        forecaster = KerasForecaster(load_keras_model(artifact_dir))
+    return forecaster, time.perf_counter() - start
+
+def artifacts_mtime(artifact_dir, quantization='none'):
+    """Latest modification time of the model and scaler files in an artifact directory"""
+    names = [SCALERS_FILE, TFLITE_FILE_TEMPLATE.format(quantization=quantization), SAVED_MODEL_DIR, KERAS_MODEL_FILE]
+    paths = [os.path.join(artifact_dir, name) for name in names]
+    return max((os.path.getmtime(path) for path in paths if os.path.exists(path)), default=None)
+
+@lru_cache(maxsize=FORECASTER_CACHE_SIZE)
+def load_cached_forecaster(artifact_dir, quantization, mtime):
+    """
+    (scaler_x, scaler_y, forecaster) for an artifact directory, loaded once
+    per mtime so that re-exported artifacts are picked up
+    """
+    scaler_x, scaler_y = load_scalers(artifact_dir)
+    forecaster, _ = load_forecaster(artifact_dir, quantization)
+    return scaler_x, scaler_y, forecaster
+
+def forecast_from_artifacts(artifact_dir, recent_features, quantization='none'):
+    """
+    Forecast the next horizon in AQI units from the most recent raw feature rows.
+    The model and scalers are loaded on the first call and reused until the
+    artifacts change on disk.
+
+    Args:
+        artifact_dir: Directory written by save_model_artifacts/export_*
+        recent_features: Array of the last INPUT_WINDOW rows of FEATURE_COLS
+
+    Returns:
+        np.ndarray: Forecasted AQI per hour
+    """
+    artifact_dir = os.path.abspath(artifact_dir)
+    scaler_x, scaler_y, forecaster = load_cached_forecaster(
+        artifact_dir, quantization, artifacts_mtime(artifact_dir, quantization))
+    window = scaler_x.transform(np.asarray(recent_features)[-INPUT_WINDOW:])
+    return scaler_y.inverse_transform(forecaster.predict(window).reshape(1, -1))[0]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a trained forecast model for fast CPU inference")
+    parser.add_argument("artifact_dir", help="Directory written by forecast_future_LSTM(artifact_dir=...)")
+    parser.add_argument("--quantization", choices=QUANTIZATION_MODES, default='none')
+    parser.add_argument("--saved-model", action="store_true", help="Also export a traced SavedModel")
+    args = parser.parse_args()
+
+    model = load_keras_model(args.artifact_dir)
+    print(f"Wrote {export_tflite(model, args.artifact_dir, args.quantization)}")
+    if args.saved_model:
+        print(f"Wrote {export_saved_model(model, args.artifact_dir)}")
@@ -6,9 +6,366 @@ import matplotlib.pyplot as plt
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 import seaborn as sns
 from datetime import datetime
+import os
+import time
+
+import joblib
+
+from forecast_store import forecast_artifact_path, write_forecast
+import telemetry
+
+# Features
+FEATURE_COLS = ['components.co', 'components.no', 'components.no2',
+                'components.o3', 'components.so2', 'components.pm2_5',
+                'components.pm10', 'components.nh3']
+# Target variable
+TARGET_COL = 'Overall_AQI'
+
+INPUT_WINDOW = 240 # 240 time steps (10 days with 24 hours)
+FORECAST_HORIZON = 168 # 168 time steps (7 days with 24 hours)
+
+# Training defaults
+MAX_EPOCHS = 20
+BATCH_SIZE = 32
+VALIDATION_FRACTION = 0.1 # last 10% of the training sequences, in time order
+
+# Global multi-city model: cap on training windows across all cities, so
+# epoch time stops growing with the number of cities
+MAX_GLOBAL_SEQUENCES = 20000
+CITY_EMBEDDING_DIM = 4
+
+# Hourly regularization: gaps up to this many hours are interpolated,
+# longer ones are masked and no training window may span them
+MAX_INTERPOLATE_HOURS = 3
+
+# Files inside a model artifact directory (see forecast_inference.py)
+KERAS_MODEL_FILE = "model.keras"
+SCALERS_FILE = "scalers.joblib"
+
+# =====================================================
+# HOURLY REGULARIZATION
+# =====================================================
+
+def regularize_hourly(data, columns=None, max_gap_hours=MAX_INTERPOLATE_HOURS):
+    """
+    Put a processed history on a strict hourly grid
+
+    Duplicate hours keep their last reading, missing hours are inserted,
+    gaps of up to max_gap_hours are linearly interpolated and longer gaps
+    are left as NaN and marked invalid.
+
+    Args:
+        data: DataFrame with a 'dt' column (output of process_aqi_data)
+        columns: Columns to regularize (default FEATURE_COLS + TARGET_COL)
+        max_gap_hours: Longest gap that is filled by interpolation
+
+    Returns:
+        tuple: (DataFrame with one row per hour and a 'dt' column,
+                bool array marking rows that are observed or interpolated)
+    """
+    columns = columns or FEATURE_COLS + [TARGET_COL]
+    with telemetry.span("lstm.regularize", rows=len(data)) as attrs:
+        hours = pd.to_datetime(data['dt']).dt.floor('h')
+        frame = data[columns].set_axis(pd.DatetimeIndex(hours, name='dt'))
+        frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+        grid = pd.date_range(frame.index[0], frame.index[-1], freq='h', name='dt')
+        frame = frame.reindex(grid)
+
+        observed = frame.notna().all(axis=1).to_numpy()
+        # Every missing hour shares the run id of the observed hour before it,
+        # so counting ids over the missing hours gives each gap's length
+        run_id = np.cumsum(observed)
+        gap_length = np.bincount(run_id[~observed], minlength=run_id[-1] + 1)[run_id]
+        valid = observed | (gap_length <= max_gap_hours)
+
+        frame = frame.interpolate(method='linear', limit_area='inside')
+        valid &= frame.notna().all(axis=1).to_numpy()  # leading partial rows cannot be interpolated
+        frame.loc[~valid] = np.nan
+
+        attrs.update(duplicates=int(hours.duplicated().sum()), missing=int((~observed).sum()),
+                     interpolated=int((valid & ~observed).sum()), masked=int((~valid).sum()))
+    return frame.reset_index(), valid
+
+def valid_window_mask(valid, input_window, forecast_horizon):
+    """
+    Which sliding windows (input + target rows) contain only valid rows,
+    from one cumulative count of invalid rows instead of per-window checks
+    """
+    span = input_window + forecast_horizon
+    invalid_before = np.concatenate([[0], np.cumsum(~np.asarray(valid, dtype=bool))])
+    n_windows = len(valid) - span + 1
+    if n_windows <= 0:
+        return np.zeros(0, dtype=bool)
+    return invalid_before[span:span + n_windows] == invalid_before[:n_windows]
+
+def latest_input_end(valid, input_window):
+    """
+    End row (exclusive) of the most recent input window with only valid
+    rows, or None if there is none
+    """
+    ok = valid_window_mask(valid, input_window, 0)
+    ends = np.flatnonzero(ok)
+    return int(ends[-1]) + input_window if len(ends) else None
+
+def sliding_window_views(x_scaled, y_scaled, input_window, forecast_horizon):
+    """
+    Input and target windows as zero-copy views: window i covers rows
+    [i, i + input_window) and its target the following forecast_horizon rows
+
+    Returns:
+        tuple: (X of shape (n, input_window, features), y of shape (n, forecast_horizon))
+    """
+    n_windows = len(x_scaled) - input_window - forecast_horizon + 1
+    if n_windows <= 0:
+        return (np.empty((0, input_window, x_scaled.shape[1]), dtype=x_scaled.dtype),
+                np.empty((0, forecast_horizon), dtype=y_scaled.dtype))
+    X = np.lib.stride_tricks.sliding_window_view(x_scaled, input_window, axis=0).transpose(0, 2, 1)
+    y = np.lib.stride_tricks.sliding_window_view(y_scaled.reshape(-1), forecast_horizon)
+    return X[:n_windows], y[input_window:input_window + n_windows]
+
+# Sliding Window to create sequences to train the model. The sequences are
+# read-only views into X and y, so no window is copied until it is batched.
+# With a validity array from regularize_hourly, windows that span a masked
+# gap are dropped (the remaining windows are then gathered into copies).
+def create_sequences(X , y , input_window, forecast_horizon, valid=None):
+    X_sequences, y_sequences = sliding_window_views(np.asarray(X), np.asarray(y), input_window, forecast_horizon)
+    if valid is None:
+        return X_sequences, y_sequences
+    ok = valid_window_mask(valid, input_window, forecast_horizon)
+    if ok.all():
+        return X_sequences, y_sequences
+    return X_sequences[ok], y_sequences[ok]
+
+class BudgetedEarlyStopping(keras.callbacks.Callback):
+    """
+    Stop training when the wall-clock budget would be exceeded by another
+    epoch, or when val_loss has not improved for `patience` epochs, and
+    restore the weights of the best epoch at the end. The budget is also
+    checked after every batch, so a single epoch longer than the budget
+    (e.g. the first one, before min_epochs is reached) is cut off mid-epoch.
+
+    Validation runs here rather than in fit(), which would still run a full
+    validation pass after the budget has expired: an epoch cut off by the
+    budget, or finishing after it, is not validated and does not count as a
+    candidate best epoch. The first validation pass also builds Keras's
+    evaluation function, which the budget cannot foresee.
+    """
+
+    def __init__(self, time_budget=None, patience=None, min_epochs=1, restore_best_weights=True,
+                 validation_data=None, batch_size=None):
+        super().__init__()
+        self.time_budget = time_budget
+        self.patience = patience
+        self.min_epochs = min_epochs
+        self.restore_best_weights = restore_best_weights
+        self.validation_data = validation_data
+        self.batch_size = batch_size
+
+    def on_train_begin(self, logs=None):
+        self.train_start = time.perf_counter()
+        self.epoch_start = None
+        self.epoch_times = []
+        self.best_loss = np.inf
+        self.best_epoch = None
+        self.best_weights = None
+        self.wait = 0
+        self.stopped_reason = "max_epochs"
+        self.stopped_mid_epoch = False
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        if self.time_budget is not None and time.perf_counter() - self.train_start > self.time_budget:
+            self.stopped_reason = "time_budget"
+            self.stopped_mid_epoch = True
+            self.model.stop_training = True
+
+    def on_epoch_end(self, epoch, logs=None):
+        if not self.stopped_mid_epoch and self.time_budget is not None \
+                and time.perf_counter() - self.train_start > self.time_budget:
+            self.stopped_reason = "time_budget"
+            self.model.stop_training = True
+        if self.model.stop_training:
+            # The budget is spent: skip validation and keep the best validated epoch
+            self.epoch_times.append(time.perf_counter() - self.epoch_start)
+            return
+
+        logs = logs if logs is not None else {}
+        if self.validation_data is not None:
+            X_val, y_val = self.validation_data
+            logs['val_loss'] = self.model.evaluate(X_val, y_val, batch_size=self.batch_size,
+                                                   verbose=0, return_dict=True)['loss']
+        self.epoch_times.append(time.perf_counter() - self.epoch_start)
+        current = logs.get('val_loss', logs.get('loss'))
+
+        if current is not None and current < self.best_loss:
+            self.best_loss = current
+            self.best_epoch = epoch
+            self.best_weights = self.model.get_weights()
+            self.wait = 0
+        else:
+            self.wait += 1
+
+        if epoch + 1 < self.min_epochs:
+            return
+
+        if self.patience is not None and self.wait >= self.patience:
+            self.stopped_reason = "early_stopping"
+            self.model.stop_training = True
+            return
+
+        if self.time_budget is not None:
+            elapsed = time.perf_counter() - self.train_start
+            # Assume the next epoch takes as long as the slowest so far
+            if elapsed + max(self.epoch_times) > self.time_budget:
+                self.stopped_reason = "time_budget"
+                self.model.stop_training = True
+
+    def on_train_end(self, logs=None):
+        if self.restore_best_weights and self.best_weights is not None:
+            self.model.set_weights(self.best_weights)
+
+def _split_inputs(X, n):
+    """Split model inputs (an array or a list of arrays) at sample n"""
+    if isinstance(X, (list, tuple)):
+        return [x[:n] for x in X], [x[n:] for x in X]
+    return X[:n], X[n:]
+
+def train_model(model, X_train, y_train, max_epochs=MAX_EPOCHS, time_budget=None, patience=None,
+                validation_fraction=VALIDATION_FRACTION, batch_size=BATCH_SIZE, verbose=1):
+    """
+    Train a model with an optional wall-clock budget and early stopping
+
+    Args:
+        model: Compiled Keras model
+        X_train, y_train: Training sequences (X_train may be a list of
+                          inputs for multi-input models)
+        max_epochs: Upper bound on epochs
+        time_budget: Wall-clock budget in seconds for the whole fit (optional)
+        patience: Epochs without val_loss improvement before stopping (optional)
+        validation_fraction: Share of the most recent sequences held out for
+                             validation when early stopping or a budget is used
+        batch_size: Training batch size
+
+    Returns:
+        dict: Training report (epochs run, best epoch, time per epoch,
+              samples per second, reason training stopped and whether the
+              budget cut the last epoch off mid-epoch)
+    """
+    use_validation = (time_budget is not None or patience is not None) and validation_fraction > 0
+    n_samples = len(y_train)
+    # Hold out the most recent sequences, as fit(validation_split=...) would
+    n_train = int(n_samples * (1 - validation_fraction)) if use_validation else n_samples
+    validation_data = None
+    if use_validation:
+        X_train, X_val = _split_inputs(X_train, n_train)
+        y_train, y_val = y_train[:n_train], y_train[n_train:]
+        validation_data = (X_val, y_val)
+    callback = BudgetedEarlyStopping(time_budget=time_budget, patience=patience,
+                                     restore_best_weights=use_validation,
+                                     validation_data=validation_data, batch_size=batch_size)
+
+    fit_start = time.perf_counter()
+    model.fit(
+        X_train, y_train,
+        epochs=max_epochs,
+        batch_size=batch_size,
+        callbacks=[callback],
+        verbose=verbose
+    )
+    total_time = time.perf_counter() - fit_start
+
+    epochs_run = len(callback.epoch_times)
+    # A partial last epoch would understate the time per epoch
+    full_epoch_times = callback.epoch_times[:-1] if callback.stopped_mid_epoch else callback.epoch_times
+    full_epoch_times = full_epoch_times or callback.epoch_times
+    mean_epoch = sum(full_epoch_times) / len(full_epoch_times) if full_epoch_times else 0.0
+    return {
+        'epochs_run': epochs_run,
+        'best_epoch': callback.best_epoch + 1 if callback.best_epoch is not None else None,
+        'best_loss': float(callback.best_loss),
+        'stopped_reason': callback.stopped_reason,
+        'stopped_mid_epoch': callback.stopped_mid_epoch,
+        'total_time_s': total_time,
+        'epoch_times_s': callback.epoch_times,
+        'time_per_epoch_s': mean_epoch,
+        'samples_per_s': n_train / mean_epoch if mean_epoch else 0.0
+    }
+
+def save_model_artifacts(model, scaler_x, scaler_y, artifact_dir):
+    """Save a trained Keras model and its feature/target scalers"""
+    os.makedirs(artifact_dir, exist_ok=True)
+    model.save(os.path.join(artifact_dir, KERAS_MODEL_FILE))
+    joblib.dump({'x': scaler_x, 'y': scaler_y}, os.path.join(artifact_dir, SCALERS_FILE))
+
+def build_model(input_window=INPUT_WINDOW, num_features=len(FEATURE_COLS), forecast_horizon=FORECAST_HORIZON):
+    """Build and compile the forecasting LSTM"""
+    model = keras.Sequential()
+
+    # Input Layer
+    model.add(keras.Input(shape=(input_window, num_features)))
+
+    # First layer - LSTM Layer
+    model.add(keras.layers.LSTM(64, return_sequences = True))
+
+    # Second layer - LSTM Layer
+    model.add(keras.layers.LSTM(64, return_sequences=False))
+
+    # Third Layer (Dense Layer)
+    model.add(keras.layers.Dense(128, activation='relu'))
+
+    # Fourth Layer
+    model.add(keras.layers.Dropout(0.4))
+
+    # Fifth Layer - Output Layer
+    model.add(keras.layers.Dense(forecast_horizon))
 
-def forecast_future_LSTM():
+    # Compile the model
+    model.compile(optimizer='adam',
+                loss='mae',
+                metrics=[keras.metrics.RootMeanSquaredError()])
+    return model
+
+def forecast_future_LSTM(max_epochs=MAX_EPOCHS, time_budget=None, patience=None, artifact_dir=None,
+                        return_report=False):
+    """
+    Train the LSTM on air_pollution_data_AQI.csv and write the 168-hour
+    forecast to forecast_LSTM_AQI.parquet (forecast_LSTM_AQI.csv without pyarrow)
+
+    Args:
+        max_epochs: Upper bound on training epochs
+        time_budget: Wall-clock training budget in seconds (optional)
+        patience: Early-stopping patience on validation loss (optional)
+        artifact_dir: Save the trained model and scalers here for export
+                      with forecast_inference.py (optional)
+        return_report: Also return the train_model() report
+
+    Returns:
+        tuple: (rmse, mae), or (rmse, mae, training_report) with return_report
+    """
     data = pd.read_csv('air_pollution_data_AQI.csv')
+    forecast_df, rmse, mae, training_report = forecast_from_history(
+        data, max_epochs=max_epochs, time_budget=time_budget, patience=patience, artifact_dir=artifact_dir
+    )
+
+    path = forecast_artifact_path()
+    write_forecast(forecast_df, path)
+    print(f"Forecast saved to '{path}'")
+
+    if return_report:
+        return rmse, mae, training_report
+    return rmse, mae
+
+def forecast_from_history(data, max_epochs=MAX_EPOCHS, time_budget=None, patience=None, artifact_dir=None):
+    """
+    Train the LSTM on a processed history DataFrame and forecast the next
+    168 hours, without touching the shared CSV files
+
+    Returns:
+        tuple: (forecast_df, rmse, mae, training_report)
+    """
+    data = data.copy()
     # print(data.head())
     # print(data.describe())
     # print(data.info())
@@ -21,15 +378,12 @@ def forecast_future_LSTM():
     # plt.title('Correlation Heatmap')
     # plt.savefig('correlation_heatmap.png')
 
-    data['date'] = pd.to_datetime(data['dt'])
+    # One row per hour; windows must not span gaps longer than MAX_INTERPOLATE_HOURS
+    data, valid = regularize_hourly(data)
     # print(data.info())
 
-    # Features
-    feature_cols = ['components.co', 'components.no', 'components.no2',
-                    'components.o3', 'components.so2', 'components.pm2_5',
-                    'components.pm10', 'components.nh3']
-    # Target variable
-    target_col = 'Overall_AQI'
+    feature_cols = FEATURE_COLS
+    target_col = TARGET_COL
 
     # Usse MinMaxScaler to scale the features and target variable, result between 0-1
     scaler_x = MinMaxScaler()
@@ -39,18 +393,14 @@ def forecast_future_LSTM():
     x_scaled = scaler_x.fit_transform(data[feature_cols]) 
     y_scaled = scaler_y.fit_transform(data[[target_col]])
 
-    # Sliding Window to create sequences to train the model
-    def create_sequences(X , y , input_window, forecast_horizon):
-        Xs, ys = [], []
-        for i in range(len(X) - input_window - forecast_horizon + 1):
-            Xs.append(X[i:i + input_window])
-            ys.append(y[i + input_window:i + input_window + forecast_horizon].flatten())
-        return np.array(Xs), np.array(ys)
-
-    input_window = 240 # 96 time steps (4 days with 24 hours)
-    forecast_horizon = 168 # 168 time steps (7 days with 24 hours)
+    input_window = INPUT_WINDOW
+    forecast_horizon = FORECAST_HORIZON
 
-    X_sequences, y_sequences = create_sequences(x_scaled, y_scaled, input_window, forecast_horizon)
+    with telemetry.span("lstm.build_sequences", rows=len(data)):
+        X_sequences, y_sequences = create_sequences(x_scaled, y_scaled, input_window, forecast_horizon, valid)
+        telemetry.set_attribute("payload_bytes", X_sequences.nbytes + y_sequences.nbytes)
+    if len(X_sequences) == 0:
+        raise ValueError(f"Not enough gap-free history: need {input_window + forecast_horizon} consecutive hours")
 
     # print(X_sequences)
     # print(X_sequences.shape)
@@ -62,45 +412,31 @@ def forecast_future_LSTM():
     y_train, y_test = y_sequences[:split], y_sequences[split:]
 
     # Building model
-    model = keras.Sequential()
     num_features = len(feature_cols)
-
-    # Input Layer
-    model.add(keras.Input(shape=(input_window, num_features)))
-
-    # First layer - LSTM Layer
-    model.add(keras.layers.LSTM(64, return_sequences = True))
-
-    # Second layer - LSTM Layer
-    model.add(keras.layers.LSTM(64, return_sequences=False))
-
-    # Third Layer (Dense Layer)
-    model.add(keras.layers.Dense(128, activation='relu'))
-
-    # Fourth Layer
-    model.add(keras.layers.Dropout(0.4))
-
-    # Fifth Layer - Output Layer
-    model.add(keras.layers.Dense(168))
-
+    model = build_model(input_window, num_features, forecast_horizon)
     model.summary()
 
-    # Compile the model
-    model.compile(optimizer='adam',
-                loss='mae',
-                metrics=[keras.metrics.RootMeanSquaredError()])
-
     # train the model
-    history = model.fit(
-        X_train, y_train,
-        epochs = 20, 
-        batch_size = 32
-    )
-
-    loss, mae = model.evaluate(X_test, y_test)
-    print(f"Test Loss: {loss:.4f}, MAE: {mae:.4f}")
-
-    y_pred = model.predict(X_test)  # shape: (191, 168)
+    with telemetry.span("lstm.train", samples=len(X_train), max_epochs=max_epochs):
+        training_report = train_model(
+            model, X_train, y_train,
+            max_epochs=max_epochs,
+            time_budget=time_budget,
+            patience=patience
+        )
+        telemetry.set_attribute("epochs_run", training_report['epochs_run'])
+        telemetry.set_attribute("samples_per_s", round(training_report['samples_per_s'], 1))
+    if artifact_dir is not None:
+        save_model_artifacts(model, scaler_x, scaler_y, artifact_dir)
+
+    print(f"Trained {training_report['epochs_run']} epochs ({training_report['stopped_reason']}), "
+          f"{training_report['time_per_epoch_s']:.1f}s/epoch, {training_report['samples_per_s']:.0f} samples/s")
+
+    with telemetry.span("lstm.evaluate", samples=len(X_test)):
+        loss, mae = model.evaluate(X_test, y_test)
+        print(f"Test Loss: {loss:.4f}, MAE: {mae:.4f}")
+
+        y_pred = model.predict(X_test)  # shape: (191, 168)
 
     y_pred_original = scaler_y.inverse_transform(y_pred)
     y_test_original = scaler_y.inverse_transform(y_test)
@@ -122,12 +458,14 @@ def forecast_future_LSTM():
 
     print(f"Real RMSE: {rmse:.2f}, Real MAE: {mae:.2f}")
 
-    # storing data in forecast_LSTM_AQI.csv
-    last_timestamp = data['date'].iloc[-1]
-    forecast_timestamps = pd.date_range(start=last_timestamp + pd.Timedelta(hours=1), periods=168, freq='H')
+    # Forecast from the most recent gap-free input window, labelled from the hour after it
+    input_end = latest_input_end(valid, input_window)
+    last_timestamp = data['dt'].iloc[input_end - 1]
+    forecast_timestamps = pd.date_range(start=last_timestamp + pd.Timedelta(hours=1), periods=forecast_horizon, freq='h')
 
-    latest_input = X_test[-1].reshape(1, input_window, num_features)
-    latest_pred = model.predict(latest_input)
+    latest_input = x_scaled[input_end - input_window:input_end].reshape(1, input_window, num_features)
+    with telemetry.span("lstm.predict"):
+        latest_pred = model.predict(latest_input)
     latest_pred_original = scaler_y.inverse_transform(latest_pred)[0]  # shape: (168,)
 
     # Create a DataFrame with timestamp and predicted AQI
@@ -136,8 +474,153 @@ def forecast_future_LSTM():
         'predicted_AQI': latest_pred_original
     })
 
-    # Save to CSV
-    forecast_df.to_csv("forecast_LSTM_AQI.csv", index=False)
-    print("Forecast saved to 'forecast_LSTM_AQI.csv'")
+    return forecast_df, rmse, mae, training_report
+
+# =====================================================
+# GLOBAL MULTI-CITY MODEL
+# =====================================================
 
-    return rmse, mae
\ No newline at end of file
+def build_global_model(num_cities, input_window=INPUT_WINDOW, num_features=len(FEATURE_COLS),
+                       forecast_horizon=FORECAST_HORIZON, embedding_dim=CITY_EMBEDDING_DIM):
+    """Build the shared LSTM with a learned per-city embedding"""
+    window_input = keras.Input(shape=(input_window, num_features), name="window")
+    city_input = keras.Input(shape=(1,), dtype="int32", name="city")
+
+    x = keras.layers.LSTM(64, return_sequences=True)(window_input)
+    x = keras.layers.LSTM(64, return_sequences=False)(x)
+
+    # The location embedding lets the shared layers adapt to each city
+    city_embedding = keras.layers.Flatten()(keras.layers.Embedding(num_cities, embedding_dim)(city_input))
+    x = keras.layers.Concatenate()([x, city_embedding])
+
+    x = keras.layers.Dense(128, activation='relu')(x)
+    x = keras.layers.Dropout(0.4)(x)
+    output = keras.layers.Dense(forecast_horizon)(x)
+
+    model = keras.Model(inputs=[window_input, city_input], outputs=output)
+    model.compile(optimizer='adam',
+                loss='mae',
+                metrics=[keras.metrics.RootMeanSquaredError()])
+    return model
+
+def train_global_model(city_frames, max_epochs=MAX_EPOCHS, time_budget=None, patience=None,
+                       max_sequences=MAX_GLOBAL_SEQUENCES):
+    """
+    Fit one shared model across many cities' histories
+
+    Each city is normalized with its own scalers. Training windows are
+    subsampled evenly so the total stays under max_sequences, which keeps
+    epoch time flat once enough cities are included.
+
+    Args:
+        city_frames: Dict of city name -> processed history DataFrame
+                     (output of process_aqi_data)
+        max_epochs, time_budget, patience: See train_model()
+        max_sequences: Cap on training windows across all cities
+
+    Returns:
+        dict: {'model', 'cities', 'scalers', 'report'} to pass to forecast_cities()
+    """
+    with telemetry.span("lstm.global.build_sequences", cities=len(city_frames)):
+        scalers, city_windows = {}, []
+        for city, df in city_frames.items():
+            df, valid = regularize_hourly(df)
+            window_ids = np.flatnonzero(valid_window_mask(valid, INPUT_WINDOW, FORECAST_HORIZON))
+            if len(window_ids) == 0:
+                continue
+            scaler_x, scaler_y = MinMaxScaler(), MinMaxScaler()
+            x_scaled = scaler_x.fit_transform(df[FEATURE_COLS]).astype(np.float32)
+            y_scaled = scaler_y.fit_transform(df[[TARGET_COL]]).astype(np.float32)
+            scalers[city] = (scaler_x, scaler_y)
+            X, y = sliding_window_views(x_scaled, y_scaled, INPUT_WINDOW, FORECAST_HORIZON)
+            city_windows.append((X, y, window_ids))
+
+        cities = list(scalers)
+        if not cities:
+            raise ValueError(f"Each city needs at least {INPUT_WINDOW + FORECAST_HORIZON} consecutive hours of history")
+
+        total = sum(len(window_ids) for _, _, window_ids in city_windows)
+        stride = max(1, int(np.ceil(total / max_sequences)))
+
+        # Only the selected gap-free windows are copied into the training
+        # arrays. Each city's most recent windows are kept last so the
+        # validation split (taken from the end) holds out recent data from
+        # every city.
+        train_parts, val_parts = [], []
+        for city_id, (X, y, window_ids) in enumerate(city_windows):
+            idx = window_ids[::-1][::stride][::-1]
+            n_val = int(len(idx) * VALIDATION_FRACTION)
+            train_idx, val_idx = idx[:len(idx) - n_val], idx[len(idx) - n_val:]
+            train_parts.append((X[train_idx], np.full(len(train_idx), city_id, dtype=np.int32), y[train_idx]))
+            val_parts.append((X[val_idx], np.full(len(val_idx), city_id, dtype=np.int32), y[val_idx]))
+
+        parts = train_parts + val_parts
+        X_all = np.concatenate([part[0] for part in parts])
+        ids_all = np.concatenate([part[1] for part in parts])
+        y_all = np.concatenate([part[2] for part in parts])
+        telemetry.set_attribute("sequences", len(y_all))
+
+    model = build_global_model(len(cities))
+    with telemetry.span("lstm.global.train", samples=len(y_all), cities=len(cities)):
+        start = time.perf_counter()
+        report = train_model(
+            model, [X_all, ids_all], y_all,
+            max_epochs=max_epochs,
+            time_budget=time_budget,
+            patience=patience,
+            validation_fraction=VALIDATION_FRACTION if (time_budget is not None or patience is not None) else 0.0
+        )
+    report.update({
+        'cities': len(cities),
+        'sequences': len(y_all),
+        'window_stride': stride,
+        'train_time_per_city_s': (time.perf_counter() - start) / len(cities)
+    })
+    return {'model': model, 'cities': cities, 'scalers': scalers, 'report': report}
+
+def forecast_cities(global_model, city_frames):
+    """
+    Forecast every city in one batched forward pass
+
+    Args:
+        global_model: Result of train_global_model()
+        city_frames: Dict of city name -> processed history DataFrame; only
+                     cities the model was trained on are forecast
+
+    Returns:
+        tuple: (dict of city -> forecast DataFrame with timestamp and
+                predicted_AQI, cities forecast per second)
+    """
+    windows, city_ids, last_timestamps = [], [], []
+    for city in global_model['cities']:
+        if city not in city_frames:
+            continue
+        df, valid = regularize_hourly(city_frames[city])
+        input_end = latest_input_end(valid, INPUT_WINDOW)
+        if input_end is None:
+            continue
+        scaler_x, _ = global_model['scalers'][city]
+        latest = df[FEATURE_COLS].iloc[input_end - INPUT_WINDOW:input_end]
+        windows.append(scaler_x.transform(latest).astype(np.float32))
+        city_ids.append(global_model['cities'].index(city))
+        last_timestamps.append(df['dt'].iloc[input_end - 1])
+    cities = [global_model['cities'][city_id] for city_id in city_ids]
+    if not cities:
+        return {}, 0.0
+
+    with telemetry.span("lstm.global.predict", cities=len(cities)):
+        start = time.perf_counter()
+        predictions = global_model['model'].predict(
+            [np.stack(windows), np.array(city_ids, dtype=np.int32)],
+            batch_size=max(1, len(cities)), verbose=0
+        )
+        elapsed = time.perf_counter() - start
+
+    forecasts = {}
+    for city, prediction, last_timestamp in zip(cities, predictions, last_timestamps):
+        _, scaler_y = global_model['scalers'][city]
+        forecasts[city] = pd.DataFrame({
+            'timestamp': pd.date_range(start=last_timestamp + pd.Timedelta(hours=1), periods=FORECAST_HORIZON, freq='h'),
+            'predicted_AQI': scaler_y.inverse_transform(prediction.reshape(1, -1))[0]
+        })
+    return forecasts, len(cities) / elapsed if elapsed > 0 else float('inf')
@@ -0,0 +1,92 @@
+import os
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:  # optional, forecasts are then written as CSV
+    pyarrow = None
+
+# Forecast artifacts written by forecast_lstm.py, in order of preference
+FORECAST_BASENAME = "forecast_LSTM_AQI"
+FORECAST_FORMATS = ['.parquet', '.feather', '.csv']
+# Format new forecasts are written in: Parquet when pyarrow is installed
+FORECAST_WRITE_FORMAT = '.parquet' if pyarrow is not None else '.csv'
+# Per-grid-cell forecasts from the dashboard are written here
+FORECAST_DIR = os.getenv("AQI_FORECAST_DIR", "forecasts")
+
+def forecast_file_signature(path):
+    """
+    Return a cheap signature (mtime in ns, size) that changes whenever the
+    file is rewritten, or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def find_forecast_artifact(basename=FORECAST_BASENAME):
+    """Return the most recently written forecast artifact, or None"""
+    candidates = []
+    for ext in FORECAST_FORMATS:
+        path = basename + ext
+        signature = forecast_file_signature(path)
+        if signature is not None:
+            candidates.append((signature[0], path))
+    if not candidates:
+        return None
+    return max(candidates)[1]
+
+def forecast_artifact_path(basename=FORECAST_BASENAME):
+    """Path a new forecast artifact is written to"""
+    return basename + FORECAST_WRITE_FORMAT
+
+def cell_forecast_basename(label, directory=FORECAST_DIR):
+    """Basename (without extension) of a grid cell's forecast artifact, e.g. forecasts/forecast_LSTM_AQI_19.05N_72.85E"""
+    return os.path.join(directory, f"{FORECAST_BASENAME}_{label}")
+
+def list_cell_forecasts(directory=FORECAST_DIR):
+    """Return {cell label: newest artifact path} for every cell with a forecast, most recent first"""
+    prefix = f"{FORECAST_BASENAME}_"
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return {}
+    labels = {
+        os.path.splitext(name)[0][len(prefix):]
+        for name in names
+        if name.startswith(prefix) and os.path.splitext(name)[1] in FORECAST_FORMATS
+    }
+    artifacts = {label: find_forecast_artifact(cell_forecast_basename(label, directory)) for label in labels}
+    return dict(sorted(
+        ((label, path) for label, path in artifacts.items() if path is not None),
+        key=lambda item: forecast_file_signature(item[1]) or (0, 0),
+        reverse=True
+    ))
+
+def read_forecast(path):
+    """Read a forecast artifact (CSV, Parquet or Feather) into a DataFrame"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.parquet':
+        df = pd.read_parquet(path)
+    elif ext == '.feather':
+        df = pd.read_feather(path)
+    else:
+        df = pd.read_csv(path, parse_dates=['timestamp'])
+    return df
+
+def write_forecast(forecast_df, path):
+    """Write a forecast DataFrame, picking the format from the file extension"""
+    ext = os.path.splitext(path)[1].lower()
+    # Write to a temporary file first so readers never see a partial file
+    tmp_path = f"{path}.tmp"
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if ext == '.parquet':
+        forecast_df.to_parquet(tmp_path, index=False)
+    elif ext == '.feather':
+        forecast_df.reset_index(drop=True).to_feather(tmp_path)
+    else:
+        forecast_df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
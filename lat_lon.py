@@ -3,14 +3,19 @@ import os
 import requests
 from requests.exceptions import ConnectionError
 
+import telemetry
+
 load_dotenv(dotenv_path = '.env')
 
 api_key = os.getenv('API_KEY')
 
+# Base URL of the OpenWeatherMap API (overridable, e.g. to point at a local fixture server)
+OWM_BASE_URL = os.getenv('OWM_BASE_URL', 'http://api.openweathermap.org')
+
 # city = str(input("Enter the name of the city: "))
 
 def get_lat_lon(api_key, city):
-    url = "http://api.openweathermap.org/geo/1.0/direct?"
+    url = f"{OWM_BASE_URL}/geo/1.0/direct?"
     params = {
         'q': city,
         'limit': 1,
@@ -18,7 +23,9 @@ def get_lat_lon(api_key, city):
     }
 
     try:
-        response = requests.get(url, params=params)
+        with telemetry.span("geocode", city=city):
+            response = requests.get(url, params=params)
+            telemetry.set_attribute("payload_bytes", len(response.content))
         response.raise_for_status()  # Raise an HTTPError for bad responses (4xx and 5xx)
 
         data = response.json()
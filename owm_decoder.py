@@ -0,0 +1,111 @@
+"""
+Decode OpenWeatherMap air_pollution responses straight into typed columns.
+
+The history endpoint returns one small nested record per hour:
+
+    {"coord": {...}, "list": [{"main": {"aqi": 3},
+                               "components": {"co": 230.31, "no": 0.1, ...},
+                               "dt": 1700000000}, ...]}
+
+Instead of building a Python dict per record and flattening them with
+pd.json_normalize, the records in the raw response body are split onto
+separate lines and parsed by pyarrow's JSON reader against a fixed
+schema, giving int64 'dt', uint8 'main.aqi' and float64 component columns
+without any per-record Python objects. Bodies that do not fit that shape
+(nulls, a different record layout) fall back to json.loads.
+"""
+import io
+import json
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.json as pa_json
+
+COMPONENTS = ['co', 'no', 'no2', 'o3', 'so2', 'pm2_5', 'pm10', 'nh3']
+COMPONENT_COLS = [f'components.{name}' for name in COMPONENTS]
+# Decoded columns, named as pd.json_normalize names them
+COLUMNS = ['dt', 'main.aqi'] + COMPONENT_COLS
+
+RECORD_SCHEMA = pa.schema([
+    ('dt', pa.int64()),
+    ('main', pa.struct([('aqi', pa.uint8())])),
+    ('components', pa.struct([(name, pa.float64()) for name in COMPONENTS]))
+])
+# Large enough that a multi-year history is parsed as a few blocks
+READ_BLOCK_BYTES = 4 * 2**20
+
+# Separators between records, as sent by the API and as written by json.dumps
+_RECORD_SEPARATORS = [b'},{"main"', b'}, {"main"']
+
+def _records_as_lines(body):
+    """The 'list' array of a response body as newline-delimited records, or None"""
+    start = body.find(b'"list"')
+    if start < 0:
+        return None
+    start = body.find(b'[', start) + 1
+    end = body.rfind(b']')
+    if start <= 0 or end < start:
+        return None
+    records = body[start:end]
+    for separator in _RECORD_SEPARATORS:
+        records = records.replace(separator, b'}\n{"main"')
+    return records
+
+def _read_body(body):
+    """Columns parsed from a raw body with pyarrow, or None if it is not the expected layout"""
+    records = _records_as_lines(body)
+    if records is None:
+        return None
+    if not records.strip():
+        return {column: np.empty(0) for column in COLUMNS}
+    try:
+        table = pa_json.read_json(
+            io.BytesIO(records),
+            read_options=pa_json.ReadOptions(block_size=READ_BLOCK_BYTES),
+            parse_options=pa_json.ParseOptions(explicit_schema=RECORD_SCHEMA, unexpected_field_behavior='ignore')
+        ).flatten()
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+    # Every record must have been parsed, with no missing values
+    if table.num_rows != body.count(b'"main"') or any(table.column(column).null_count for column in COLUMNS):
+        return None
+    return {column: table.column(column).to_numpy() for column in COLUMNS}
+
+def _read_records(records):
+    """Columns read from already parsed records"""
+    n = len(records)
+    aqi = np.array([(record.get('main') or {}).get('aqi') for record in records], dtype=np.float64)
+    columns = {
+        'dt': np.fromiter((record['dt'] for record in records), np.int64, count=n),
+        # Records without an index are kept, with NaN, as pd.json_normalize did
+        'main.aqi': aqi if np.isnan(aqi).any() else aqi.astype(np.uint8)
+    }
+    for name, column in zip(COMPONENTS, COMPONENT_COLS):
+        columns[column] = np.array([record['components'].get(name) for record in records], dtype=np.float64)
+    return columns
+
+def decode_air_pollution(payload):
+    """
+    Decode an air_pollution (or air_pollution/history) response
+
+    Args:
+        payload: Raw response body (bytes or str), or the parsed response dict
+
+    Returns:
+        dict: Column name -> array: 'dt' int64 epoch seconds, 'main.aqi'
+              uint8 and float64 'components.*' (missing values are NaN).
+              If any record has a null or missing 'main.aqi', that column
+              is float64 with NaN for those records instead of uint8.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    if isinstance(payload, (bytes, bytearray)):
+        columns = _read_body(bytes(payload))
+        if columns is not None:
+            return {
+                'dt': columns['dt'].astype(np.int64, copy=False),
+                'main.aqi': columns['main.aqi'].astype(np.uint8, copy=False),
+                **{column: columns[column].astype(np.float64, copy=False) for column in COMPONENT_COLS}
+            }
+        payload = json.loads(payload)
+    return _read_records(payload['list'])
@@ -0,0 +1,189 @@
+"""
+Materialized AQI rollups per city.
+
+Each city keeps one row per day with mergeable aggregates (hours, sum,
+min, max, hours per AQI category and a histogram of hourly AQI). New
+hourly frames from process_aqi_data are folded in incrementally: only
+hours outside the range already covered are added (newer than the
+watermark, or older than the first hour when a longer history is
+loaded), so re-processing the same window is a no-op. Weekly and monthly
+summaries and percentiles are derived from the daily rows, never from
+raw hourly data.
+
+Days follow the local timestamps produced by process_aqi_data.
+"""
+import os
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from aqi_calculator import CATEGORY_BOUNDARIES, get_aqi_category
+
+# Category names in band order, as shown by the dashboard
+CATEGORIES = [get_aqi_category(boundary)[0] for boundary in CATEGORY_BOUNDARIES] + [get_aqi_category(np.inf)[0]]
+
+# Histogram of hourly AQI used for percentiles: 1-point bins, last bin is 500+
+HIST_BIN_WIDTH = 1
+HIST_MAX_AQI = 500
+HIST_BINS = HIST_MAX_AQI // HIST_BIN_WIDTH + 1
+
+PERIODS = {'daily': 'D', 'weekly': 'W', 'monthly': 'M'}
+PERCENTILES = [50, 90, 95]
+
+# Persist rollups here (one file per city) if set
+ROLLUP_DIR = os.getenv("AQI_ROLLUP_DIR")
+
+STAT_COLS = ['hours', 'aqi_sum', 'aqi_min', 'aqi_max'] + CATEGORIES
+
+def _city_key(city):
+    return city.strip().lower()
+
+def _aggregate_hours(df):
+    """Daily aggregates and histograms for a frame of new hourly rows"""
+    aqi = df['Overall_AQI'].to_numpy(dtype=np.float64)
+    days, day_index = np.unique(df['dt'].dt.floor('D').to_numpy(), return_inverse=True)
+
+    stats = pd.DataFrame(0.0, index=pd.DatetimeIndex(days, name='date'), columns=STAT_COLS)
+    stats['hours'] = np.bincount(day_index, minlength=len(days))
+    stats['aqi_sum'] = np.bincount(day_index, weights=aqi, minlength=len(days))
+    stats['aqi_min'] = pd.Series(aqi).groupby(day_index).min().to_numpy()
+    stats['aqi_max'] = pd.Series(aqi).groupby(day_index).max().to_numpy()
+
+    category_index = np.searchsorted(CATEGORY_BOUNDARIES, aqi, side='left')
+    counts = np.zeros((len(days), len(CATEGORIES)))
+    np.add.at(counts, (day_index, category_index), 1)
+    stats[CATEGORIES] = counts
+
+    hist = np.zeros((len(days), HIST_BINS), dtype=np.int32)
+    bins = np.minimum((np.clip(aqi, 0, None) // HIST_BIN_WIDTH).astype(np.int64), HIST_BINS - 1)
+    np.add.at(hist, (day_index, bins), 1)
+    return stats, hist
+
+def _percentiles(hist, percentiles=PERCENTILES):
+    """Approximate percentiles (bin midpoints) per histogram row"""
+    cumulative = np.cumsum(hist, axis=1)
+    totals = cumulative[:, -1:]
+    result = {}
+    for p in percentiles:
+        bins = (cumulative < totals * p / 100).sum(axis=1)
+        result[f'p{p}'] = np.where(totals[:, 0] > 0, (bins + 0.5) * HIST_BIN_WIDTH, np.nan)
+    return result
+
+class CityRollup:
+    """Daily aggregates for one city plus the range of hours already ingested"""
+
+    def __init__(self):
+        self.daily = pd.DataFrame(columns=STAT_COLS, index=pd.DatetimeIndex([], name='date'), dtype=np.float64)
+        self.hist = np.zeros((0, HIST_BINS), dtype=np.int32)
+        self.first_hour = None
+        self.watermark = None
+
+    def ingest(self, df):
+        """Fold hourly rows outside the covered range into the daily rows; returns rows added"""
+        new = df[['dt', 'Overall_AQI']].dropna()
+        if self.watermark is not None:
+            new = new[(new['dt'] > self.watermark) | (new['dt'] < self.first_hour)]
+        new = new.drop_duplicates('dt')
+        if new.empty:
+            return 0
+
+        stats, hist = _aggregate_hours(new)
+        overlap = stats.index.intersection(self.daily.index)
+        if len(overlap):
+            # A partially ingested day (usually today) gets the new hours merged in
+            rows = self.daily.index.get_indexer(overlap)
+            new_rows = stats.index.get_indexer(overlap)
+            additive = ['hours', 'aqi_sum'] + CATEGORIES
+            self.daily.loc[overlap, additive] += stats.loc[overlap, additive].to_numpy()
+            self.daily.loc[overlap, 'aqi_min'] = np.minimum(self.daily.loc[overlap, 'aqi_min'], stats.loc[overlap, 'aqi_min'])
+            self.daily.loc[overlap, 'aqi_max'] = np.maximum(self.daily.loc[overlap, 'aqi_max'], stats.loc[overlap, 'aqi_max'])
+            self.hist[rows] += hist[new_rows]
+
+        fresh = ~stats.index.isin(overlap)
+        if fresh.any():
+            daily = pd.concat([self.daily, stats[fresh]]) if len(self.daily) else stats[fresh]
+            hist = np.concatenate([self.hist, hist[fresh]])
+            order = np.argsort(daily.index.to_numpy(), kind='stable')
+            self.daily, self.hist = daily.iloc[order], hist[order]
+
+        if self.watermark is None:
+            self.first_hour, self.watermark = new['dt'].min(), new['dt'].max()
+        else:
+            self.first_hour = min(self.first_hour, new['dt'].min())
+            self.watermark = max(self.watermark, new['dt'].max())
+        return len(new)
+
+    def summary(self, period='daily'):
+        """
+        Summary table for one period ('daily', 'weekly' or 'monthly')
+
+        Returns:
+            pd.DataFrame: hours, mean/min/max AQI, percentiles and the
+                          share of hours in each category per period
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period '{period}', expected one of {list(PERIODS)}")
+        if self.daily.empty:
+            return pd.DataFrame()
+
+        if period == 'daily':
+            stats, hist = self.daily, self.hist
+        else:
+            labels = self.daily.index.to_period(PERIODS[period]).start_time
+            groups = pd.Series(np.arange(len(labels)), index=labels).groupby(level=0)
+            stats = self.daily.groupby(labels).agg(
+                {**{col: 'sum' for col in ['hours', 'aqi_sum'] + CATEGORIES}, 'aqi_min': 'min', 'aqi_max': 'max'}
+            )
+            hist = np.add.reduceat(self.hist, groups.first().to_numpy(), axis=0)
+            stats.index.name = 'date'
+
+        table = pd.DataFrame({
+            'hours': stats['hours'].astype(int),
+            'mean_aqi': stats['aqi_sum'] / stats['hours'],
+            'min_aqi': stats['aqi_min'],
+            'max_aqi': stats['aqi_max'],
+            **_percentiles(hist)
+        }, index=stats.index)
+        for category in CATEGORIES:
+            table[f'{category} %'] = 100 * stats[category] / stats['hours']
+        return table
+
+    def category_shares(self):
+        """Share of all ingested hours in each AQI category (percent)"""
+        counts = self.daily[CATEGORIES].sum()
+        total = counts.sum()
+        return 100 * counts / total if total else counts
+
+class RollupStore:
+    """Thread-safe rollups for many cities, optionally persisted to ROLLUP_DIR"""
+
+    def __init__(self, directory=ROLLUP_DIR):
+        self.directory = directory
+        self._cities = {}
+        self._lock = threading.Lock()
+
+    def _path(self, city):
+        return os.path.join(self.directory, f"{_city_key(city).replace(' ', '_')}.rollup.joblib")
+
+    def get(self, city):
+        """Rollup for a city (loaded from disk on first use if persisted)"""
+        key = _city_key(city)
+        with self._lock:
+            if key not in self._cities:
+                path = self._path(city) if self.directory else None
+                self._cities[key] = joblib.load(path) if path and os.path.exists(path) else CityRollup()
+            return self._cities[key]
+
+    def ingest(self, city, df):
+        """Fold a processed hourly frame into a city's rollups; returns hours added"""
+        rollup = self.get(city)
+        with self._lock:
+            added = rollup.ingest(df)
+            if added and self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                tmp_path = self._path(city) + ".tmp"
+                joblib.dump(rollup, tmp_path)
+                os.replace(tmp_path, self._path(city))
+        return added
@@ -0,0 +1,219 @@
+"""
+Memory-bounded Streamlit session state.
+
+Long-lived sessions accumulate per-city chat histories and DataFrames.
+This module keeps each session under SESSION_BUDGET_MB:
+
+- Chat histories are compacted: once a history grows past
+  MAX_CHAT_MESSAGES, the older turns are replaced by one short summary
+  message and only the most recent CHAT_KEEP_RECENT messages are kept.
+- DataFrames are stored with compact dtypes, and frames that are the same
+  for every session (e.g. a city's current readings) live once in a
+  shared process-wide cache; the session only holds a reference.
+- City-specific state that has not been used for CITY_STATE_TTL_S is
+  evicted, and if the session is still over budget the least recently
+  used evictable keys go next.
+
+Evicted data is reloaded from the (cached) API the next time it is needed.
+"""
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from cachetools import TTLCache
+
+from chatbot import estimate_tokens, truncate_to_tokens
+
+SESSION_BUDGET_MB = float(os.getenv("AQI_SESSION_BUDGET_MB", "8"))
+CITY_STATE_TTL_S = int(os.getenv("AQI_CITY_STATE_TTL_S", "1800"))
+
+MAX_CHAT_MESSAGES = 30
+CHAT_KEEP_RECENT = 16
+CHAT_SUMMARY_TOKENS = 150
+
+# Frames shared by all sessions in this process
+SHARED_FRAME_TTL_S = 600
+SHARED_FRAME_SLOTS = 256
+
+CHAT_KEY_PREFIX = "chat_messages_"
+LAST_USED_KEY = "_state_last_used"
+
+_shared_frames = TTLCache(SHARED_FRAME_SLOTS, SHARED_FRAME_TTL_S)
+_shared_lock = threading.Lock()
+
+@dataclass(frozen=True)
+class FrameRef:
+    """Session-side handle to a DataFrame held in the shared frame cache"""
+    key: tuple
+
+# =====================================================
+# FOOTPRINT
+# =====================================================
+
+def estimate_bytes(value):
+    """Approximate memory held by a session state value"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, FrameRef):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_bytes(k) + estimate_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+def session_footprint(state):
+    """Bytes per session state key (shared frames are not counted)"""
+    return {key: estimate_bytes(state[key]) for key in list(state.keys()) if key != LAST_USED_KEY}
+
+# =====================================================
+# DATAFRAMES
+# =====================================================
+
+def compact_frame(df):
+    """Copy of df with float64 -> float32 and integers downcast to the smallest type"""
+    compact = df.copy()
+    for column in compact.columns:
+        dtype = compact[column].dtype
+        if dtype == np.float64:
+            compact[column] = compact[column].astype(np.float32)
+        elif pd.api.types.is_integer_dtype(dtype):
+            compact[column] = pd.to_numeric(compact[column], downcast='integer')
+    return compact
+
+def remember_frame(state, key, df, shared_key=None):
+    """
+    Store a DataFrame in session state with compact dtypes. With a
+    shared_key, the frame is kept once in the process-wide cache and the
+    session only stores a FrameRef to it.
+    """
+    df = compact_frame(df)
+    if shared_key is None:
+        state[key] = df
+    else:
+        with _shared_lock:
+            _shared_frames[shared_key] = df
+        state[key] = FrameRef(shared_key)
+    touch(state, key)
+
+def get_frame(state, key):
+    """Return a stored DataFrame, or None if it was never stored, evicted or expired"""
+    value = state.get(key)
+    if isinstance(value, FrameRef):
+        with _shared_lock:
+            value = _shared_frames.get(value.key)
+        if value is None:
+            del state[key]
+            return None
+    if value is not None:
+        touch(state, key)
+    return value
+
+# =====================================================
+# CHAT HISTORIES
+# =====================================================
+
+def summarize_messages(messages, max_tokens=CHAT_SUMMARY_TOKENS):
+    """
+    One assistant message recapping the user's earlier questions. Earlier
+    summaries among the messages are merged in, most recent questions last.
+    """
+    questions = []
+    for m in messages:
+        if m.get("summary"):
+            questions.extend(m.get("questions", []))
+        elif m.get("role") == "user" and m.get("content"):
+            questions.append(m["content"].strip().rstrip("?.!"))
+
+    # Keep the most recent questions that fit the budget
+    kept, used = [], 0
+    for question in reversed(questions):
+        cost = estimate_tokens(question) + 1
+        if used + cost > max_tokens:
+            break
+        kept.insert(0, question)
+        used += cost
+
+    if kept:
+        text = "Earlier in this chat you asked: " + "; ".join(kept) + "."
+    else:
+        text = "Earlier messages in this chat were condensed."
+    return {"role": "assistant", "content": truncate_to_tokens(text, max_tokens), "summary": True, "questions": kept}
+
+def compact_chat(messages, max_messages=MAX_CHAT_MESSAGES, keep_recent=CHAT_KEEP_RECENT):
+    """Fold everything but the most recent messages into one summary once over max_messages"""
+    if len(messages) <= max_messages:
+        return messages
+    return [summarize_messages(messages[:-keep_recent])] + messages[-keep_recent:]
+
+def append_message(state, chat_key, message):
+    """Append a chat message and compact the history if it got too long"""
+    messages = state.get(chat_key) or []
+    messages.append(message)
+    state[chat_key] = compact_chat(messages)
+    touch(state, chat_key)
+
+# =====================================================
+# EVICTION
+# =====================================================
+
+def touch(state, key):
+    """Mark a key as used now"""
+    last_used = state.get(LAST_USED_KEY)
+    if last_used is None:
+        last_used = state[LAST_USED_KEY] = {}
+    last_used[key] = time.time()
+
+def enforce_budget(state, active_keys=(), evictable_prefixes=(CHAT_KEY_PREFIX,), evictable_keys=(),
+                   budget_mb=SESSION_BUDGET_MB, ttl_s=CITY_STATE_TTL_S, now=None):
+    """
+    Evict stale and least recently used city-specific state
+
+    Args:
+        state: st.session_state (or any mutable mapping)
+        active_keys: Keys in use by the current view; never evicted
+        evictable_prefixes, evictable_keys: Which keys may be evicted
+        budget_mb: Per-session memory budget
+        ttl_s: Evict evictable keys unused for longer than this
+
+    Returns:
+        dict: {'bytes': footprint after eviction, 'evicted': [keys]}
+    """
+    now = time.time() if now is None else now
+    last_used = state.get(LAST_USED_KEY) or {}
+    candidates = [
+        key for key in list(state.keys())
+        if key not in active_keys and (key in evictable_keys or key.startswith(tuple(evictable_prefixes)))
+    ]
+    # Keys never touched count as used now, so they get a full TTL
+    for key in candidates:
+        last_used.setdefault(key, now)
+
+    evicted = [key for key in candidates if now - last_used[key] > ttl_s]
+    footprint = session_footprint(state)
+    total = sum(footprint.values()) - sum(footprint.get(key, 0) for key in evicted)
+
+    for key in sorted(set(candidates) - set(evicted), key=lambda k: last_used[k]):
+        if total <= budget_mb * 2**20:
+            break
+        evicted.append(key)
+        total -= footprint.get(key, 0)
+
+    for key in evicted:
+        del state[key]
+        last_used.pop(key, None)
+    if last_used:
+        state[LAST_USED_KEY] = last_used
+    return {'bytes': total, 'evicted': evicted}
+
+def shared_frame_count():
+    with _shared_lock:
+        return len(_shared_frames)
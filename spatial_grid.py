@@ -0,0 +1,36 @@
+"""
+Snap coordinates to a fixed lat/lon grid so nearby queries share results.
+
+OpenWeatherMap's air pollution data comes from a gridded model, so two
+localities a few kilometres apart get effectively the same readings.
+Hashing coordinates to grid cells (one integer pair per cell, O(1) per
+lookup) lets every query inside a cell use the same cache keys for
+fetches, histories and trained forecasts.
+"""
+import math
+import os
+
+# Cell size in degrees (0.1 deg is ~11 km north-south); 0 disables snapping
+GRID_CELL_DEG = float(os.getenv("AQI_GRID_CELL_DEG", "0.1"))
+
+def cell_index(latitude, longitude, cell_deg=GRID_CELL_DEG):
+    """Integer (row, column) of the grid cell containing a point"""
+    return math.floor(latitude / cell_deg), math.floor(((longitude + 180) % 360 - 180) / cell_deg)
+
+def cell_center(row, column, cell_deg=GRID_CELL_DEG):
+    """Latitude and longitude of a cell's center, rounded for stable cache keys"""
+    return round((row + 0.5) * cell_deg, 6), round((column + 0.5) * cell_deg, 6)
+
+def snap_coordinates(latitude, longitude, cell_deg=GRID_CELL_DEG):
+    """
+    Coordinates to use for fetching and caching data for a point: the
+    center of its grid cell, or the point itself if snapping is disabled
+    """
+    if not cell_deg or cell_deg <= 0:
+        return latitude, longitude
+    return cell_center(*cell_index(latitude, longitude, cell_deg), cell_deg)
+
+def cell_label(latitude, longitude, cell_deg=GRID_CELL_DEG):
+    """Readable cell id, e.g. '19.05N_72.85E', for logs and file names"""
+    lat, lon = snap_coordinates(latitude, longitude, cell_deg)
+    return f"{abs(lat):.4g}{'N' if lat >= 0 else 'S'}_{abs(lon):.4g}{'E' if lon >= 0 else 'W'}"
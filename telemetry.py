@@ -0,0 +1,332 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import psutil
+except ImportError:  # optional, RSS is then read from /proc or resource
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+
+# Append every finished trace as one JSON line to this file (disabled if unset)
+METRICS_FILE = os.getenv("AQI_METRICS_FILE")
+# Serve Prometheus text metrics on this port (disabled if unset)
+METRICS_PORT = os.getenv("AQI_METRICS_PORT")
+# Interface the metrics endpoint listens on (set to 0.0.0.0 to expose it)
+METRICS_HOST = os.getenv("AQI_METRICS_HOST", "127.0.0.1")
+# How often RSS is sampled while spans are open, for their in-span peak
+RSS_SAMPLE_INTERVAL_S = float(os.getenv("AQI_RSS_SAMPLE_INTERVAL_S", "0.01"))
+
+# Current trace (list of finished spans) and span stack for this thread/session
+_current_trace = ContextVar("aqi_current_trace", default=None)
+_current_span = ContextVar("aqi_current_span", default=None)
+_current_cache_call = ContextVar("aqi_current_cache_call", default=None)
+
+_lock = threading.Lock()
+_span_totals = {}      # span name -> {'count', 'sum_s', 'max_s'}
+_cache_totals = {}     # cache name -> {'hit', 'miss'}
+_value_totals = {}     # observed quantity -> {'count', 'sum', 'max', 'last'}
+_latest_traces = {}    # trace name -> last finished trace
+_metrics_server = None
+_metrics_server_failed = False
+_open_spans = {}       # id(record) -> record, sampled for their peak RSS
+_sampler_wakeup = threading.Event()
+_sampler_thread = None
+
+# =====================================================
+# RESOURCE USAGE
+# =====================================================
+
+def current_rss_mb():
+    """Resident set size of this process in MB, or None if unavailable"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2**20
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def peak_rss_mb():
+    """
+    Peak resident set size since the process started in MB, or None if
+    unavailable. This is a process-lifetime high-water mark, so it is only
+    exported as a process gauge and not attributed to spans or traces.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _sample_open_spans():
+    """Background loop raising each open span's peak RSS to the current RSS"""
+    while True:
+        _sampler_wakeup.wait()
+        rss = current_rss_mb()
+        with _lock:
+            if not _open_spans:
+                # Sleep until the next span opens
+                _sampler_wakeup.clear()
+                continue
+            for record in _open_spans.values():
+                record['peak_rss_mb'] = max(record['peak_rss_mb'], rss)
+        time.sleep(RSS_SAMPLE_INTERVAL_S)
+
+def _track_peak_rss(record, rss):
+    """Start sampling the in-span peak RSS of a span record"""
+    global _sampler_thread
+    record['peak_rss_mb'] = rss
+    if rss is None:
+        return
+    with _lock:
+        _open_spans[id(record)] = record
+        _sampler_wakeup.set()
+        if _sampler_thread is None:
+            _sampler_thread = threading.Thread(target=_sample_open_spans, name="aqi-rss-sampler", daemon=True)
+            _sampler_thread.start()
+
+def _untrack_peak_rss(record, rss):
+    """Stop sampling a span record and fold in its final RSS"""
+    with _lock:
+        _open_spans.pop(id(record), None)
+    if rss is not None and record['peak_rss_mb'] is not None:
+        record['peak_rss_mb'] = max(record['peak_rss_mb'], rss)
+
+# =====================================================
+# TRACES AND SPANS
+# =====================================================
+
+@contextmanager
+def trace(name):
+    """
+    Group all spans recorded inside the block into one trace (e.g. one
+    dashboard rerun). The finished trace is kept for the debug panel and
+    written to METRICS_FILE if configured.
+    """
+    spans = []
+    token = _current_trace.set(spans)
+    started = datetime.now(timezone.utc).isoformat()
+    start = time.perf_counter()
+    try:
+        yield spans
+    finally:
+        _current_trace.reset(token)
+        finished = {
+            'trace': name,
+            'started': started,
+            'duration_ms': (time.perf_counter() - start) * 1000,
+            'spans': spans
+        }
+        with _lock:
+            _latest_traces[name] = finished
+        if METRICS_FILE:
+            write_trace(finished, METRICS_FILE)
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a pipeline stage. Attributes such as payload sizes can be passed
+    up front or added later with set_attribute().
+
+    Besides the RSS at exit and its change over the span, the record has
+    'peak_rss_mb': the highest RSS seen while the span was open, sampled
+    every RSS_SAMPLE_INTERVAL_S by a background thread. It catches memory
+    that a stage allocates and frees again, which the before/after delta
+    misses; peaks shorter than the sample interval can still be missed.
+    """
+    record = {'name': name, 'attrs': dict(attrs), 'parent': None}
+    parent = _current_span.get()
+    if parent is not None:
+        record['parent'] = parent['name']
+    token = _current_span.set(record)
+    rss_before = current_rss_mb()
+    _track_peak_rss(record, rss_before)
+    start = time.perf_counter()
+    try:
+        yield record['attrs']
+    except Exception as e:
+        record['attrs']['error'] = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _current_span.reset(token)
+        rss_after = current_rss_mb()
+        _untrack_peak_rss(record, rss_after)
+        record['duration_ms'] = duration * 1000
+        record['rss_mb'] = rss_after
+        record['rss_delta_mb'] = rss_after - rss_before if rss_after is not None and rss_before is not None else None
+
+        spans = _current_trace.get()
+        if spans is not None:
+            spans.append(record)
+        with _lock:
+            totals = _span_totals.setdefault(name, {'count': 0, 'sum_s': 0.0, 'max_s': 0.0})
+            totals['count'] += 1
+            totals['sum_s'] += duration
+            totals['max_s'] = max(totals['max_s'], duration)
+
+@contextmanager
+def interaction(name, **attrs):
+    """
+    Time a fragment (e.g. the chat panel). When the fragment reruns on its
+    own it is recorded as its own trace; as part of a full rerun it is a
+    span of the enclosing trace.
+    """
+    if _current_trace.get() is not None:
+        with span(name, **attrs) as span_attrs:
+            yield span_attrs
+    else:
+        with trace(name), span(name, **attrs) as span_attrs:
+            yield span_attrs
+
+def set_attribute(key, value):
+    """Attach an attribute to the innermost active span (no-op outside spans)"""
+    record = _current_span.get()
+    if record is not None:
+        record['attrs'][key] = value
+
+def record_cache(cache_name, hit):
+    """Count a cache hit or miss and tag the active span with it"""
+    with _lock:
+        totals = _cache_totals.setdefault(cache_name, {'hit': 0, 'miss': 0})
+        totals['hit' if hit else 'miss'] += 1
+    set_attribute('cache', 'hit' if hit else 'miss')
+
+def cached_call(cache_name, fn, *args, **kwargs):
+    """
+    Call a memoized function (e.g. @st.cache_data) and record whether it
+    was served from cache. The wrapped function must call note_cache_miss()
+    in its body, which only runs on a miss.
+    """
+    outcome = {'miss': False}
+    token = _current_cache_call.set(outcome)
+    try:
+        with span(f"cache.{cache_name}"):
+            result = fn(*args, **kwargs)
+            record_cache(cache_name, hit=not outcome['miss'])
+    finally:
+        _current_cache_call.reset(token)
+    return result
+
+def note_cache_miss():
+    """Mark the enclosing cached_call() as a cache miss"""
+    outcome = _current_cache_call.get()
+    if outcome is not None:
+        outcome['miss'] = True
+
+def observe(name, value):
+    """Record one observation of a quantity such as a session's state size"""
+    with _lock:
+        totals = _value_totals.setdefault(name, {'count': 0, 'sum': 0.0, 'max': 0.0, 'last': 0.0})
+        totals['count'] += 1
+        totals['sum'] += value
+        totals['max'] = max(totals['max'], value)
+        totals['last'] = value
+
+# =====================================================
+# EXPORT
+# =====================================================
+
+def latest_trace(name):
+    """Return the last finished trace with this name, or None"""
+    with _lock:
+        return _latest_traces.get(name)
+
+def write_trace(finished, path):
+    """Append a finished trace as one JSON line"""
+    line = json.dumps(finished, default=str)
+    with _lock:
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+def render_prometheus():
+    """Render aggregated metrics in the Prometheus text exposition format"""
+    lines = [
+        "# HELP aqi_stage_duration_seconds Time spent per pipeline stage",
+        "# TYPE aqi_stage_duration_seconds summary"
+    ]
+    with _lock:
+        span_totals = {name: dict(totals) for name, totals in _span_totals.items()}
+        cache_totals = {name: dict(totals) for name, totals in _cache_totals.items()}
+        value_totals = {name: dict(totals) for name, totals in _value_totals.items()}
+
+    for name, totals in sorted(span_totals.items()):
+        lines.append(f'aqi_stage_duration_seconds_count{{stage="{name}"}} {totals["count"]}')
+        lines.append(f'aqi_stage_duration_seconds_sum{{stage="{name}"}} {totals["sum_s"]:.6f}')
+    lines.append("# HELP aqi_stage_duration_seconds_max Slowest observed run per stage")
+    lines.append("# TYPE aqi_stage_duration_seconds_max gauge")
+    for name, totals in sorted(span_totals.items()):
+        lines.append(f'aqi_stage_duration_seconds_max{{stage="{name}"}} {totals["max_s"]:.6f}')
+
+    lines.append("# HELP aqi_cache_requests_total Cache lookups by result")
+    lines.append("# TYPE aqi_cache_requests_total counter")
+    for name, totals in sorted(cache_totals.items()):
+        for result in ('hit', 'miss'):
+            lines.append(f'aqi_cache_requests_total{{cache="{name}",result="{result}"}} {totals[result]}')
+
+    for name, totals in sorted(value_totals.items()):
+        lines.append(f"# TYPE aqi_{name} summary")
+        lines.append(f"aqi_{name}_count {totals['count']}")
+        lines.append(f"aqi_{name}_sum {totals['sum']:.6f}")
+        lines.append(f"# TYPE aqi_{name}_max gauge")
+        lines.append(f"aqi_{name}_max {totals['max']:.6f}")
+
+    rss, peak = current_rss_mb(), peak_rss_mb()
+    if rss is not None:
+        lines.append("# TYPE aqi_process_resident_memory_bytes gauge")
+        lines.append(f"aqi_process_resident_memory_bytes {int(rss * 2**20)}")
+    if peak is not None:
+        lines.append("# TYPE aqi_process_peak_resident_memory_bytes gauge")
+        lines.append(f"aqi_process_peak_resident_memory_bytes {int(peak * 2**20)}")
+    return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port=None, host=None):
+    """
+    Serve /metrics on the given port (default AQI_METRICS_PORT) and host
+    (default AQI_METRICS_HOST, localhost) in a background thread. Safe to
+    call on every rerun; starts at most once, and if the port cannot be
+    bound the error is printed once and no further attempts are made.
+    """
+    global _metrics_server, _metrics_server_failed
+    port = port or METRICS_PORT
+    host = host or METRICS_HOST
+    if not port:
+        return None
+    with _lock:
+        if _metrics_server is None and not _metrics_server_failed:
+            try:
+                _metrics_server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError as e:
+                _metrics_server_failed = True
+                print(f"Metrics server disabled: cannot listen on {host}:{port} ({e})")
+                return None
+            threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+    return _metrics_server
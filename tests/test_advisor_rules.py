@@ -0,0 +1,19 @@
+from advisor_rules import CONDITION_RULES, answer_locally, detect_conditions
+
+
+def test_conditions_match_whole_words():
+    assert detect_conditions("I have heartburn") == []
+    assert detect_conditions("I have a heart condition") == ['heart']
+    assert detect_conditions("my children have allergies") == ['allergy', 'child']
+
+
+def test_condition_advice_added_for_general_intents():
+    answer = answer_locally("how does weather affect asthma", current_aqi=120)
+    assert answer.startswith("**How weather affects air quality**")
+    assert CONDITION_RULES['asthma'] in answer
+
+
+def test_condition_advice_added_for_data_intents():
+    answer = answer_locally("can I go running with asthma", current_aqi=120)
+    assert CONDITION_RULES['asthma'] in answer
+    assert CONDITION_RULES['heart'] not in answer_locally("can I go running with heartburn", current_aqi=120)
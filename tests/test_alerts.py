@@ -0,0 +1,68 @@
+from alerts import AlertEngine, QueueSink
+
+
+def _engine(**kwargs):
+    return AlertEngine(sink=QueueSink(), **kwargs)
+
+
+def _fired(engine, value, now, city="Delhi", **kwargs):
+    return [(n['user'], n['threshold']) for n in engine.evaluate(city, current_aqi=value, now=now, **kwargs)]
+
+
+def test_alert_fires_once_until_value_moves_back_past_hysteresis():
+    engine = _engine(hysteresis=10, cooldown_s=0)
+    engine.subscribe("u1", "Delhi", 150)
+    assert _fired(engine, 160, now=0) == [("u1", 150.0)]
+    # Still above, and hovering just under the threshold does not re-arm
+    assert _fired(engine, 155, now=1) == []
+    assert _fired(engine, 145, now=2) == []
+    assert _fired(engine, 160, now=3) == []
+    # Back below threshold - hysteresis re-arms it
+    assert _fired(engine, 135, now=4) == []
+    assert _fired(engine, 160, now=5) == [("u1", 150.0)]
+
+
+def test_below_alert_and_forecast_source():
+    engine = _engine(hysteresis=10, cooldown_s=0)
+    engine.subscribe("u1", "Delhi", 100, condition='below')
+    engine.subscribe("u2", "Delhi", 200, source='forecast')
+    assert _fired(engine, 90, now=0) == [("u1", 100.0)]
+    # 'above' forecast alerts use the forecast peak
+    notifications = engine.evaluate("Delhi", forecast_aqi=[120, 210, 150], now=1)
+    assert [(n['user'], n['aqi'], n['source']) for n in notifications] == [("u2", 210.0, 'forecast')]
+
+
+def test_cooldown_suppresses_repeat_notifications():
+    engine = _engine(hysteresis=10, cooldown_s=3600)
+    engine.subscribe("u1", "Delhi", 150)
+    assert _fired(engine, 160, now=0) == [("u1", 150.0)]
+    assert _fired(engine, 100, now=10) == []
+    # Re-armed, but still inside the cooldown
+    assert _fired(engine, 160, now=20) == []
+    assert _fired(engine, 160, now=3600) == [("u1", 150.0)]
+
+
+def test_unsubscribe_pending_and_indexed_subscriptions():
+    engine = _engine(cooldown_s=0)
+    assert engine.subscribe("u1", "Delhi", 150)
+    assert not engine.subscribe("u1", " delhi ", 150)  # duplicate
+    engine.subscribe("u2", "Delhi", 150)
+    # u2 is still pending (not yet indexed by an evaluate)
+    assert engine.unsubscribe("u2", "Delhi", 150)
+    assert _fired(engine, 100, now=0) == []
+    # u1 is indexed now
+    assert engine.unsubscribe("u1", "Delhi", 150)
+    assert not engine.unsubscribe("u1", "Delhi", 150)
+    assert not engine.unsubscribe("u1", "Mumbai", 150)
+    assert len(engine) == 0
+    assert _fired(engine, 160, now=1) == []
+
+
+def test_notifications_go_to_the_sink():
+    sink = QueueSink()
+    engine = AlertEngine(sink=sink, cooldown_s=0)
+    engine.subscribe("u1", "Delhi", 150)
+    engine.evaluate("Delhi", current_aqi=180, now=0)
+    [notification] = sink.drain()
+    assert notification['category'] == "Unhealthy"
+    assert notification['city'] == "Delhi"
@@ -0,0 +1,14 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("OPENAI_o1_MINI_API_KEY", "test")
+api_server = pytest.importorskip("api_server")
+
+
+def test_finite_json_replaces_nan_and_inf():
+    payload = {'aqi': np.float64('nan'), 'hourly': [{'aqi': 12.5}, {'aqi': float('inf')}], 'city': 'Mumbai', 'n': 3}
+    assert api_server.finite_json(payload) == {'aqi': None, 'hourly': [{'aqi': 12.5}, {'aqi': None}], 'city': 'Mumbai', 'n': 3}
+    json.dumps(api_server.finite_json(payload), allow_nan=False)
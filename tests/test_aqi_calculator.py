@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from aqi_calculator import calculate_overall_aqi, calculate_overall_aqi_array
+
+# Upper end of each component's range, wide enough to reach every band and
+# to fall outside the breakpoint tables
+COMPONENT_MAXIMA = {
+    'co': 60000.0, 'no': 500.0, 'no2': 500.0, 'o3': 1000.0,
+    'so2': 2000.0, 'pm2_5': 400.0, 'pm10': 500.0, 'nh3': 2500.0
+}
+
+
+def _fixture_frame(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {
+        f'components.{name}': np.round(rng.uniform(0, maximum, n), 2)
+        for name, maximum in COMPONENT_MAXIMA.items()
+    }
+    df = pd.DataFrame(columns)
+    # Missing readings and values on band edges
+    df.loc[::97, 'components.pm2_5'] = np.nan
+    df.loc[::89, 'components.pm10'] = 100.0
+    df.loc[::101, list(columns)] = np.nan
+    return df
+
+
+def test_array_matches_rowwise():
+    df = _fixture_frame()
+    expected = df.apply(calculate_overall_aqi, axis=1).to_numpy(dtype=np.float64)
+    np.testing.assert_array_equal(calculate_overall_aqi_array(df), expected)
+
+
+def test_array_accepts_dict_of_arrays():
+    df = _fixture_frame(n=50, seed=1)
+    columns = {column: df[column].to_numpy() for column in df.columns}
+    np.testing.assert_array_equal(calculate_overall_aqi_array(columns), calculate_overall_aqi_array(df))
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from backtest import run_backtest, select_origins
+from forecast_lstm import FEATURE_COLS, FORECAST_HORIZON, INPUT_WINDOW
+
+N_WINDOWS = 100
+
+
+def _series(seed=0):
+    rng = np.random.default_rng(seed)
+    hours = INPUT_WINDOW + FORECAST_HORIZON + N_WINDOWS - 1
+    aqi = 100 + 40 * np.sin(np.arange(hours) * 2 * np.pi / 24) + rng.normal(0, 5, hours)
+    scaler_y = MinMaxScaler()
+    y_scaled = scaler_y.fit_transform(aqi.reshape(-1, 1))
+    # The first feature is the scaled target, so a persistence forecast can be built from the inputs
+    x_scaled = np.hstack([y_scaled, rng.random((hours, len(FEATURE_COLS) - 1))]).astype(np.float32)
+    return x_scaled, y_scaled, scaler_y, aqi
+
+
+def persistence(X):
+    """Repeat the last observed value over the whole horizon"""
+    return np.repeat(X[:, -1, :1], FORECAST_HORIZON, axis=1)
+
+
+def _expected_errors(aqi, scaler_y, x_scaled, origins):
+    errors = []
+    for origin in origins:
+        last = scaler_y.inverse_transform(x_scaled[origin + INPUT_WINDOW - 1, :1].reshape(1, 1))[0, 0]
+        truth = aqi[origin + INPUT_WINDOW:origin + INPUT_WINDOW + FORECAST_HORIZON]
+        errors.append(last - truth)
+    return np.array(errors)
+
+
+def test_select_origins_keeps_latest_window():
+    origins = select_origins(N_WINDOWS, stride=24)
+    assert origins[-1] == N_WINDOWS - 1
+    assert np.all(np.diff(origins) == 24)
+    assert list(select_origins(N_WINDOWS, stride=24, max_origins=2)) == [75, 99]
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 512])
+def test_backtest_matches_brute_force(batch_size):
+    x_scaled, y_scaled, scaler_y, aqi = _series()
+    report = run_backtest(persistence, x_scaled, y_scaled, scaler_y, stride=12, batch_size=batch_size)
+
+    origins = select_origins(N_WINDOWS, stride=12)
+    errors = _expected_errors(aqi, scaler_y, x_scaled, origins)
+    assert report['origins_evaluated'] == report['origins_total'] == len(origins)
+    assert report['complete']
+    np.testing.assert_allclose(report['mae_by_horizon'], np.abs(errors).mean(axis=0), rtol=1e-5)
+    assert report['rmse'] == pytest.approx(np.sqrt(np.square(errors).mean()), rel=1e-5)
+
+
+def test_backtest_skips_origins_spanning_masked_rows():
+    x_scaled, y_scaled, scaler_y, _ = _series()
+    valid = np.ones(len(y_scaled), dtype=bool)
+    # Only the last window starts after this row
+    valid[N_WINDOWS - 2] = False
+    report = run_backtest(persistence, x_scaled, y_scaled, scaler_y, stride=1, valid=valid)
+    assert report['origins_total'] == 1
+
+
+def test_backtest_needs_enough_history():
+    x_scaled, y_scaled, scaler_y, _ = _series()
+    with pytest.raises(ValueError):
+        run_backtest(persistence, x_scaled[:INPUT_WINDOW], y_scaled[:INPUT_WINDOW], scaler_y)
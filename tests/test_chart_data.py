@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from chart_data import chart_payload, downsample_frame, downsample_series, lttb_indices, minmax_indices
+
+
+def _noisy(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.normal(0, 1, n))
+
+
+def test_lttb_keeps_endpoints_and_point_budget():
+    y = _noisy()
+    x = np.arange(len(y), dtype=np.float64)
+    indices = lttb_indices(x, y, 300)
+    assert len(indices) == 300
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_skips_nan_points():
+    y = _noisy(1000)
+    # Every bucket still has finite points to choose from
+    y[::7] = np.nan
+    indices = lttb_indices(np.arange(1000, dtype=np.float64), y, 50)
+    assert not np.isnan(y[indices[1:-1]]).any()
+
+
+def test_minmax_keeps_global_extremes():
+    y = _noisy()
+    y[1234] = 1e6
+    y[4321] = -1e6
+    indices = minmax_indices(y, 200)
+    assert {0, len(y) - 1, 1234, 4321} <= set(indices.tolist())
+    assert len(indices) <= 202
+
+
+def test_short_series_unchanged():
+    series = pd.Series([1.0, 2.0, 3.0])
+    assert downsample_series(series, 10) is series
+    frame = pd.DataFrame({'a': [1.0, 2.0]})
+    assert downsample_frame(frame, 10) is frame
+
+
+def test_chart_payload_frame_keeps_each_column_extremes():
+    index = pd.date_range("2024-01-01", periods=5000, freq='h')
+    frame = pd.DataFrame({'a': _noisy(seed=1), 'b': _noisy(seed=2)}, index=index)
+    reduced = chart_payload(frame, width_px=300)
+    assert len(reduced) < len(frame)
+    for column in frame.columns:
+        assert reduced[column].max() == frame[column].max()
+        assert reduced[column].min() == frame[column].min()
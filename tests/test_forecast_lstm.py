@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from forecast_lstm import latest_input_end, regularize_hourly, valid_window_mask
+
+
+def _history(hours, drop=(), duplicate=()):
+    dt = pd.date_range("2024-01-01", periods=hours, freq='h')
+    df = pd.DataFrame({'dt': dt, 'value': np.arange(hours, dtype=np.float64)})
+    df = df.drop(index=list(drop))
+    extra = pd.DataFrame({'dt': dt[list(duplicate)], 'value': -1.0})
+    return pd.concat([df, extra], ignore_index=True)
+
+
+def test_short_gap_is_interpolated():
+    frame, valid = regularize_hourly(_history(12, drop=[4, 5, 6]), columns=['value'])
+    assert len(frame) == 12
+    assert valid.all()
+    np.testing.assert_allclose(frame['value'], np.arange(12))
+
+
+def test_long_gap_is_masked():
+    frame, valid = regularize_hourly(_history(12, drop=[3, 4, 5, 6]), columns=['value'])
+    assert len(frame) == 12
+    np.testing.assert_array_equal(valid, [True] * 3 + [False] * 4 + [True] * 5)
+    assert frame['value'][~valid].isna().all()
+
+
+def test_duplicate_hours_keep_last_reading():
+    df = _history(6, duplicate=[2])
+    # Readings within the same hour fall into that hour
+    df.loc[len(df)] = [pd.Timestamp("2024-01-01 03:30"), -2.0]
+    frame, valid = regularize_hourly(df, columns=['value'])
+    assert len(frame) == 6 and valid.all()
+    assert frame['value'][2] == -1.0
+    assert frame['value'][3] == -2.0
+
+
+def test_valid_window_mask_matches_brute_force():
+    rng = np.random.default_rng(0)
+    valid = rng.random(200) > 0.05
+    for input_window, horizon in ((10, 5), (24, 0), (1, 1)):
+        span = input_window + horizon
+        expected = [valid[i:i + span].all() for i in range(len(valid) - span + 1)]
+        np.testing.assert_array_equal(valid_window_mask(valid, input_window, horizon), expected)
+    assert len(valid_window_mask(valid[:5], 4, 4)) == 0
+
+
+def test_latest_input_end():
+    valid = np.ones(30, dtype=bool)
+    valid[25] = False
+    assert latest_input_end(valid, 10) == 25
+    assert latest_input_end(valid[:8], 10) is None
+
+
+def _training_data(n=256, input_window=4, features=2, horizon=3, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.random((n, input_window, features), dtype=np.float32),
+            rng.random((n, horizon), dtype=np.float32))
+
+
+def test_train_model_runs_to_max_epochs_without_budget():
+    from forecast_lstm import build_model, train_model
+
+    X, y = _training_data()
+    report = train_model(build_model(4, 2, 3), X, y, max_epochs=2, patience=5, verbose=0)
+    assert report['epochs_run'] == 2
+    assert report['stopped_reason'] == "max_epochs"
+    assert not report['stopped_mid_epoch']
+    assert report['best_epoch'] in (1, 2)
+
+
+def test_train_model_budget_cuts_off_mid_epoch():
+    from forecast_lstm import build_model, train_model
+
+    X, y = _training_data()
+    report = train_model(build_model(4, 2, 3), X, y, max_epochs=5, time_budget=0, batch_size=8, verbose=0)
+    assert report['epochs_run'] == 1
+    assert report['stopped_reason'] == "time_budget"
+    assert report['stopped_mid_epoch']
+    # The cut-off epoch is not validated, so there is no best epoch
+    assert report['best_epoch'] is None
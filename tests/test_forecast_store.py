@@ -0,0 +1,50 @@
+import os
+
+import pandas as pd
+import pytest
+
+import forecast_store
+from forecast_store import (
+    find_forecast_artifact, forecast_file_signature, list_cell_forecasts, read_forecast, write_forecast
+)
+
+
+def _forecast(hours=168, offset=0.0):
+    return pd.DataFrame({
+        'timestamp': pd.date_range("2024-01-01", periods=hours, freq='h'),
+        'Predicted_AQI': [offset + i * 0.5 for i in range(hours)]
+    })
+
+
+@pytest.mark.parametrize("ext", forecast_store.FORECAST_FORMATS)
+def test_write_read_round_trip(tmp_path, ext):
+    if ext != '.csv':
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"forecast{ext}")
+    df = _forecast()
+    write_forecast(df, path)
+    pd.testing.assert_frame_equal(read_forecast(path), df, check_dtype=False)
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_signature_changes_when_rewritten(tmp_path):
+    path = str(tmp_path / "forecast.csv")
+    assert forecast_file_signature(path) is None
+    write_forecast(_forecast(), path)
+    first = forecast_file_signature(path)
+    write_forecast(_forecast(hours=24, offset=100), path)
+    assert forecast_file_signature(path) != first
+
+
+def test_newest_artifact_and_cell_listing(tmp_path):
+    directory = str(tmp_path)
+    older = forecast_store.cell_forecast_basename("19.05N_72.85E", directory)
+    newer = forecast_store.cell_forecast_basename("28.65N_77.25E", directory)
+    write_forecast(_forecast(), older + ".csv")
+    write_forecast(_forecast(), newer + ".csv")
+    os.utime(older + ".csv", ns=(1_000_000_000, 1_000_000_000))
+
+    assert find_forecast_artifact(older) == older + ".csv"
+    assert find_forecast_artifact(str(tmp_path / "missing")) is None
+    assert list(list_cell_forecasts(directory)) == ["28.65N_77.25E", "19.05N_72.85E"]
+    assert list_cell_forecasts(str(tmp_path / "missing")) == {}
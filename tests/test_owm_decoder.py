@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from owm_decoder import COLUMNS, decode_air_pollution
+
+
+def _body(records):
+    return json.dumps({'coord': {'lon': 72.85, 'lat': 19.05}, 'list': records}).encode()
+
+
+def _record(dt, aqi, base=1.0):
+    components = {name: base + i for i, name in enumerate(['co', 'no', 'no2', 'o3', 'so2', 'pm2_5', 'pm10', 'nh3'])}
+    return {'main': {'aqi': aqi}, 'components': components, 'dt': dt}
+
+
+def test_matches_json_normalize():
+    records = [_record(1700000000 + 3600 * i, 1 + i % 5, base=0.1 * i) for i in range(48)]
+    columns = decode_air_pollution(_body(records))
+    expected = pd.json_normalize(records)
+    assert list(columns) == COLUMNS
+    assert columns['dt'].dtype == np.int64
+    assert columns['main.aqi'].dtype == np.uint8
+    for column in COLUMNS:
+        np.testing.assert_array_equal(columns[column], expected[column].to_numpy())
+
+
+def test_null_aqi_is_nan():
+    records = [_record(1700000000, 2), _record(1700003600, None), {'components': _record(0, 0)['components'], 'dt': 1700007200}]
+    columns = decode_air_pollution(_body(records))
+    assert columns['main.aqi'].dtype == np.float64
+    np.testing.assert_array_equal(columns['main.aqi'], [2.0, np.nan, np.nan])
+    np.testing.assert_array_equal(columns['dt'], [1700000000, 1700003600, 1700007200])
+
+
+def test_missing_component_is_nan():
+    record = _record(1700000000, 3)
+    record['components']['nh3'] = None
+    columns = decode_air_pollution(_body([record]))
+    assert np.isnan(columns['components.nh3'][0])
+    assert columns['main.aqi'][0] == 3
+
+
+def test_empty_list():
+    columns = decode_air_pollution(_body([]))
+    assert all(len(columns[column]) == 0 for column in COLUMNS)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rollups import CATEGORIES, CityRollup, RollupStore
+
+
+def _hourly(days=45, seed=0):
+    rng = np.random.default_rng(seed)
+    dt = pd.date_range("2024-01-01", periods=days * 24, freq='h')
+    aqi = np.round(rng.uniform(10, 320, len(dt)), 1)
+    aqi[::37] = np.nan
+    return pd.DataFrame({'dt': dt, 'Overall_AQI': aqi})
+
+
+def _summaries(rollup):
+    return {period: rollup.summary(period) for period in ('daily', 'weekly', 'monthly')}
+
+
+def _assert_same(left, right):
+    for period in left:
+        pd.testing.assert_frame_equal(left[period], right[period])
+
+
+def test_ingest_is_idempotent():
+    df = _hourly()
+    rollup = CityRollup()
+    assert rollup.ingest(df) == df['Overall_AQI'].notna().sum()
+    before = _summaries(rollup)
+    assert rollup.ingest(df) == 0
+    _assert_same(before, _summaries(rollup))
+
+
+def test_incremental_ingest_matches_one_shot():
+    df = _hourly()
+    full = CityRollup()
+    full.ingest(df)
+
+    incremental = CityRollup()
+    # Chunks overlap and split days, as repeated dashboard refreshes do
+    for start, end in ((0, 100), (50, 330), (300, 725), (700, len(df))):
+        incremental.ingest(df.iloc[start:end])
+    incremental.ingest(df)
+    _assert_same(_summaries(full), _summaries(incremental))
+
+
+def test_backfill_of_older_hours():
+    df = _hourly()
+    full = CityRollup()
+    full.ingest(df)
+
+    backfilled = CityRollup()
+    backfilled.ingest(df.iloc[24 * 20 + 7:])
+    # A longer history adds only the hours before the first one ingested
+    added = backfilled.ingest(df)
+    assert added == df.iloc[:24 * 20 + 7]['Overall_AQI'].notna().sum()
+    _assert_same(_summaries(full), _summaries(backfilled))
+
+
+def test_daily_and_weekly_means_match_resample():
+    df = _hourly()
+    rollup = CityRollup()
+    rollup.ingest(df)
+    series = df.set_index('dt')['Overall_AQI']
+
+    daily = rollup.summary('daily')
+    expected = series.resample('D').mean()
+    np.testing.assert_allclose(daily['mean_aqi'].to_numpy(), expected.to_numpy())
+    np.testing.assert_allclose(daily['max_aqi'].to_numpy(), series.resample('D').max().to_numpy())
+    np.testing.assert_array_equal(daily['hours'].to_numpy(), series.resample('D').count().to_numpy())
+
+    weekly = rollup.summary('weekly')
+    # Weeks start on Monday
+    expected = series.resample('W-MON', closed='left', label='left').mean()
+    np.testing.assert_array_equal(weekly.index.to_numpy(), expected.index.to_numpy())
+    np.testing.assert_allclose(weekly['mean_aqi'].to_numpy(), expected.to_numpy())
+
+
+def test_category_shares_sum_to_100():
+    rollup = CityRollup()
+    rollup.ingest(_hourly())
+    shares = rollup.category_shares()
+    assert list(shares.index) == CATEGORIES
+    assert shares.sum() == pytest.approx(100)
+
+
+def test_store_persists_rollups(tmp_path):
+    df = _hourly(days=3)
+    store = RollupStore(directory=str(tmp_path))
+    store.ingest("New Delhi", df)
+    reloaded = RollupStore(directory=str(tmp_path)).get(" new delhi")
+    pd.testing.assert_frame_equal(reloaded.summary(), store.get("New Delhi").summary())
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# session_memory imports chatbot, which builds its API client at import time
+os.environ.setdefault("OPENAI_o1_MINI_API_KEY", "test")
+import session_memory
+from session_memory import LAST_USED_KEY, compact_chat, enforce_budget
+
+
+def _chat(n, start=0):
+    messages = []
+    for i in range(start, start + n, 2):
+        messages.append({"role": "user", "content": f"question {i}?"})
+        messages.append({"role": "assistant", "content": f"answer {i}"})
+    return messages
+
+
+def test_short_chat_is_unchanged():
+    messages = _chat(10)
+    assert compact_chat(messages, max_messages=30, keep_recent=16) is messages
+
+
+def test_long_chat_is_folded_into_a_summary():
+    messages = _chat(40)
+    compacted = compact_chat(messages, max_messages=30, keep_recent=16)
+    assert len(compacted) == 17
+    assert compacted[1:] == messages[-16:]
+    summary = compacted[0]
+    assert summary['summary'] and summary['role'] == "assistant"
+    assert summary['questions'] == [f"question {i}" for i in range(0, 24, 2)]
+
+
+def test_repeated_compaction_merges_earlier_summaries():
+    compacted = compact_chat(_chat(40), max_messages=30, keep_recent=16)
+    compacted = compact_chat(compacted + _chat(20, start=40), max_messages=30, keep_recent=16)
+    summary = compacted[0]
+    assert len(compacted) == 17
+    # Questions from the first summary come before the newly folded ones
+    assert summary['questions'][-1] == "question 42"
+    assert summary['questions'].index("question 22") < summary['questions'].index("question 24")
+
+
+def _frame(rows):
+    return pd.DataFrame({'aqi': np.arange(rows, dtype=np.float64)})
+
+
+def test_enforce_budget_evicts_stale_keys_but_not_active_ones():
+    state = {"chat_messages_delhi": _chat(4), "chat_messages_mumbai": _chat(4), "city": "Delhi"}
+    state[LAST_USED_KEY] = {"chat_messages_delhi": 0, "chat_messages_mumbai": 0}
+    result = enforce_budget(state, active_keys=["chat_messages_delhi"], ttl_s=60, now=1000)
+    assert result['evicted'] == ["chat_messages_mumbai"]
+    assert set(state) == {"chat_messages_delhi", "city", LAST_USED_KEY}
+
+
+def test_enforce_budget_evicts_least_recently_used_until_under_budget():
+    state = {f"frame_{i}": _frame(100_000) for i in range(4)}  # ~0.8 MB each
+    state[LAST_USED_KEY] = {"frame_0": 30, "frame_1": 10, "frame_2": 20, "frame_3": 40}
+    result = enforce_budget(state, evictable_prefixes=("frame_",), budget_mb=2, ttl_s=3600, now=50)
+    assert result['evicted'] == ["frame_1", "frame_2"]
+    assert result['bytes'] <= 2 * 2**20
+    assert set(state) == {"frame_0", "frame_3", LAST_USED_KEY}
+
+
+def test_shared_frames_are_stored_once():
+    first, second = {}, {}
+    session_memory.remember_frame(first, "current", _frame(10), shared_key=("test", "delhi"))
+    session_memory.remember_frame(second, "current", _frame(10), shared_key=("test", "delhi"))
+    assert session_memory.get_frame(first, "current") is session_memory.get_frame(second, "current")
+    assert session_memory.get_frame(first, "current")['aqi'].dtype == np.float32
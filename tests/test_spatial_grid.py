@@ -0,0 +1,32 @@
+import pytest
+
+from spatial_grid import cell_index, cell_label, snap_coordinates
+
+
+def test_nearby_points_snap_to_the_same_cell_center():
+    first = snap_coordinates(19.076, 72.877, cell_deg=0.1)
+    second = snap_coordinates(19.012, 72.803, cell_deg=0.1)
+    assert first == second == (19.05, 72.85)
+
+
+def test_points_across_a_cell_edge_snap_apart():
+    assert snap_coordinates(19.099, 72.85, 0.1) != snap_coordinates(19.101, 72.85, 0.1)
+
+
+def test_negative_coordinates_floor_toward_minus_infinity():
+    assert cell_index(-0.05, -0.05, 0.1) == (-1, -1)
+    assert snap_coordinates(-33.87, -151.21, 0.1) == pytest.approx((-33.85, -151.25))
+
+
+def test_longitude_wraps_around_the_antimeridian():
+    assert snap_coordinates(0.01, 180.05, 0.1) == snap_coordinates(0.01, -179.95, 0.1)
+
+
+@pytest.mark.parametrize("cell_deg", [0, -0.1])
+def test_snapping_disabled_returns_the_point(cell_deg):
+    assert snap_coordinates(19.076, 72.877, cell_deg) == (19.076, 72.877)
+
+
+def test_cell_label_uses_hemisphere_suffixes():
+    assert cell_label(19.076, 72.877, 0.1) == "19.05N_72.85E"
+    assert cell_label(-33.87, -151.21, 0.1) == "33.85S_151.2W"
@@ -0,0 +1,30 @@
+import time
+
+import numpy as np
+import pytest
+
+import telemetry
+
+pytestmark = pytest.mark.skipif(telemetry.current_rss_mb() is None, reason="RSS is not available")
+
+
+def test_span_peak_catches_memory_freed_inside_the_span():
+    with telemetry.trace("test") as spans:
+        with telemetry.span("allocate"):
+            block = np.ones(200 * 2**20 // 8)
+            time.sleep(20 * telemetry.RSS_SAMPLE_INTERVAL_S)
+            del block
+    record = spans[0]
+    # Freed before exit, so the before/after delta is about zero
+    assert record['rss_delta_mb'] < 100
+    assert record['peak_rss_mb'] - (record['rss_mb'] - record['rss_delta_mb']) > 150
+
+
+def test_nested_spans_each_get_a_peak():
+    with telemetry.trace("test") as spans:
+        with telemetry.span("outer"):
+            with telemetry.span("inner"):
+                pass
+    assert [record['name'] for record in spans] == ["inner", "outer"]
+    assert all(record['peak_rss_mb'] >= record['rss_mb'] for record in spans)
+    assert not telemetry._open_spans